@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the attempt write path against a local Postgres.
+Usage: python -m backend.benchmarks.attempt_throughput [--workers 16] [--attempts 200]
+
+Compares the previous ORM read-modify-write path with the upsert path in
+``backend.services.attempts.record_attempt``. Workers are paired onto the same
+user to mimic two tabs answering at once, which is what used to trip the
+duplicate-key race on first inserts. Creates a throwaway course and users and
+deletes them afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database import DATABASE_URL
+from backend.models.attempt import QuestionAttempt
+from backend.models.course import Course
+from backend.models.progress import TopicProgress
+from backend.models.question import Question
+from backend.models.question_metric import QuestionMetric
+from backend.models.streak import DailyStreak
+from backend.models.topic import Topic
+from backend.models.user import User
+from backend.services.attempts import next_metric_state, record_attempt
+from backend.services.progress import next_percent, stage_from_percent
+from backend.services.scheduler import DoublingScheduler
+from backend.services.streaks import advance_streak
+
+
+def legacy_attempt(db: Session, user_id, question: tuple, is_correct: bool) -> None:
+    """The pre-upsert write path: SELECT, mutate and flush each derived row."""
+    question_id, topic_id = question
+    db.add(QuestionAttempt(user_id=user_id, question_id=question_id, was_correct=is_correct, seconds=5))
+
+    progress = db.query(TopicProgress).filter_by(user_id=user_id, topic_id=topic_id).first()
+    if progress is None:
+        progress = TopicProgress(user_id=user_id, topic_id=topic_id, percent_complete=0)
+        db.add(progress)
+        db.flush()
+    progress.percent_complete = next_percent(progress.percent_complete, is_correct)
+    progress.stage = stage_from_percent(progress.percent_complete)
+
+    now = datetime.utcnow()
+    metrics = db.query(QuestionMetric).filter_by(user_id=user_id, question_id=question_id).first()
+    if metrics is None:
+        metrics = QuestionMetric(user_id=user_id, question_id=question_id, rolling_accuracy=0.5, attempts=0)
+        db.add(metrics)
+    (
+        metrics.rolling_accuracy,
+        metrics.attempts,
+        metrics.last_seen_at,
+        metrics.next_due_at,
+        _state,
+    ) = next_metric_state(
+        metrics.rolling_accuracy,
+        metrics.attempts,
+        metrics.last_seen_at,
+        metrics.next_due_at,
+        None,
+        is_correct,
+        now,
+        DoublingScheduler(),
+    )
+
+    streak = db.get(DailyStreak, user_id)
+    if streak is None:
+        db.add(DailyStreak(user_id=user_id, current_streak=1, longest_streak=1, last_active_date=now.date()))
+    else:
+        streak.current_streak, streak.longest_streak, streak.last_active_date = advance_streak(
+            streak.current_streak, streak.longest_streak, streak.last_active_date, now.date()
+        )
+
+    db.commit()
+    db.refresh(progress)
+
+
+def upsert_attempt(db: Session, user_id, question: tuple, is_correct: bool) -> None:
+    question_id, topic_id = question
+    record_attempt(db, user_id, question_id, topic_id, is_correct, 5)
+    db.commit()
+
+
+def setup(session_factory, users: int, questions: int):
+    code = f"BENCH{uuid.uuid4().hex[:8].upper()}"
+    with session_factory() as db:
+        db.add(Course(code=code, name="Attempt throughput benchmark"))
+        topic = Topic(course_code=code, name="Benchmark")
+        db.add(topic)
+        db.flush()
+        question_rows = [
+            Question(topic_id=topic.id, prompt=f"Q{i}", choices=["a", "b", "c", "d"], correct_index=0)
+            for i in range(questions)
+        ]
+        user_rows = [
+            User(email=f"{uuid.uuid4().hex}@bench.invalid", display_name="bench", password_hash="x")
+            for _ in range(users)
+        ]
+        db.add_all(question_rows + user_rows)
+        db.commit()
+        return code, [u.id for u in user_rows], [(q.id, q.topic_id) for q in question_rows]
+
+
+def teardown(session_factory, code: str, user_ids: list) -> None:
+    with session_factory() as db:
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(Course).filter(Course.code == code).delete(synchronize_session=False)
+        db.commit()
+
+
+def run(label: str, write, session_factory, workers: int, attempts: int, questions: int) -> None:
+    code, user_ids, question_rows = setup(session_factory, max(1, workers // 2), questions)
+
+    def worker(index: int) -> int:
+        failures = 0
+        rng = random.Random(index)
+        user_id = user_ids[index // 2 % len(user_ids)]
+        for _ in range(attempts):
+            with session_factory() as db:
+                try:
+                    write(db, user_id, rng.choice(question_rows), rng.random() < 0.7)
+                except Exception:
+                    db.rollback()
+                    failures += 1
+        return failures
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = sum(pool.map(worker, range(workers)))
+        elapsed = time.perf_counter() - started
+    finally:
+        teardown(session_factory, code, user_ids)
+
+    total = workers * attempts
+    print(
+        f"{label:>7}: {total - errors} ok / {errors} failed in {elapsed:.2f}s "
+        f"-> {(total - errors) / elapsed:,.0f} attempts/sec"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=200, help="attempts per worker")
+    parser.add_argument("--questions", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL, pool_size=args.workers, max_overflow=0, future=True)
+    session_factory = sessionmaker(bind=engine, autoflush=False, future=True)
+
+    run("legacy", legacy_attempt, session_factory, args.workers, args.attempts, args.questions)
+    run("upsert", upsert_attempt, session_factory, args.workers, args.attempts, args.questions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the default vs fast response paths of the large list endpoints.
+Usage: python -m backend.benchmarks.list_responses [--questions 10000] [--topics 2000] [--requests 200]
+
+Mounts throwaway routes on an in-process FastAPI app that return the same
+synthetic rows two ways and drives them through TestClient, so routing,
+response_model validation and encoding are all measured (no database):
+
+* deck: list of dicts through ``jsonable_encoder`` vs ``FastJSONResponse``
+* progress: ``ProgressItem`` models re-validated by ``response_model`` vs
+  ``trusted_list_response``
+
+Reports p50/p99 per route. orjson is used by the fast path when installed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.benchmarks.serialization import synthetic_rows
+from backend.responses import FastJSONResponse, orjson_available, trusted_list_response
+from backend.routers.students import _question_item
+from backend.schemas import ProgressItem, ProgressStage
+
+
+def progress_rows(count: int) -> list[dict]:
+    return [
+        {
+            "topic_id": uuid.uuid4(),
+            "topic_name": f"Topic {index}",
+            "course_code": f"COMP{2000 + index % 50}",
+            "stage": random.choice(list(ProgressStage)),
+            "percent_complete": random.randint(0, 100),
+        }
+        for index in range(count)
+    ]
+
+
+def build_app(questions: int, topics: int) -> FastAPI:
+    deck = synthetic_rows(questions)
+    progress = progress_rows(topics)
+    app = FastAPI()
+
+    @app.get("/deck/default")
+    def deck_default():
+        return [_question_item(row) for row in deck]
+
+    @app.get("/deck/fast")
+    def deck_fast():
+        return FastJSONResponse([_question_item(row) for row in deck])
+
+    @app.get("/progress/default", response_model=list[ProgressItem])
+    def progress_default():
+        return [ProgressItem(**row) for row in progress]
+
+    @app.get("/progress/fast", response_model=list[ProgressItem])
+    def progress_fast():
+        return trusted_list_response(ProgressItem, progress)
+
+    return app
+
+
+def measure(client: TestClient, path: str, requests: int) -> list[float]:
+    client.get(path)  # warm up caches and adapters
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--topics", type=int, default=2_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(args.questions, args.topics))
+    print(f"{args.questions:,} questions, {args.topics:,} progress rows, {args.requests} requests per route")
+    print(f"fast JSON encoder: {'orjson' if orjson_available() else 'stdlib json'}")
+    for path in ("/deck/default", "/deck/fast", "/progress/default", "/progress/fast"):
+        timings = sorted(measure(client, path, args.requests))
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{path:>18}: p50 {statistics.median(timings) * 1000:7.1f} ms, p99 {p99 * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
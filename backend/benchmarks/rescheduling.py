@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Batch rescheduling time: vectorised schedulers vs the per-row live rule.
+Usage: python -m backend.benchmarks.rescheduling [--answers 200000] [--pairs 20000]
+
+Builds a synthetic answer history (no database) and replays it through
+every scheduler in ``backend.services.scheduler``, then through
+``next_metric_state`` one answer at a time, which is what a Python
+rescheduling loop would cost.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.services.attempts import NEW_METRIC_STATE, next_metric_state
+from backend.services.scheduler import SCHEDULERS, AnswerHistory, DoublingScheduler, get_scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=200_000)
+    parser.add_argument("--pairs", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pair_codes = np.sort(rng.integers(0, args.pairs, args.answers))
+    answered_at = 1.7e9 + np.cumsum(rng.random(args.answers) * 3600)
+    correct = rng.random(args.answers) < 0.7
+    history = AnswerHistory.from_sorted(pair_codes, answered_at, correct)
+
+    print(f"{args.answers:,} answers over {len(history):,} pairs")
+    for name in SCHEDULERS:
+        started = time.perf_counter()
+        get_scheduler(name).reschedule(history)
+        print(f"{name:>10}: {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    started = time.perf_counter()
+    doubling = DoublingScheduler()
+    states: dict = {}
+    for code, moment, is_correct in zip(pair_codes.tolist(), answered_at.tolist(), correct.tolist()):
+        previous = states.get(code, NEW_METRIC_STATE)
+        states[code] = next_metric_state(*previous, is_correct, datetime.fromtimestamp(moment, timezone.utc), doubling)
+    print(f"{'per-row':>10}: {(time.perf_counter() - started) * 1000:8.1f} ms (next_metric_state loop)")
+
+
+if __name__ == "__main__":
+    main()
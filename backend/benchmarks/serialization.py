@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Encode-time and payload-size benchmark for the question deck: JSON vs MessagePack.
+Usage: python -m backend.benchmarks.serialization [--questions 10000] [--repeat 20]
+
+Builds a synthetic deck shaped like ``questions-for-extension`` rows (no
+database needed) and encodes it the way each response path does:
+
+* fastapi-json: ``jsonable_encoder`` + ``json.dumps``, what a returned list costs
+* json: ``json.dumps`` of the already JSON-shaped items
+* msgpack: ``backend.responses.packb`` of the native items (UUIDs, datetimes)
+
+Reports best-of-N encode and decode time and body size, raw and gzipped.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.responses import msgpack_available, packb
+from backend.routers.students import _question_item
+
+WORDS = "stack queue heap graph tree hash array pointer recursion invariant complexity".split()
+
+
+def _text(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+def synthetic_rows(count: int) -> list[SimpleNamespace]:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(count):
+        seen = index % 3 != 0
+        last_seen_at = now - timedelta(hours=random.randint(1, 500)) if seen else None
+        rows.append(
+            SimpleNamespace(
+                _mapping={
+                    "id": uuid.uuid4(),
+                    "topic": f"Topic {index % 40}",
+                    "course_code": "COMP2521",
+                    "prompt": _text(25),
+                    "options": [_text(5) for _ in range(4)],
+                    "correctAnswer": random.randint(0, 3),
+                    "difficulty": random.choice(("easy", "medium", "hard")),
+                    "explanation": _text(60),
+                    "last_seen_at": last_seen_at,
+                    "next_due_at": last_seen_at + timedelta(days=2) if seen else None,
+                    "rolling_accuracy": random.random() if seen else None,
+                    "attempts": random.randint(1, 30) if seen else None,
+                }
+            )
+        )
+    return rows
+
+
+def best_of(repeat: int, func) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.questions)
+    cases = {
+        "fastapi-json": (
+            lambda: json.dumps(jsonable_encoder([_question_item(row) for row in rows])).encode(),
+            json.loads,
+        ),
+        "json": (lambda: json.dumps([_question_item(row) for row in rows]).encode(), json.loads),
+    }
+    if msgpack_available():
+        import msgpack
+
+        cases["msgpack"] = (
+            lambda: packb([_question_item(row, native=True) for row in rows]),
+            lambda body: msgpack.unpackb(body, timestamp=3),
+        )
+    else:
+        print("msgpack is not installed; skipping the MessagePack case")
+
+    print(f"{args.questions:,} questions, best of {args.repeat}")
+    for label, (encode, decode) in cases.items():
+        encode_seconds, body = best_of(args.repeat, encode)
+        decode_seconds, _ = best_of(args.repeat, lambda: decode(body))
+        print(
+            f"{label:>13}: encode {encode_seconds * 1000:7.1f} ms, decode {decode_seconds * 1000:7.1f} ms, "
+            f"{len(body) / 1024:8.1f} KiB ({len(gzip.compress(body)) / 1024:7.1f} KiB gzipped)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Insert-throughput benchmark for uuid4 vs UUIDv7 primary keys against a local Postgres.
+Usage: python -m backend.benchmarks.uuid_keys [--rows 1000000] [--batch 1000]
+
+Fills a scratch table shaped like question_attempts (dropped afterwards) with
+each key generator and reports rows/sec, the primary-key index size, and how
+much of that index was served from shared buffers. Random keys touch a random
+leaf page per insert; time-ordered keys keep appending to the rightmost one.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, Table, create_engine, insert, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from backend.database import DATABASE_URL
+from backend.services.ids import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def bench_table(name: str) -> Table:
+    return Table(
+        name,
+        MetaData(),
+        Column("id", PG_UUID(as_uuid=True), primary_key=True),
+        Column("user_id", PG_UUID(as_uuid=True), nullable=False),
+        Column("question_id", PG_UUID(as_uuid=True), nullable=False),
+        Column("was_correct", Boolean, nullable=False),
+        Column("seconds", Integer, nullable=False),
+        Column("answered_at", DateTime(timezone=True), nullable=False),
+    )
+
+
+def fill(conn, table: Table, generate, rows: int, batch: int) -> float:
+    user_id, question_id = uuid.uuid4(), uuid.uuid4()
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        now = datetime.now(timezone.utc)
+        conn.execute(
+            insert(table),
+            [
+                {
+                    "id": generate(),
+                    "user_id": user_id,
+                    "question_id": question_id,
+                    "was_correct": True,
+                    "seconds": 5,
+                    "answered_at": now,
+                }
+                for _ in range(min(batch, rows - offset))
+            ],
+        )
+        conn.commit()
+    return time.perf_counter() - started
+
+
+def run(engine, label: str, rows: int, batch: int) -> None:
+    table = bench_table(f"bench_keys_{label}_{uuid.uuid4().hex[:8]}")
+    index = f"{table.name}_pkey"
+
+    with engine.connect() as conn:
+        table.create(conn)
+        conn.commit()
+        try:
+            elapsed = fill(conn, table, GENERATORS[label], rows, batch)
+            index_bytes = conn.execute(
+                text("SELECT pg_relation_size(CAST(:name AS regclass))"), {"name": index}
+            ).scalar()
+            # Statistics are reported asynchronously; good enough for a comparison
+            hits, reads = conn.execute(
+                text("SELECT idx_blks_hit, idx_blks_read FROM pg_statio_user_indexes WHERE indexrelname = :name"),
+                {"name": index},
+            ).first() or (0, 0)
+        finally:
+            table.drop(conn)
+            conn.commit()
+
+    hit_ratio = f"{hits / (hits + reads):.1%}" if hits + reads else "n/a"
+    print(
+        f"{label}: {rows:,} rows in {elapsed:.2f}s -> {rows / elapsed:,.0f} rows/sec; "
+        f"pkey {index_bytes / 1024 / 1024:.1f} MiB, buffer hit ratio {hit_ratio}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per INSERT/commit")
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL, future=True)
+    for label in GENERATORS:
+        run(engine, label, args.rows, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import uuid
 
 from fastapi import Depends, HTTPException, status
@@ -9,14 +10,19 @@ from sqlalchemy.orm import Session
 from backend.database import get_db
 from backend.models.user import User
 from backend.services.auth import decode_access_token
+from backend.services.ttl_store import build_ttl_store
 
 _security = HTTPBearer(auto_error=False)
 
+# How long a user found active is trusted by get_active_user_id without a lookup
+ACTIVE_USER_CACHE_SECONDS = float(os.getenv("ACTIVE_USER_CACHE_SECONDS", "60"))
+_active_users = build_ttl_store("ACTIVE_USER_CACHE_REDIS_URL", "unimind:active-user:")
 
-def get_current_user(
+
+def get_current_user_id(
     credentials: HTTPAuthorizationCredentials | None = Depends(_security),
-    db: Session = Depends(get_db),
-) -> User:
+) -> uuid.UUID:
+    """Resolve the user id from the bearer token alone, without a database lookup."""
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing credentials")
 
@@ -26,11 +32,13 @@ def get_current_user(
 
     user_id = payload.get("sub")
     try:
-        user_uuid = uuid.UUID(user_id)
+        return uuid.UUID(user_id)
     except (TypeError, ValueError) as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject") from exc
 
-    user = db.get(User, user_uuid)
+
+def load_active_user(db: Session, user_id: uuid.UUID) -> User:
+    user = db.get(User, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found for token")
 
@@ -38,3 +46,27 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User account is inactive")
 
     return user
+
+
+def get_current_user(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+) -> User:
+    return load_active_user(db, user_id)
+
+
+def get_active_user_id(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+) -> uuid.UUID:
+    """Like ``get_current_user_id``, but rejects missing and inactive users.
+
+    Users found active are cached for ``ACTIVE_USER_CACHE_SECONDS``, so hot
+    write paths only query ``users`` once per user per window (the session is
+    not connected on a hit).
+    """
+    key = str(user_id)
+    if _active_users.get(key) is None:
+        load_active_user(db, user_id)
+        _active_users.set(key, {"active": True}, ACTIVE_USER_CACHE_SECONDS)
+    return user_id
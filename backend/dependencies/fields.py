@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+from fastapi import HTTPException, Query, status
+
+from backend.responses import FastJSONResponse
+
+
+class FieldSelector:
+    """Dependency parsing a sparse fieldset (``?fields=a,b``) for a list endpoint.
+
+    Resolves to the selected names in the endpoint's canonical order, always
+    including ``required``; without the parameter every field is selected.
+    """
+
+    def __init__(self, allowed: Iterable[str], required: Iterable[str] = ()):
+        self.allowed = tuple(allowed)
+        self.required = frozenset(required)
+
+    def __call__(
+        self,
+        fields: str | None = Query(default=None, description="Comma-separated fields to return"),
+    ) -> tuple[str, ...]:
+        if fields is None:
+            return self.allowed
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names.difference(self.allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(self.allowed)}",
+            )
+        names |= self.required
+        return tuple(name for name in self.allowed if name in names)
+
+    def is_full(self, selected: tuple[str, ...]) -> bool:
+        return selected == self.allowed
+
+
+def partial_response(rows: Iterable[Mapping], fields: tuple[str, ...]) -> FastJSONResponse:
+    """Serialize only ``fields`` of each row, bypassing the endpoint's response model."""
+    return FastJSONResponse([{name: row[name] for name in fields} for row in rows])
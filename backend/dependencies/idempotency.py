@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from fastapi import Header, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from backend.services.idempotency import IdempotencyKeyReused, store_response, stored_response
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def get_idempotency_key(
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", min_length=1, max_length=255),
+) -> str | None:
+    """Optional client-chosen key identifying one logical submission across retries."""
+    return idempotency_key
+
+
+def replay_response(db: Session, response: Response, user_id, key: str | None, fingerprint: str) -> dict | None:
+    """Return the stored response for a retried request, or None for a new one."""
+    if key is None:
+        return None
+    try:
+        stored = stored_response(db, user_id, key, fingerprint)
+    except IdempotencyKeyReused as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    if stored is not None:
+        response.headers[REPLAYED_HEADER] = "true"
+    return stored
+
+
+def commit_with_key(
+    db: Session,
+    response: Response,
+    user_id,
+    key: str | None,
+    fingerprint: str,
+    body: dict,
+) -> dict | None:
+    """Store ``body`` under ``key`` and commit.
+
+    If a concurrent request with the same key won, this request's writes are
+    rolled back and the winner's response is returned instead.
+    """
+    if key is not None:
+        try:
+            stored = store_response(db, user_id, key, fingerprint, body)
+        except IdempotencyKeyReused as exc:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+        if stored is not None:
+            db.rollback()
+            response.headers[REPLAYED_HEADER] = "true"
+            return stored
+    db.commit()
+    return None
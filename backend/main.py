@@ -5,9 +5,13 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.compression import CompressionMiddleware
 from backend.database import Base, engine
 from backend.migrations import run_startup_migrations
 from backend.routers import auth, courses, gate, students
+from backend.services.attempts import outbox_enabled
+from backend.services.partitions import start_partition_maintenance
+from backend.services.telemetry import flush_block_events
 
 app = FastAPI(title="UniMind API")
 
@@ -19,6 +23,20 @@ app.include_router(courses.router)
 app.include_router(students.router)
 app.include_router(gate.router)
 
+# Write buffered extension telemetry before the worker exits
+app.add_event_handler("shutdown", flush_block_events)
+
+# Keep next months' question_attempts partitions created ahead of time
+app.add_event_handler("startup", lambda: start_partition_maintenance(engine))
+
+# In outbox mode derived attempt state is projected asynchronously. Set
+# PROJECTOR_EMBEDDED=0 when running `python -m backend.services.projections`
+# as a separate worker instead.
+if outbox_enabled() and os.getenv("PROJECTOR_EMBEDDED", "1") != "0":
+    from backend.services.projections import start_background_projector
+
+    app.add_event_handler("startup", start_background_projector)
+
 DEFAULT_ALLOWED_ORIGINS = [
     "https://uni-mind-inky.vercel.app",
     "https://unimind-production.up.railway.app",
@@ -43,6 +61,8 @@ def get_allowed_origins() -> list[str]:
     return origins or DEFAULT_ALLOWED_ORIGINS
 
 
+# Added before CORS so it runs inside it: CORS headers are set on the final response
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=get_allowed_origins(),
@@ -1,7 +1,8 @@
 import logging
+import sys
 from typing import Tuple
 
-from sqlalchemy import inspect
+from sqlalchemy import bindparam, inspect, select, update
 from sqlalchemy.engine import Engine
 
 logger = logging.getLogger(__name__)
@@ -17,7 +18,87 @@ def _sqlite_version(engine: Engine) -> Tuple[int, int, int]:
 def run_startup_migrations(engine: Engine) -> None:
     """Run lightweight, idempotent migrations at application boot."""
     inspector = inspect(engine)
+    _drop_users_degree(engine, inspector)
 
+    if engine.dialect.name in {"postgresql", "postgres"}:
+        from backend.services.sync import install_sync_tracking, purge_tombstones
+
+        install_sync_tracking(engine)
+        purge_tombstones(engine)
+        _add_checkpoint_tx_id(engine, inspector)
+        _add_metric_scheduler_state(engine, inspector)
+
+    _create_missing_indexes(engine)
+
+    if engine.dialect.name in {"postgresql", "postgres"} and "question_attempts" in inspector.get_table_names():
+        from backend.services import daily_activity, metric_backfill
+        from backend.services.partitions import maintain_partitions
+
+        maintain_partitions(engine)
+        daily_activity.backfill_if_empty(engine)
+        metric_backfill.backfill_if_empty(engine)
+
+
+def _add_checkpoint_tx_id(engine: Engine, inspector) -> None:
+    """Projection checkpoints moved from ``seq`` to ``(tx_id, seq)``.
+
+    Existing checkpoints are marked with ``-1``; the projector finishes them
+    in ``seq`` order and then converts them (see ``project_once``).
+    """
+    if "projection_checkpoints" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("projection_checkpoints")}
+    if "last_tx_id" in columns:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "ALTER TABLE projection_checkpoints ADD COLUMN last_tx_id bigint NOT NULL DEFAULT 0"
+            )
+            conn.exec_driver_sql("UPDATE projection_checkpoints SET last_tx_id = -1")
+        logger.info("[migrations] Added projection_checkpoints.last_tx_id")
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[migrations] Could not add projection_checkpoints.last_tx_id (%s)", exc)
+
+
+def _add_metric_scheduler_state(engine: Engine, inspector) -> None:
+    """Per-pair scheduler state; existing rows start without it and are replayed on their next answer."""
+    if "question_metrics" not in inspector.get_table_names():
+        return
+    columns = {col["name"] for col in inspector.get_columns("question_metrics")}
+    if "scheduler_state" in columns:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE question_metrics ADD COLUMN scheduler_state jsonb")
+        logger.info("[migrations] Added question_metrics.scheduler_state")
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[migrations] Could not add question_metrics.scheduler_state (%s)", exc)
+
+
+def _create_missing_indexes(engine: Engine) -> None:
+    """``create_all`` skips existing tables, so add indexes declared on them later.
+
+    On the partitioned ``question_attempts`` an index created on the parent
+    is created on every partition too.
+    """
+    from backend.models.attempt import QuestionAttempt
+    from backend.models.attempt_event import AttemptEvent
+    from backend.models.question_metric import QuestionMetric
+
+    for index in (
+        *QuestionMetric.__table__.indexes,
+        *AttemptEvent.__table__.indexes,
+        *QuestionAttempt.__table__.indexes,
+    ):
+        try:
+            with engine.begin() as conn:
+                index.create(conn, checkfirst=True)
+        except Exception as exc:  # pragma: no cover - defensive guard
+            logger.warning("[migrations] Could not create index %s (%s)", index.name, exc)
+
+
+def _drop_users_degree(engine: Engine, inspector) -> None:
     if "users" not in inspector.get_table_names():
         return
 
@@ -54,3 +135,63 @@ def run_startup_migrations(engine: Engine) -> None:
             "Apply the change manually if you rely on that table.",
             exc,
         )
+
+
+def _rekey_targets():
+    from backend.models.attempt import QuestionAttempt
+    from backend.models.blocked_site import BlockedSite
+
+    return {
+        "question_attempts": (QuestionAttempt.__table__, QuestionAttempt.__table__.c.answered_at),
+        "blocked_sites": (BlockedSite.__table__, BlockedSite.__table__.c.created_at),
+    }
+
+
+def rekey_to_uuid7(engine: Engine, table_name: str, batch_size: int = 5000) -> int:
+    """Replace random (v4) primary keys with UUIDv7 ids derived from each row's timestamp.
+
+    New rows already get time-ordered ids; this optional one-off pass moves
+    existing rows into the same order. Nothing references these ids by
+    foreign key. Rows are streamed on one connection and re-keyed in batches
+    committed on another, so the table stays writable. Run
+    ``REINDEX TABLE CONCURRENTLY <table>`` and ``VACUUM`` afterwards to
+    reclaim the old index pages.
+    """
+    from backend.services.ids import uuid7_at
+
+    table, time_column = _rekey_targets()[table_name]
+    stmt = (
+        update(table)
+        # The timestamp lets partitioned tables prune to one partition
+        .where(table.c.id == bindparam("old_id"), time_column == bindparam("moment"))
+        .values(id=bindparam("new_id"))
+    )
+
+    rekeyed = 0
+    with engine.connect() as reader:
+        rows = reader.execution_options(stream_results=True, yield_per=batch_size).execute(
+            select(table.c.id, time_column)
+        )
+        for partition in rows.partitions():
+            batch = [
+                {"old_id": row_id, "moment": moment, "new_id": uuid7_at(moment)}
+                for row_id, moment in partition
+                if row_id.version != 7
+            ]
+            if batch:
+                with engine.begin() as writer:
+                    writer.execute(stmt, batch)
+                rekeyed += len(batch)
+                logger.info("[migrations] Re-keyed %s rows in %s", rekeyed, table_name)
+    return rekeyed
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.migrations rekey-uuid7 <question_attempts|blocked_sites>
+    if len(sys.argv) != 3 or sys.argv[1] != "rekey-uuid7" or sys.argv[2] not in _rekey_targets():
+        print("Usage: python -m backend.migrations rekey-uuid7 <question_attempts|blocked_sites>")
+        sys.exit(1)
+    from backend.database import engine as _engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Re-keyed {rekey_to_uuid7(_engine, sys.argv[2])} rows")
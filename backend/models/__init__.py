@@ -15,3 +15,9 @@ from .assessment import Assessment
 from .streak import DailyStreak
 from .question_metric import QuestionMetric
 from .blocked_site import BlockedSite
+from .domain_activity import DomainActivityDaily
+from .attempt_event import AttemptEvent, ProjectionCheckpoint
+from .idempotency_key import IdempotencyKey
+from .daily_activity import UserDailyActivity
+from .sync import SyncTombstone
+from .gate_nonce import ConsumedGradingNonce
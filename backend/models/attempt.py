@@ -3,17 +3,33 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, func
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from backend.services.ids import uuid7
+
 from . import Base
 
 
 class QuestionAttempt(Base):
+    """One answered question.
+
+    Range-partitioned by month on ``answered_at`` (partitions are managed by
+    ``backend.services.partitions``), so the partition key is part of the
+    primary key.
+    """
+
     __tablename__ = "question_attempts"
+    __table_args__ = (
+        # Per-user time ranges ("today", last N days)
+        Index("ix_question_attempts_user_answered_at", "user_id", "answered_at"),
+        # Cheap whole-table time scans; rows arrive in answered_at order
+        Index("ix_question_attempts_answered_at_brin", "answered_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (answered_at)"},
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id: Mapped[uuid.UUID] = mapped_column(
         PG_UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="CASCADE"),
@@ -30,7 +46,7 @@ class QuestionAttempt(Base):
     answered_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        nullable=False,
+        primary_key=True,
     )
 
     user: Mapped["User"] = relationship(back_populates="attempts")
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Identity, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+
+class AttemptEvent(Base):
+    """Append-only outbox of answered questions.
+
+    Projectors consume events in ``(tx_id, seq)`` order. ``tx_id`` records
+    the writing transaction: once it is below the snapshot horizon that
+    transaction and every older one have finished, so no event can later
+    appear before the checkpoint. ``seq`` alone is not safe because sequence
+    numbers are taken mid-transaction and interleave across transactions.
+    """
+
+    __tablename__ = "attempt_events"
+    __table_args__ = (
+        # Projector scan order
+        Index("ix_attempt_events_tx_id_seq", "tx_id", "seq"),
+    )
+
+    seq: Mapped[int] = mapped_column(BigInteger, Identity(always=True), primary_key=True)
+    tx_id: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("(pg_current_xact_id()::text::bigint)"),
+        nullable=False,
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    question_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    topic_id: Mapped[uuid.UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    was_correct: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    seconds: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    answered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+class ProjectionCheckpoint(Base):
+    """Last ``(attempt_events.tx_id, seq)`` applied by each named projection."""
+
+    __tablename__ = "projection_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_tx_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
@@ -8,6 +8,7 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from . import Base
+from .sync import sync_tx_column
 
 
 class Enrolment(Base):
@@ -29,6 +30,7 @@ class Enrolment(Base):
         server_default=func.now(),
         nullable=False,
     )
+    sync_tx: Mapped[int] = sync_tx_column()
 
     user: Mapped["User"] = relationship(back_populates="enrolments")
     course: Mapped["Course"] = relationship(back_populates="enrolments")
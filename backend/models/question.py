@@ -5,6 +5,7 @@ from sqlalchemy import String, Text, DateTime, ForeignKey, func, Enum, CheckCons
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from . import Base
+from .sync import sync_tx_column
 
 DifficultyEnum = Enum("easy", "medium", "hard", name="difficulty_enum")
 
@@ -31,6 +32,7 @@ class Question(Base):
     explanation: Mapped[str | None] = mapped_column(Text)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sync_tx: Mapped[int] = sync_tx_column()
 
     topic:     Mapped["Topic"]     = relationship(back_populates="questions")
     subtopic:  Mapped["Subtopic"]  = relationship(back_populates="questions")
@@ -3,11 +3,12 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import Base
+from .sync import sync_tx_column
 
 
 class QuestionMetric(Base):
@@ -18,6 +19,10 @@ class QuestionMetric(Base):
     """
 
     __tablename__ = "question_metrics"
+    __table_args__ = (
+        # Due queue: a user's rows in due order, read K at a time
+        Index("ix_question_metrics_user_next_due_at", "user_id", "next_due_at"),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         PG_UUID(as_uuid=True),
@@ -34,4 +39,8 @@ class QuestionMetric(Base):
     attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     next_due_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Per-pair state of the live scheduler (e.g. FSRS stability), tagged with its name;
+    # NULL for the doubling rule, whose state is next_due_at - last_seen_at
+    scheduler_state: Mapped[dict | None] = mapped_column(JSONB(none_as_null=True))
+    sync_tx: Mapped[int] = sync_tx_column()
 
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Identity, String, func, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from . import Base
+
+CURRENT_TX_ID = text("(pg_current_xact_id()::text::bigint)")
+
+
+def sync_tx_column() -> Mapped[int]:
+    """Id of the transaction that last wrote the row (updates are stamped by a trigger)."""
+    return mapped_column(BigInteger, server_default=CURRENT_TX_ID, nullable=False, index=True)
+
+
+class SyncTombstone(Base):
+    """Deletions that delta-syncing clients must hear about, written by triggers."""
+
+    __tablename__ = "sync_tombstones"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(always=True), primary_key=True)
+    sync_tx: Mapped[int] = sync_tx_column()
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # "question" | "enrolment" | "horizon"
+    question_id: Mapped[uuid.UUID | None] = mapped_column(PG_UUID(as_uuid=True))
+    # Course of a deleted question, so only its enrolled students hear about it
+    course_code: Mapped[str | None] = mapped_column(String(32))
+    user_id: Mapped[uuid.UUID | None] = mapped_column(PG_UUID(as_uuid=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
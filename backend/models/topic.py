@@ -5,6 +5,7 @@ from sqlalchemy import String, Text, DateTime, ForeignKey, func, UniqueConstrain
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from . import Base
+from .sync import sync_tx_column
 
 class Topic(Base):
     __tablename__ = "topics"
@@ -17,6 +18,7 @@ class Topic(Base):
     description: Mapped[str | None] = mapped_column(Text)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    sync_tx: Mapped[int] = sync_tx_column()
 
     course:     Mapped["Course"]             = relationship(back_populates="topics")
     subtopics:  Mapped[list["Subtopic"]]     = relationship(back_populates="topic", cascade="all, delete-orphan")
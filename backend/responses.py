@@ -0,0 +1,127 @@
+"""Fast response paths for bulk endpoints.
+
+``FastJSONResponse`` encodes with orjson (from requirements.txt; stdlib json
+if it is missing) and skips ``jsonable_encoder``. ``trusted_list_response``
+serializes rows that came from the database as ``list[Model]`` without
+building and re-validating one model per row.
+
+``MsgPackResponse`` answers ``Accept: application/msgpack``. UUIDs are packed
+as extension type 1 holding the 16 raw bytes and aware datetimes as the
+standard timestamp extension (-1), so neither travels as a string. msgpack is
+in requirements.txt; an install without it keeps answering JSON.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Iterable, Mapping
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+UUID_EXT_TYPE = 1
+
+
+@lru_cache(maxsize=1)
+def orjson_available() -> bool:
+    return importlib.util.find_spec("orjson") is not None
+
+
+def _json_default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Compact JSON bytes; UUIDs, datetimes, enums and models are encoded as FastAPI would."""
+    if orjson_available():
+        import orjson
+
+        return orjson.dumps(content, default=_json_default)
+    return json.dumps(content, separators=(",", ":"), default=_json_default).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def trusted_list_response(model: type[BaseModel], rows: Iterable[Mapping], headers: dict | None = None) -> Response:
+    """Serialize rows as ``list[model]`` without building a model per row.
+
+    Only for data the database already guarantees. With orjson the model's
+    fields are encoded straight from the rows (UTC as ``Z``, like pydantic);
+    otherwise a cached TypeAdapter validates and dumps them in one pass.
+    """
+    if orjson_available():
+        import orjson
+
+        fields = tuple(model.model_fields)
+        items = [{name: row[name] for name in fields} for row in rows]
+        body = orjson.dumps(items, default=_json_default, option=orjson.OPT_UTC_Z)
+    else:
+        adapter = _list_adapter(model)
+        body = adapter.dump_json(adapter.validate_python(list(rows)))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@lru_cache(maxsize=1)
+def msgpack_available() -> bool:
+    return importlib.util.find_spec("msgpack") is not None
+
+
+def wants_msgpack(accept: str | None) -> bool:
+    return MSGPACK_MEDIA_TYPE in (accept or "") and msgpack_available()
+
+
+def _default(value):
+    import msgpack
+
+    if isinstance(value, uuid.UUID):
+        return msgpack.ExtType(UUID_EXT_TYPE, value.bytes)
+    if isinstance(value, datetime):
+        # Aware datetimes are packed natively; only naive (UTC) ones end up here
+        return msgpack.Timestamp.from_datetime(value.replace(tzinfo=timezone.utc))
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot pack {type(value).__name__}")
+
+
+def packb(content) -> bytes:
+    import msgpack
+
+    return msgpack.packb(content, default=_default, datetime=True, use_bin_type=True)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return packb(content)
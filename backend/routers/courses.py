@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
 from backend.database import get_db
 from backend.dependencies.auth import get_current_user
+from backend.compression import precompressed_response
+from backend.dependencies.fields import FieldSelector, partial_response
+from backend.responses import trusted_list_response
 from backend.models.course import Course
 from backend.models.user import User
 from backend.models.topic import Topic
@@ -17,17 +20,27 @@ from backend.models.attempt import QuestionAttempt
 from backend.models.assessment import Assessment
 from backend.models.progress import TopicProgress
 from backend.schemas.course import CourseCreate, CourseOut, CourseUpdate
+from backend.services.catalog import current_catalog
 
 router = APIRouter(prefix="/courses", tags=["courses"])
 
+course_fields = FieldSelector(CourseOut.model_fields, required=("code",))
+
+
+def course_columns(fields: tuple[str, ...]):
+    return [getattr(Course, name) for name in fields]
+
 
 @router.get("", response_model=list[CourseOut])
 def list_courses(
+    fields: tuple[str, ...] = Depends(course_fields),
     db: Session = Depends(get_db),
     _: User = Depends(get_current_user),
 ):
-    courses = db.query(Course).order_by(Course.created_at.desc()).all()
-    return courses
+    courses = db.query(*course_columns(fields)).order_by(Course.created_at.desc()).all()
+    if not course_fields.is_full(fields):
+        return partial_response((row._mapping for row in courses), fields)
+    return trusted_list_response(CourseOut, (row._mapping for row in courses))
 
 
 @router.post("", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
@@ -80,6 +93,52 @@ def update_course(
     return course
 
 
+@router.get("/{course_code}/catalog")
+def get_catalog_manifest(
+    course_code: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Current version of the course's question catalog and where to download it."""
+    course = db.get(Course, course_code.upper())
+    if not course:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+
+    catalog = current_catalog(db, course.code)
+    response.headers["Cache-Control"] = "no-cache"
+    return {
+        "course_code": course.code,
+        "version": catalog.version,
+        "question_count": catalog.question_count,
+        "url": f"/courses/{course.code}/catalog/{catalog.version}",
+    }
+
+
+@router.get("/{course_code}/catalog/{version}")
+def get_catalog(
+    course_code: str,
+    version: str,
+    accept_encoding: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    _: User = Depends(get_current_user),
+):
+    """Question content for one catalog version.
+
+    Immutable, so the browser may cache it indefinitely, but it includes the
+    answers and needs a login, so shared caches (CDNs, proxies) must not.
+    """
+    catalog = current_catalog(db, course_code.upper())
+    if catalog.version != version:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalog version not found")
+
+    headers = {
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "ETag": f'"{catalog.version}"',
+    }
+    return precompressed_response(catalog.gzip_body, accept_encoding, headers=headers)
+
+
 @router.get("/{course_id}/overview")
 def get_course_overview(
     course_id: str,
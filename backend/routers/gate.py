@@ -1,41 +1,116 @@
 from __future__ import annotations
 
-from datetime import datetime
+import math
+import os
+import uuid
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
-from backend.dependencies.auth import get_current_user
-from backend.models.attempt import QuestionAttempt
+from backend.dependencies.auth import get_current_user, get_current_user_id, load_active_user
+from backend.dependencies.idempotency import commit_with_key, get_idempotency_key, replay_response
 from backend.models.question import Question
 from backend.models.topic import Topic
 from backend.models.user import User
-from backend.schemas import GateAnswerRequest, GateAnswerResult, GatePolicy, GateQuestion
-from backend.services.progress import apply_attempt, ensure_topic_progress
-from backend.services.streaks import update_streak
+from backend.schemas import (
+    GateAnswerRequest,
+    GateAnswerResult,
+    GatePack,
+    GatePackAnswerResult,
+    GatePackQuestion,
+    GatePackReport,
+    GatePolicy,
+    GateQuestion,
+)
+from backend.services.attempts import BatchAnswer, normalize_client_time, record_attempt, record_attempts_batch
+from backend.services.gate_state import ALLOWED, LOCKED, GateStatus, get_gate_state_store
+from backend.services.gate_tokens import PACK_TOKEN_TTL_SECONDS, consume_nonces, issue_grading_token, verify_grading_token
+from backend.services.idempotency import request_hash
+from backend.services.question_pool import get_question_pool, invalidate_question_pools, parse_difficulty_weights
+from backend.services.question_selector import choose_next_questions, load_deck
 
 router = APIRouter(prefix="/gate", tags=["gate"])
 
 ONE_HOUR_MS = 60 * 60 * 1000
+LOCKOUT_SECONDS_ON_FAIL = 30
+
+# e.g. "easy=1,medium=2,hard=1"; unset means every question is equally likely
+GATE_DIFFICULTY_WEIGHTS = parse_difficulty_weights(os.getenv("GATE_DIFFICULTY_WEIGHTS"))
 
 
 def _policy() -> GatePolicy:
-    return GatePolicy(allow_ms_on_correct=ONE_HOUR_MS, lockout_seconds_on_fail=30)
+    return GatePolicy(allow_ms_on_correct=ONE_HOUR_MS, lockout_seconds_on_fail=LOCKOUT_SECONDS_ON_FAIL)
+
+
+def _raise_if_locked(user_id: uuid.UUID, gate_status: GateStatus | None = None) -> None:
+    gate_status = gate_status or get_gate_state_store().status(user_id)
+    if gate_status is not None and gate_status.state == LOCKED:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Gate is locked after an incorrect answer",
+            headers={"Retry-After": str(math.ceil(gate_status.remaining_seconds))},
+        )
 
 
-@router.get("/question", response_model=GateQuestion)
+def _short_circuit(user_id: uuid.UUID) -> Response | None:
+    """Answer from gate state alone while a lockout or allowance is active."""
+    gate_status = get_gate_state_store().status(user_id)
+    _raise_if_locked(user_id, gate_status)
+    if gate_status is not None and gate_status.state == ALLOWED:
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"X-Gate-Allow-Ms": str(int(gate_status.remaining_seconds * 1000))},
+        )
+    return None
+
+
+@router.get(
+    "/question",
+    response_model=GateQuestion,
+    responses={204: {"description": "An allowance is active"}, 429: {"description": "Locked out"}},
+)
 def gate_question(
     target: str | None = Query(default=None, description="Optional course code filter"),
     db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    user_id: uuid.UUID = Depends(get_current_user_id),
 ):
-    query = db.query(Question, Topic).join(Topic, Topic.id == Question.topic_id)
-    if target:
-        query = query.filter(Topic.course_code == target.upper())
+    # Retry storms during a lockout or allowance never reach the database
+    short_circuit = _short_circuit(user_id)
+    if short_circuit is not None:
+        return short_circuit
+
+    current_user = load_active_user(db, user_id)
+    question_topic = None
+
+    # Prefer the question the scheduler considers most useful for this user
+    picked = choose_next_questions(load_deck(db, current_user.id, target), count=1)
+    if picked:
+        question_topic = (
+            db.query(Question, Topic)
+            .join(Topic, Topic.id == Question.topic_id)
+            .filter(Question.id == picked[0])
+            .first()
+        )
+
+    # Users without enrolments fall back to uniform sampling. A sampled id can
+    # point at a question deleted since the pool was built; rebuild once and
+    # retry before giving up.
+    for _retry in range(0 if question_topic else 2):
+        question_id = get_question_pool(db, target).sample(GATE_DIFFICULTY_WEIGHTS)
+        if question_id is None:
+            break
+        question_topic = (
+            db.query(Question, Topic)
+            .join(Topic, Topic.id == Question.topic_id)
+            .filter(Question.id == question_id)
+            .first()
+        )
+        if question_topic:
+            break
+        invalidate_question_pools(target)
 
-    question_topic = query.order_by(func.random()).first()
     if not question_topic:
         raise HTTPException(status_code=404, detail="No questions available for gating")
 
@@ -55,9 +130,20 @@ def gate_question(
 @router.post("/answer", response_model=GateAnswerResult)
 def gate_answer(
     payload: GateAnswerRequest,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(get_idempotency_key),
 ):
+    # A retry must get its original result back even though that answer
+    # may have started a lockout
+    fingerprint = request_hash("gate.answer", payload)
+    replay = replay_response(db, response, current_user.id, idempotency_key, fingerprint)
+    if replay is not None:
+        return replay
+
+    _raise_if_locked(current_user.id)
+
     question = db.get(Question, payload.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
@@ -66,30 +152,144 @@ def gate_answer(
         raise HTTPException(status_code=400, detail="answer_index out of range")
 
     is_correct = payload.answer_index == question.correct_index
+    stage, percent = record_attempt(db, current_user.id, question.id, question.topic_id, is_correct, payload.seconds)
+    allow_ms = ONE_HOUR_MS if is_correct else 0
+    result = GateAnswerResult(
+        correct=is_correct,
+        allow_ms=allow_ms,
+        explanation=question.explanation or "",
+        topic_id=question.topic_id,
+        stage=stage,
+        percent_complete=percent,
+    )
+    replay = commit_with_key(
+        db, response, current_user.id, idempotency_key, fingerprint, result.model_dump(mode="json")
+    )
+    if replay is not None:  # a concurrent duplicate already applied the gate state
+        return replay
 
-    progress = ensure_topic_progress(db, current_user.id, question.topic_id)
-    apply_attempt(progress, is_correct, payload.seconds)
+    if is_correct:
+        get_gate_state_store().allow(current_user.id, allow_ms)
+    else:
+        get_gate_state_store().lock_out(current_user.id, LOCKOUT_SECONDS_ON_FAIL)
+    return result
 
-    attempt = QuestionAttempt(
-        user_id=current_user.id,
-        question_id=question.id,
-        was_correct=is_correct,
-        seconds=payload.seconds or 0,
+
+@router.get("/pack", response_model=GatePack)
+def gate_pack(
+    size: int = Query(default=10, ge=1, le=50, description="Number of questions in the pack"),
+    target: str | None = Query(default=None, description="Optional course code filter"),
+    db: Session = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Return pre-selected gate questions the extension can grade offline.
+
+    Each question carries a signed grading token; answers are reported later
+    through ``POST /gate/pack/results`` so unlocking never waits on the API.
+    """
+    _raise_if_locked(user_id)
+    current_user = load_active_user(db, user_id)
+
+    question_ids = choose_next_questions(load_deck(db, current_user.id, target), count=size)
+    if not question_ids:
+        question_ids = get_question_pool(db, target).sample_many(size, GATE_DIFFICULTY_WEIGHTS)
+    if not question_ids:
+        raise HTTPException(status_code=404, detail="No questions available for gating")
+
+    rows = (
+        db.query(Question, Topic)
+        .join(Topic, Topic.id == Question.topic_id)
+        .filter(Question.id.in_(question_ids))
+        .all()
     )
-    db.add(attempt)
+    rank = {question_id: index for index, question_id in enumerate(question_ids)}
+    rows.sort(key=lambda row: rank[row[0].id])
 
-    update_streak(db, current_user.id, datetime.utcnow())
+    items: list[GatePackQuestion] = []
+    expires_at = int(datetime.now(timezone.utc).timestamp()) + PACK_TOKEN_TTL_SECONDS
+    for question, topic in rows:
+        claims, token = issue_grading_token(current_user.id, question.id, topic.id, question.correct_index)
+        expires_at = min(expires_at, claims.expires_at)
+        items.append(
+            GatePackQuestion(
+                question_id=question.id,
+                topic_id=topic.id,
+                topic_name=topic.name,
+                prompt=question.prompt,
+                choices=question.choices,
+                difficulty=question.difficulty,
+                nonce=claims.nonce,
+                answer_digest=claims.answer_digest,
+                grading_token=token,
+            )
+        )
 
-    db.commit()
-    db.refresh(progress)
+    return GatePack(
+        questions=items,
+        policy=_policy(),
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+    )
 
-    allow_ms = ONE_HOUR_MS if is_correct else 0
 
-    return GateAnswerResult(
-        correct=is_correct,
-        allow_ms=allow_ms,
-        explanation=question.explanation or "",
-        topic_id=question.topic_id,
-        stage=progress.stage,
-        percent_complete=progress.percent_complete,
+@router.post("/pack/results", response_model=list[GatePackAnswerResult])
+def gate_pack_results(
+    payload: GatePackReport,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Record answers the extension graded offline against pack tokens.
+
+    Each token is accepted once: its nonce is stored in the same transaction
+    as the attempts, so a retried or replayed report applies nothing twice.
+    """
+    now = datetime.now(timezone.utc)
+    claims_list = [verify_grading_token(answer.grading_token, current_user.id) for answer in payload.answers]
+
+    # Questions deleted since the pack was issued cannot take new attempts
+    referenced = {claims.question_id for claims in claims_list if claims is not None}
+    existing = {
+        question_id
+        for (question_id,) in db.query(Question.id).filter(Question.id.in_(referenced)).all()
+    } if referenced else set()
+    unused_nonces = consume_nonces(
+        db, current_user.id, [claims for claims in claims_list if claims is not None and claims.question_id in existing]
     )
+
+    results: list[GatePackAnswerResult] = []
+    batch: list[BatchAnswer] = []
+    for answer, claims in zip(payload.answers, claims_list):
+        if claims is None:
+            results.append(GatePackAnswerResult(accepted=False, detail="Invalid or expired grading token"))
+            continue
+        if claims.question_id not in existing:
+            results.append(GatePackAnswerResult(question_id=claims.question_id, accepted=False, detail="Question not found"))
+            continue
+        if claims.nonce not in unused_nonces:
+            results.append(GatePackAnswerResult(question_id=claims.question_id, accepted=False, detail="Duplicate answer"))
+            continue
+        # Later copies in the same report are duplicates too
+        unused_nonces.discard(claims.nonce)
+
+        is_correct = claims.is_correct(answer.answer_index)
+        batch.append(
+            BatchAnswer(
+                question_id=claims.question_id,
+                topic_id=claims.topic_id,
+                is_correct=is_correct,
+                seconds=answer.seconds,
+                answered_at=normalize_client_time(answer.answered_at, now),
+            )
+        )
+        results.append(GatePackAnswerResult(question_id=claims.question_id, accepted=True, correct=is_correct))
+
+    batch.sort(key=lambda item: item.answered_at)
+    record_attempts_batch(db, current_user.id, batch)
+    db.commit()
+
+    # Offline wrong answers lock the gate like live ones, for what is left of the lockout
+    wrong = [item.answered_at for item in batch if not item.is_correct]
+    if wrong:
+        remaining = LOCKOUT_SECONDS_ON_FAIL - (now - max(wrong)).total_seconds()
+        if remaining > 0:
+            get_gate_state_store().lock_out(current_user.id, math.ceil(remaining))
+    return results
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, select
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
-from backend.dependencies.auth import get_current_user
+from backend.dependencies.auth import get_active_user_id, get_current_user
+from backend.dependencies.fields import FieldSelector, partial_response
+from backend.dependencies.idempotency import commit_with_key, get_idempotency_key, replay_response
+from backend.responses import (
+    MSGPACK_MEDIA_TYPE,
+    FastJSONResponse,
+    MsgPackResponse,
+    dumps,
+    trusted_list_response,
+    wants_msgpack,
+)
 from backend.models.course import Course
+from backend.routers.courses import course_columns, course_fields
 from backend.models.enrolment import Enrolment
 from backend.models.question import Question
 from backend.models.attempt import QuestionAttempt
@@ -19,43 +33,68 @@ from backend.models.assessment import Assessment
 from backend.models.question_metric import QuestionMetric
 from backend.models.streak import DailyStreak
 from backend.models.blocked_site import BlockedSite
-from backend.schemas import AttemptCreate, AttemptResult, CourseOut, EnrolRequest, ProgressItem, UserResponse, BlockedSiteCreate, BlockedSiteOut
+from backend.models.domain_activity import DomainActivityDaily
+from backend.models.daily_activity import UserDailyActivity
+from backend.schemas import AttemptBatchCreate, AttemptBatchItemResult, AttemptBatchResult, AttemptCreate, AttemptHistoryItem, AttemptResult, CourseOut, EnrolRequest, ProgressItem, UserResponse, BlockedSiteCreate, BlockedSiteOut, BlockEventBatch, DomainActivityOut, DailyActivityOut, QuestionOverlayItem, SessionPlanRequest
 from backend.schemas.auth import UserUpdate
 from backend.schemas.topic import TopicOut, TopicPriorityOut
 from backend.schemas.assessment import AssessmentOut
-from backend.services.progress import apply_attempt, ensure_topic_progress, stage_from_percent
-from backend.services.streaks import update_streak
+from backend.services.archive import attempt_history, iter_attempts, purge_archived_attempts
+from backend.services.attempts import BatchAnswer, normalize_client_time, record_attempt, record_attempts_batch
+from backend.services.daily_activity import subtract_activity
+from backend.services.idempotency import request_hash
+from backend.services.progress import stage_from_percent
+from backend.services.question_selector import choose_next_questions, due_candidates, load_deck
+from backend.services.session_planner import plan_session
+from backend.services.sync import changed_since, deck_etag, deleted_question_ids, etag_matches, needs_reset, sync_cursor
+from backend.services.telemetry import block_events
 
 router = APIRouter(prefix="/students", tags=["students"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched per round trip when streaming the question deck
+STREAM_BATCH_SIZE = 500
+
 
 def _assert_same_user(path_user_id: str, current_user: User) -> uuid.UUID:
+    return _assert_same_user_id(path_user_id, current_user.id)
+
+
+def _assert_same_user_id(path_user_id: str, current_user_id: uuid.UUID) -> uuid.UUID:
     try:
         requested_id = uuid.UUID(path_user_id)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user_id format") from exc
 
-    if requested_id != current_user.id:
+    if requested_id != current_user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only access your own resources")
     return requested_id
 
 
+def _normalize_domain(domain: str) -> str:
+    """Normalize domain (remove www., convert to lowercase)."""
+    return domain.replace("www.", "").lower().strip()
+
+
 @router.get("/{user_id}/enrolments", response_model=list[CourseOut])
 def list_enrolments(
     user_id: str,
+    fields: tuple[str, ...] = Depends(course_fields),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     _assert_same_user(user_id, current_user)
 
     rows = (
-        db.query(Course)
+        db.query(*course_columns(fields))
         .join(Enrolment, Enrolment.course_code == Course.code)
         .filter(Enrolment.user_id == current_user.id)
         .order_by(Course.name.asc())
         .all()
     )
-    return rows
+    if not course_fields.is_full(fields):
+        return partial_response((row._mapping for row in rows), fields)
+    return trusted_list_response(CourseOut, (row._mapping for row in rows))
 
 
 @router.post("/{user_id}/enrolments", status_code=status.HTTP_201_CREATED, response_model=CourseOut)
@@ -105,15 +144,21 @@ def unenrol_student(
         .delete(synchronize_session=False)
     )
 
-    # Delete user attempts for questions from these topics
-    (
-        db.query(QuestionAttempt)
-        .filter(
+    # Delete user attempts for questions from these topics, and their share of the daily rollups
+    removed = db.execute(
+        delete(QuestionAttempt)
+        .where(
             QuestionAttempt.user_id == current_user.id,
-            QuestionAttempt.question_id.in_(question_ids_subq),
+            QuestionAttempt.question_id.in_(select(question_ids_subq)),
         )
-        .delete(synchronize_session=False)
-    )
+        .returning(
+            QuestionAttempt.question_id,
+            QuestionAttempt.was_correct,
+            QuestionAttempt.seconds,
+            QuestionAttempt.answered_at,
+        )
+    ).all()
+    subtract_activity(db, current_user.id, removed)
 
     # Delete per-question metrics for these questions
     (
@@ -131,6 +176,16 @@ def unenrol_student(
         db.delete(enrol)
 
     db.commit()
+
+    # Attempts already moved to the Parquet archive go too, so history and export drop the course
+    purged = purge_archived_attempts(current_user.id, set(db.scalars(select(question_ids_subq))))
+    if purged:
+        subtract_activity(
+            db,
+            current_user.id,
+            ((record.question_id, record.was_correct, record.seconds, record.answered_at) for record in purged),
+        )
+        db.commit()
     return
 
 
@@ -168,25 +223,70 @@ def get_attempts_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get the total number of question attempts for a user."""
+    """Get the total number of question attempts for a user, archived ones included."""
     _assert_same_user(user_id, current_user)
 
-    count = db.query(QuestionAttempt).filter(
-        QuestionAttempt.user_id == current_user.id
-    ).count()
-
+    count = (
+        db.query(func.coalesce(func.sum(UserDailyActivity.attempts), 0))
+        .filter(UserDailyActivity.user_id == current_user.id)
+        .scalar()
+    )
     return {"count": count}
 
 
+@router.get("/{user_id}/attempts", response_model=list[AttemptHistoryItem])
+def get_attempt_history(
+    user_id: str,
+    before: datetime | None = Query(default=None, description="Only attempts answered before this time"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Newest-first page of attempts. Pass the last item's ``answered_at`` as ``before`` for the next page."""
+    _assert_same_user(user_id, current_user)
+
+    if before is not None and before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    return attempt_history(db, current_user.id, before=before, limit=limit)
+
+
+@router.get("/{user_id}/attempts/export")
+def export_attempts(
+    user_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Every attempt, oldest first, as newline-delimited JSON."""
+    _assert_same_user(user_id, current_user)
+
+    def lines():
+        for record in iter_attempts(db, current_user.id):
+            yield AttemptHistoryItem.model_validate(record).model_dump_json() + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="attempts.ndjson"'},
+    )
+
+
 @router.post("/{user_id}/attempts", response_model=AttemptResult)
 def submit_attempt(
     user_id: str,
     payload: AttemptCreate,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(get_idempotency_key),
 ):
+    """Record one answer. Retries carrying the same ``Idempotency-Key`` replay the first result."""
     _assert_same_user(user_id, current_user)
 
+    fingerprint = request_hash("students.attempts", payload)
+    replay = replay_response(db, response, current_user.id, idempotency_key, fingerprint)
+    if replay is not None:
+        return replay
+
     question = db.get(Question, payload.question_id)
     if not question:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
@@ -195,94 +295,131 @@ def submit_attempt(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="answer_index out of range")
 
     is_correct = payload.answer_index == question.correct_index
-    attempt = QuestionAttempt(
-        user_id=current_user.id,
-        question_id=question.id,
-        was_correct=is_correct,
-        seconds=payload.seconds or 0,
+    stage, percent = record_attempt(db, current_user.id, question.id, question.topic_id, is_correct, payload.seconds)
+    result = AttemptResult(
+        correct=is_correct,
+        explanation=question.explanation or "",
+        topic_id=question.topic_id,
+        stage=stage,
+        percent_complete=percent,
+    )
+    replay = commit_with_key(
+        db, response, current_user.id, idempotency_key, fingerprint, result.model_dump(mode="json")
     )
-    db.add(attempt)
+    return replay if replay is not None else result
 
-    progress = ensure_topic_progress(db, current_user.id, question.topic_id)
-    apply_attempt(progress, is_correct, payload.seconds)
 
-    # Update per-question metrics so extension and in-app review stay in sync
-    now = datetime.utcnow()
-    metrics = (
-        db.query(QuestionMetric)
-        .filter(
-            QuestionMetric.user_id == current_user.id,
-            QuestionMetric.question_id == question.id,
-        )
-        .first()
-    )
-    if metrics is None:
-        metrics = QuestionMetric(
-            user_id=current_user.id,
-            question_id=question.id,
-            rolling_accuracy=0.5,
-            attempts=0,
-        )
-        db.add(metrics)
+@router.post("/{user_id}/attempts:batch", response_model=AttemptBatchResult)
+def submit_attempts_batch(
+    user_id: str,
+    payload: AttemptBatchCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(get_idempotency_key),
+):
+    """Apply a queue of answers (e.g. flushed by the extension) in one transaction.
 
-    EMA_ALPHA = 0.15  # ~7 attempts effective window
-    prev = metrics.rolling_accuracy or 0.5
-    target = 1.0 if is_correct else 0.0
-    metrics.rolling_accuracy = max(0.0, min(1.0, EMA_ALPHA * target + (1 - EMA_ALPHA) * prev))
+    Answers are applied in client-timestamp order; invalid items are reported
+    per index and do not abort the rest of the batch. Retries carrying the
+    same ``Idempotency-Key`` replay the first result instead of applying the
+    batch again.
+    """
+    _assert_same_user(user_id, current_user)
 
-    metrics.attempts = max(0, (metrics.attempts or 0)) + 1
+    fingerprint = request_hash("students.attempts:batch", payload)
+    replay = replay_response(db, response, current_user.id, idempotency_key, fingerprint)
+    if replay is not None:
+        return replay
 
-    DAY = timedelta(days=1)
-    SIX_HOURS = timedelta(hours=6)
-    if metrics.last_seen_at and metrics.next_due_at:
-        prev_interval = max(timedelta(seconds=1), metrics.next_due_at - metrics.last_seen_at)
-    else:
-        prev_interval = DAY
-    next_interval = max(DAY, prev_interval * 2) if is_correct else max(SIX_HOURS, prev_interval * 0.5)
-    metrics.last_seen_at = now
-    metrics.next_due_at = now + next_interval
+    now = datetime.now(timezone.utc)
+    question_ids = {item.question_id for item in payload.attempts}
+    questions = {
+        question.id: question
+        for question in db.query(Question).filter(Question.id.in_(question_ids)).all()
+    }
 
-    update_streak(db, current_user.id, now)
+    results: list[AttemptBatchItemResult | None] = [None] * len(payload.attempts)
+    accepted: list[tuple[int, BatchAnswer]] = []
+    for index, item in enumerate(payload.attempts):
+        question = questions.get(item.question_id)
+        if question is None:
+            results[index] = AttemptBatchItemResult(
+                index=index, question_id=item.question_id, status="error", detail="Question not found"
+            )
+            continue
+        if item.answer_index >= len(question.choices):
+            results[index] = AttemptBatchItemResult(
+                index=index, question_id=item.question_id, status="error", detail="answer_index out of range"
+            )
+            continue
+        accepted.append(
+            (
+                index,
+                BatchAnswer(
+                    question_id=question.id,
+                    topic_id=question.topic_id,
+                    is_correct=item.answer_index == question.correct_index,
+                    seconds=item.seconds,
+                    answered_at=normalize_client_time(item.answered_at, now),
+                ),
+            )
+        )
 
-    db.commit()
-    db.refresh(progress)
+    accepted.sort(key=lambda pair: pair[1].answered_at)
+    outcomes = record_attempts_batch(db, current_user.id, [answer for _, answer in accepted])
+
+    for (index, answer), (stage, percent) in zip(accepted, outcomes):
+        results[index] = AttemptBatchItemResult(
+            index=index,
+            question_id=answer.question_id,
+            status="ok",
+            correct=answer.is_correct,
+            explanation=questions[answer.question_id].explanation or "",
+            topic_id=answer.topic_id,
+            stage=stage,
+            percent_complete=percent,
+        )
 
-    return AttemptResult(
-        correct=is_correct,
-        explanation=question.explanation or "",
-        topic_id=question.topic_id,
-        stage=progress.stage,
-        percent_complete=progress.percent_complete,
+    result = AttemptBatchResult(applied=len(accepted), results=results)
+    replay = commit_with_key(
+        db, response, current_user.id, idempotency_key, fingerprint, result.model_dump(mode="json")
     )
+    return replay if replay is not None else result
+
+
+PROGRESS_COLUMNS = {
+    "topic_id": Topic.id,
+    "topic_name": Topic.name,
+    "course_code": Topic.course_code,
+    "stage": TopicProgress.stage,
+    "percent_complete": TopicProgress.percent_complete,
+}
+progress_fields = FieldSelector(PROGRESS_COLUMNS, required=("topic_id",))
 
 
 @router.get("/{user_id}/progress", response_model=list[ProgressItem])
 def list_progress(
     user_id: str,
+    fields: tuple[str, ...] = Depends(progress_fields),
+    accept: str | None = Header(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     _assert_same_user(user_id, current_user)
 
     rows = (
-        db.query(Topic, TopicProgress)
+        db.query(*(PROGRESS_COLUMNS[name].label(name) for name in fields))
+        .select_from(Topic)
         .join(TopicProgress, TopicProgress.topic_id == Topic.id)
         .filter(TopicProgress.user_id == current_user.id)
         .all()
     )
-
-    items: list[ProgressItem] = []
-    for topic, progress in rows:
-        items.append(
-            ProgressItem(
-                topic_id=topic.id,
-                topic_name=topic.name,
-                course_code=topic.course_code,
-                stage=progress.stage,
-                percent_complete=progress.percent_complete,
-            )
-        )
-    return items
+    if wants_msgpack(accept):
+        return MsgPackResponse([dict(row._mapping) for row in rows])
+    if not progress_fields.is_full(fields):
+        return partial_response((row._mapping for row in rows), fields)
+    return trusted_list_response(ProgressItem, (row._mapping for row in rows))
 
 
 @router.get("/{user_id}/progress/{topic_id}", response_model=ProgressItem)
@@ -417,99 +554,344 @@ def get_upcoming_assessments(
 
 ## Removed: questions-for-extension endpoint
 
+def _epoch_ms(moment: datetime | None) -> int | None:
+    return int(moment.timestamp() * 1000) if moment else None
+
+
+# Deck output field -> column; ``fields=`` narrows both the SELECT and the payload
+QUESTION_COLUMNS = {
+    "id": Question.id,
+    "topic": Topic.name,
+    "course_code": Topic.course_code,
+    "prompt": Question.prompt,
+    "options": Question.choices,
+    "correctAnswer": Question.correct_index,
+    "difficulty": Question.difficulty,
+    "explanation": Question.explanation,
+    "last_seen_at": QuestionMetric.last_seen_at,
+    "next_due_at": QuestionMetric.next_due_at,
+    "rolling_accuracy": QuestionMetric.rolling_accuracy,
+    "attempts": QuestionMetric.attempts,
+}
+question_fields = FieldSelector(QUESTION_COLUMNS, required=("id",))
+
+
+def _deck_query(db: Session, current_user: User, *columns):
+    return (
+        db.query(*columns)
+        .select_from(Question)
+        .join(Topic, Question.topic_id == Topic.id)
+        .join(Course, Topic.course_code == Course.code)
+        .join(Enrolment, Enrolment.course_code == Course.code)
+        .outerjoin(
+            QuestionMetric,
+            (QuestionMetric.user_id == current_user.id) & (QuestionMetric.question_id == Question.id),
+        )
+        .filter(Enrolment.user_id == current_user.id)
+    )
+
+
+def _filtered_deck(
+    db: Session,
+    current_user: User,
+    fields: tuple[str, ...],
+    question_ids: list | None = None,
+    since: int | None = None,
+    after: uuid.UUID | None = None,
+    limit: int | None = None,
+):
+    query = _deck_query(db, current_user, *(QUESTION_COLUMNS[name].label(name) for name in fields))
+    if question_ids is not None:
+        query = query.filter(Question.id.in_(question_ids))
+    if since is not None:
+        query = query.filter(changed_since(since, Question.sync_tx, Topic.sync_tx, QuestionMetric.sync_tx))
+    if after is not None:
+        query = query.filter(Question.id > after)
+    # Keyset order: pages continue from the last id a client saw
+    query = query.order_by(Question.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _question_items(
+    db: Session,
+    current_user: User,
+    question_ids: list | None = None,
+    since: int | None = None,
+    after: uuid.UUID | None = None,
+    limit: int | None = None,
+    fields: tuple[str, ...] = question_fields.allowed,
+    native: bool = False,
+) -> list[dict]:
+    """Build question payloads with per-user metrics, optionally for a subset of ids or rows changed since a cursor."""
+    query = _filtered_deck(db, current_user, fields, question_ids, since, after, limit)
+    return [_question_item(row, native) for row in query]
+
+
+def _iter_question_items(
+    db: Session,
+    current_user: User,
+    since: int | None = None,
+    after: uuid.UUID | None = None,
+    limit: int | None = None,
+    fields: tuple[str, ...] = question_fields.allowed,
+) -> Iterator[dict]:
+    """Like ``_question_items`` but read through a server-side cursor, one batch in memory at a time."""
+    query = _filtered_deck(db, current_user, fields, since=since, after=after, limit=limit)
+    for row in query.yield_per(STREAM_BATCH_SIZE):
+        yield _question_item(row)
+
+
+def _question_item(row, native: bool = False) -> dict:
+    """The extension's payload for one deck row. Every answered question has a metric row.
+
+    ``native`` keeps the id as a UUID and times as datetimes for MessagePack.
+    """
+    item = dict(row._mapping)
+    if not native:
+        if "id" in item:
+            item["id"] = str(item["id"])
+        for key in ("last_seen_at", "next_due_at"):
+            if key in item:
+                item[key] = _epoch_ms(item[key])
+    if "rolling_accuracy" in item:
+        item["rolling_accuracy"] = float(item["rolling_accuracy"] or 0.5)
+    if "attempts" in item:
+        item["attempts"] = int(item["attempts"] or 0)
+    return item
+
+
+def _synced_deck(
+    db: Session,
+    current_user: User,
+    since: int | None,
+    if_none_match: str | None,
+    accept: str | None = None,
+    after: uuid.UUID | None = None,
+    limit: int | None = None,
+    fields: tuple[str, ...] = question_fields.allowed,
+):
+    """Full deck, or with ``since`` only what changed, honouring ``If-None-Match``.
+
+    ``after``/``limit`` page through the items in id order. With
+    ``Accept: application/x-ndjson`` the items are streamed one per line; in
+    delta mode the first line holds ``{cursor, reset, deleted}``. With
+    ``Accept: application/msgpack`` the body is MessagePack.
+    """
+    stream = NDJSON_MEDIA_TYPE in (accept or "")
+    packed = not stream and wants_msgpack(accept)
+    # Taken before reading so writes racing with this request show up in the next delta
+    cursor = sync_cursor(db)
+    etag = deck_etag(
+        _deck_query(db, current_user, Question.id),
+        (Question.sync_tx, Topic.sync_tx, Enrolment.sync_tx, QuestionMetric.sync_tx),
+        since,
+        after,
+        limit,
+        NDJSON_MEDIA_TYPE if stream else MSGPACK_MEDIA_TYPE if packed else "json",
+        ",".join(fields),
+    )
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept",
+        "X-Sync-Cursor": str(cursor),
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    reset = since is not None and needs_reset(db, current_user.id, since)
+    changes_since = None if reset else since
+    # Deletions are reported once, with the first page
+    deleted = deleted_question_ids(db, current_user.id, since) if changes_since is not None and after is None else []
+
+    if stream:
+        def lines():
+            if since is not None:
+                yield dumps({"cursor": cursor, "reset": reset, "deleted": deleted}) + b"\n"
+            for item in _iter_question_items(db, current_user, changes_since, after, limit, fields):
+                yield dumps(item) + b"\n"
+
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    items = _question_items(db, current_user, since=changes_since, after=after, limit=limit, fields=fields, native=packed)
+    body = items if since is None else {"cursor": cursor, "reset": reset, "changed": items, "deleted": deleted}
+    if packed:
+        return MsgPackResponse(body, headers=headers)
+    return FastJSONResponse(body, headers=headers)
+
+
 @router.get("/{user_id}/questions-for-extension")
 def get_questions_for_extension(
     user_id: str,
+    since: int | None = Query(default=None, ge=0, description="Cursor from a previous sync; return only changes"),
+    after: uuid.UUID | None = Query(default=None, description="Return questions after this id (keyset pagination)"),
+    limit: int | None = Query(default=None, ge=1, le=1000, description="Page size"),
+    if_none_match: str | None = Header(default=None),
+    accept: str | None = Header(default=None),
+    fields: tuple[str, ...] = Depends(question_fields),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Return questions with per-user metrics (used by extension and in-app).
+
+    The ``X-Sync-Cursor`` header holds the cursor for the next call. With
+    ``since`` the body is ``{cursor, reset, changed, deleted}``; on ``reset``
+    ``changed`` is the whole deck and replaces the client's copy. Pass the
+    last item's id as ``after`` for the next page; send
+    ``Accept: application/x-ndjson`` to stream or ``application/msgpack``
+    for MessagePack instead. ``fields`` limits the
+    columns read and returned (``id`` is always included).
+    """
+    _assert_same_user(user_id, current_user)
+    return _synced_deck(db, current_user, since, if_none_match, accept, after, limit, fields)
+
+
+@router.get("/{user_id}/due")
+def get_due_questions(
+    user_id: str,
+    limit: int = Query(default=20, ge=1, le=200),
+    course: str | None = Query(default=None, description="Optional course code filter"),
+    fields: tuple[str, ...] = Depends(question_fields),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Return questions with per-user metrics (used by extension and in-app)."""
+    """Top ``limit`` due (tier 2) or nearly due (tier 1) questions, best first, ranked in SQL.
+
+    Items are deck payloads plus ``tier`` and ``score``; only
+    ``limit * DUE_CANDIDATE_FACTOR`` metric rows are read.
+    """
     _assert_same_user(user_id, current_user)
 
-    # Get all questions from enrolled courses
-    questions_query = (
-        db.query(Question, Topic, QuestionMetric)
+    due = due_candidates(current_user.id, datetime.now(timezone.utc), limit, course)
+    query = (
+        db.query(*(QUESTION_COLUMNS[name].label(name) for name in fields), due.c.tier, due.c.score)
+        .select_from(due)
+        .join(Question, Question.id == due.c.question_id)
         .join(Topic, Question.topic_id == Topic.id)
-        .join(Course, Topic.course_code == Course.code)
-        .join(Enrolment, Enrolment.course_code == Course.code)
-        .outerjoin(
+        .join(
             QuestionMetric,
-            (QuestionMetric.user_id == current_user.id) & (QuestionMetric.question_id == Question.id),
+            (QuestionMetric.user_id == current_user.id) & (QuestionMetric.question_id == due.c.question_id),
         )
-        .filter(Enrolment.user_id == current_user.id)
-        .all()
+        .order_by(due.c.tier.desc(), due.c.score.desc(), Question.id)
+        .limit(limit)
     )
+    return FastJSONResponse([_question_item(row) for row in query])
 
-    if not questions_query:
-        return []
 
-    # Get user's attempts for these questions
-    question_ids = [q.id for q, _, _ in questions_query]
-    attempts_query = (
-        db.query(QuestionAttempt)
-        .filter(
-            QuestionAttempt.user_id == current_user.id,
-            QuestionAttempt.question_id.in_(question_ids)
-        )
-        .all()
-    )
+@router.get("/{user_id}/question-metrics", response_model=list[QuestionOverlayItem])
+def get_question_metrics(
+    user_id: str,
+    response: Response,
+    course: str | None = Query(default=None, description="Optional course code filter"),
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Per-user overlay for the course catalogs: only questions the user has metrics for.
 
-    # Calculate metadata for each question
-    attempts_by_question: dict = {}
-    for attempt in attempts_query:
-        attempts_by_question.setdefault(attempt.question_id, []).append(attempt)
+    Questions missing here have never been answered (no last_seen_at,
+    0.5 accuracy, 0 attempts). Content comes from ``/courses/{code}/catalog``.
+    """
+    _assert_same_user(user_id, current_user)
 
-    result = []
-    for question, topic, metrics in questions_query:
-        question_attempts = attempts_by_question.get(question.id, [])
+    query = (
+        db.query(QuestionMetric)
+        .join(Question, Question.id == QuestionMetric.question_id)
+        .join(Topic, Question.topic_id == Topic.id)
+        .join(Enrolment, (Enrolment.course_code == Topic.course_code) & (Enrolment.user_id == current_user.id))
+        .filter(QuestionMetric.user_id == current_user.id)
+    )
+    if course is not None:
+        query = query.filter(Topic.course_code == course.upper())
+
+    etag = deck_etag(query, (QuestionMetric.sync_tx, Enrolment.sync_tx), course)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+    return [
+        QuestionOverlayItem(
+            question_id=metric.question_id,
+            last_seen_at=_epoch_ms(metric.last_seen_at),
+            next_due_at=_epoch_ms(metric.next_due_at),
+            rolling_accuracy=float(metric.rolling_accuracy or 0.5),
+            attempts=int(metric.attempts or 0),
+        )
+        for metric in query.order_by(QuestionMetric.question_id)
+    ]
 
-        if metrics is not None:
-            last_seen_at = int(metrics.last_seen_at.timestamp() * 1000) if metrics.last_seen_at else None
-            next_due_at = int(metrics.next_due_at.timestamp() * 1000) if metrics.next_due_at else None
-            rolling_accuracy = float(metrics.rolling_accuracy or 0.5)
-            attempts_count = int(metrics.attempts or 0)
-        else:
-            # Fallback: derive from attempts
-            rolling_accuracy = 0.5
-            if question_attempts:
-                acc = rolling_accuracy
-                for attempt in sorted(question_attempts, key=lambda a: a.answered_at):
-                    target = 1.0 if attempt.was_correct else 0.0
-                    acc = 0.15 * target + 0.85 * acc  # ~7 attempts effective window
-                rolling_accuracy = acc
-            last_seen_at = None
-            next_due_at = None
-            if question_attempts:
-                last_attempt = max(question_attempts, key=lambda a: a.answered_at)
-                last_seen_at = int(last_attempt.answered_at.timestamp() * 1000)
-                next_due_at = last_seen_at + (24 * 60 * 60 * 1000) if last_attempt.was_correct else last_seen_at + (6 * 60 * 60 * 1000)
-            attempts_count = len(question_attempts)
-
-        result.append({
-            "id": str(question.id),
-            "topic": topic.name,
-            "course_code": topic.course_code,
-            "prompt": question.prompt,
-            "options": question.choices,
-            "correctAnswer": question.correct_index,
-            "difficulty": question.difficulty,
-            "explanation": question.explanation,
-            "last_seen_at": last_seen_at,
-            "next_due_at": next_due_at,
-            "rolling_accuracy": rolling_accuracy,
-            "attempts": attempts_count,
-        })
-
-    return result
 
 @router.get("/{user_id}/review-questions")
 def get_review_questions(
     user_id: str,
+    limit: int | None = Query(default=None, ge=1, le=200, description="Return only the next N questions to review"),
+    course: str | None = Query(default=None, description="Optional course code filter"),
+    since: int | None = Query(default=None, ge=0, description="Cursor from a previous sync (full deck only)"),
+    if_none_match: str | None = Header(default=None),
+    accept: str | None = Header(default=None),
+    fields: tuple[str, ...] = Depends(question_fields),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # Delegate to the same core to keep in sync
-    return get_questions_for_extension(user_id, db, current_user)
+    """Return the review deck, or with ``limit`` only the scheduler's next picks."""
+    _assert_same_user(user_id, current_user)
+
+    if limit is None and course is None:
+        # Delegate to the same core to keep in sync
+        return _synced_deck(db, current_user, since, if_none_match, accept, fields=fields)
+
+    deck = load_deck(db, current_user.id, course)
+    picked = choose_next_questions(deck, count=limit or len(deck))
+    if not picked:
+        return []
+
+    packed = wants_msgpack(accept)
+    rank = {question_id if packed else str(question_id): index for index, question_id in enumerate(picked)}
+    items = _question_items(db, current_user, picked, fields=fields, native=packed)
+    items.sort(key=lambda item: rank[item["id"]])
+    return MsgPackResponse(items) if packed else items
+
+
+@router.post("/{user_id}/sessions")
+def plan_study_session(
+    user_id: str,
+    payload: SessionPlanRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Plan a whole study session that fits in ``minutes``, in one response.
+
+    Questions are chosen to maximise expected learning value within the
+    budget, using the user's recorded answer times; see
+    ``backend.services.session_planner``. The body is
+    ``{budget_seconds, planned_seconds, expected_value, questions}``, where
+    ``questions`` are deck payloads (as from ``questions-for-extension``) in
+    answer order, each with ``expected_seconds``. Like the other deck
+    endpoints it is serialised directly, without a response model.
+    """
+    _assert_same_user(user_id, current_user)
+
+    budget_seconds = int(payload.minutes * 60)
+    deck = load_deck(db, current_user.id, payload.course)
+    plan = plan_session(db, current_user.id, deck, budget_seconds)
+
+    expected = {str(question_id): seconds for question_id, seconds in zip(plan.question_ids, plan.expected_seconds)}
+    rank = {question_id: index for index, question_id in enumerate(expected)}
+    items = _question_items(db, current_user, plan.question_ids) if plan.question_ids else []
+    for item in items:
+        item["expected_seconds"] = expected[item["id"]]
+    items.sort(key=lambda item: rank[item["id"]])
+    return FastJSONResponse(
+        {
+            "budget_seconds": budget_seconds,
+            "planned_seconds": plan.planned_seconds,
+            "expected_value": plan.expected_value,
+            "questions": items,
+        }
+    )
 
 
 @router.get("/{user_id}/streak")
@@ -544,29 +926,52 @@ def get_today_stats(
     """Return stats for today, including completed questions count."""
     _assert_same_user(user_id, current_user)
 
-    # Get today's start time (midnight UTC)
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Count unique questions answered today
+    today = datetime.now(timezone.utc).date()
     completed_today = (
-        db.query(QuestionAttempt.question_id)
-        .filter(
-            QuestionAttempt.user_id == current_user.id,
-            QuestionAttempt.answered_at >= today_start,
-        )
-        .distinct()
-        .count()
+        db.query(UserDailyActivity.distinct_questions)
+        .filter(UserDailyActivity.user_id == current_user.id, UserDailyActivity.day == today)
+        .scalar()
     )
 
     return {
-        "completed_questions_today": completed_today,
+        "completed_questions_today": completed_today or 0,
     }
 
 
+@router.get("/{user_id}/activity", response_model=list[DailyActivityOut])
+def get_daily_activity(
+    user_id: str,
+    start: date | None = Query(default=None, description="First UTC day (inclusive); defaults to 30 days ago"),
+    end: date | None = Query(default=None, description="Last UTC day (inclusive); defaults to today"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Per-day answer totals for a date range. Days without answers are omitted."""
+    _assert_same_user(user_id, current_user)
+
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    if (end - start).days >= 366:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Date range is limited to 366 days")
+
+    return (
+        db.query(UserDailyActivity)
+        .filter(
+            UserDailyActivity.user_id == current_user.id,
+            UserDailyActivity.day >= start,
+            UserDailyActivity.day <= end,
+        )
+        .order_by(UserDailyActivity.day.asc())
+        .all()
+    )
+
+
 @router.get("/{user_id}/blocked-sites", response_model=list[BlockedSiteOut])
 def get_blocked_sites(
     user_id: str,
+    accept: str | None = Header(default=None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -580,7 +985,12 @@ def get_blocked_sites(
         .all()
     )
 
-    return [BlockedSiteOut(id=str(site.id), domain=site.domain) for site in blocked_sites]
+    if wants_msgpack(accept):
+        return MsgPackResponse([{"id": site.id, "domain": site.domain} for site in blocked_sites])
+    return trusted_list_response(
+        BlockedSiteOut,
+        ({"id": str(site.id), "domain": site.domain} for site in blocked_sites),
+    )
 
 
 @router.post("/{user_id}/blocked-sites", status_code=status.HTTP_201_CREATED, response_model=BlockedSiteOut)
@@ -593,8 +1003,7 @@ def add_blocked_site(
     """Add a new blocked site for the user."""
     _assert_same_user(user_id, current_user)
 
-    # Normalize domain (remove www., convert to lowercase)
-    domain = payload.domain.replace("www.", "").lower().strip()
+    domain = _normalize_domain(payload.domain)
 
     # Check if already blocked
     exists = (
@@ -648,3 +1057,60 @@ def remove_blocked_site(
     db.commit()
 
     return
+
+
+@router.post("/{user_id}/block-events", status_code=status.HTTP_202_ACCEPTED)
+def ingest_block_events(
+    user_id: str,
+    payload: BlockEventBatch,
+    current_user_id: uuid.UUID = Depends(get_active_user_id),
+):
+    """Accept batched block/unlock events; counters are written asynchronously.
+
+    The user's active status is cached, so the hot path rarely touches the database.
+    """
+    _assert_same_user_id(user_id, current_user_id)
+
+    now = datetime.now(timezone.utc)
+    for event in payload.events:
+        occurred_at = event.occurred_at or now
+        if occurred_at.tzinfo is not None:
+            occurred_at = occurred_at.astimezone(timezone.utc)
+        block_events.add(
+            current_user_id,
+            _normalize_domain(event.domain),
+            min(occurred_at.date(), now.date()),
+            blocks=1 if event.type == "block" else 0,
+            unlocks=1 if event.type == "unlock" else 0,
+        )
+
+    return {"accepted": len(payload.events)}
+
+
+@router.get("/{user_id}/block-stats", response_model=list[DomainActivityOut])
+def get_block_stats(
+    user_id: str,
+    days: int = Query(default=30, ge=1, le=365),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Return block/unlock totals per domain over the last ``days`` days."""
+    _assert_same_user(user_id, current_user)
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    blocks = func.sum(DomainActivityDaily.blocks)
+    rows = (
+        db.query(DomainActivityDaily.domain, blocks, func.sum(DomainActivityDaily.unlocks))
+        .filter(
+            DomainActivityDaily.user_id == current_user.id,
+            DomainActivityDaily.day >= since,
+        )
+        .group_by(DomainActivityDaily.domain)
+        .order_by(blocks.desc())
+        .all()
+    )
+
+    return [
+        DomainActivityOut(domain=domain, blocks=int(total_blocks or 0), unlocks=int(total_unlocks or 0))
+        for domain, total_blocks, total_unlocks in rows
+    ]
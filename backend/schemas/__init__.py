@@ -1,8 +1,11 @@
 from .auth import SignupRequest, LoginRequest, UserResponse, TokenResponse
 from .course import CourseCreate, CourseUpdate, CourseOut
 from .enrolment import EnrolRequest, EnrolmentOut
-from .question import QuestionCreate, QuestionOut
-from .attempt import AttemptCreate, AttemptResult
+from .question import QuestionCreate, QuestionOut, QuestionOverlayItem
+from .attempt import AttemptCreate, AttemptResult, AttemptBatchItem, AttemptBatchCreate, AttemptBatchItemResult, AttemptBatchResult, AttemptHistoryItem
 from .progress import ProgressStage, TopicProgressOut, ProgressItem
-from .gate import GatePolicy, GateQuestion, GateAnswerRequest, GateAnswerResult
+from .gate import GatePolicy, GateQuestion, GateAnswerRequest, GateAnswerResult, GatePack, GatePackQuestion, GatePackAnswer, GatePackReport, GatePackAnswerResult
 from .blocked_site import BlockedSiteCreate, BlockedSiteOut
+from .block_event import BlockEvent, BlockEventBatch, DomainActivityOut
+from .daily_activity import DailyActivityOut
+from .session import SessionPlanRequest
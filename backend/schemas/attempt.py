@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from .progress import ProgressStage
 
@@ -19,3 +21,38 @@ class AttemptResult(BaseModel):
     topic_id: uuid.UUID
     stage: ProgressStage
     percent_complete: int
+
+
+class AttemptBatchItem(AttemptCreate):
+    answered_at: datetime | None = Field(default=None, description="Client timestamp; defaults to the time of upload")
+
+
+class AttemptBatchCreate(BaseModel):
+    attempts: list[AttemptBatchItem] = Field(min_length=1, max_length=1000)
+
+
+class AttemptBatchItemResult(BaseModel):
+    index: int
+    question_id: uuid.UUID
+    status: Literal["ok", "error"]
+    detail: str | None = None
+    correct: bool | None = None
+    explanation: str | None = None
+    topic_id: uuid.UUID | None = None
+    stage: ProgressStage | None = None
+    percent_complete: int | None = None
+
+
+class AttemptBatchResult(BaseModel):
+    applied: int
+    results: list[AttemptBatchItemResult]
+
+
+class AttemptHistoryItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    question_id: uuid.UUID
+    was_correct: bool
+    seconds: int
+    answered_at: datetime
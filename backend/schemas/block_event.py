@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class BlockEvent(BaseModel):
+    type: Literal["block", "unlock"]
+    domain: str = Field(..., min_length=1, max_length=255)
+    occurred_at: datetime | None = None
+
+
+class BlockEventBatch(BaseModel):
+    events: list[BlockEvent] = Field(min_length=1, max_length=1000)
+
+
+class DomainActivityOut(BaseModel):
+    domain: str
+    blocks: int
+    unlocks: int
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from datetime import date
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DailyActivityOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    attempts: int
+    distinct_questions: int
+    correct: int
+    seconds: int
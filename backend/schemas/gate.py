@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 
 from pydantic import BaseModel, Field
 
@@ -35,3 +36,39 @@ class GateAnswerResult(BaseModel):
     topic_id: uuid.UUID
     stage: ProgressStage
     percent_complete: int
+
+
+class GatePackQuestion(BaseModel):
+    question_id: uuid.UUID
+    topic_id: uuid.UUID
+    topic_name: str
+    prompt: str
+    choices: list[str]
+    difficulty: str
+    nonce: str
+    answer_digest: str = Field(description="sha256 of '<nonce>:<answer_index>' for the correct answer")
+    grading_token: str
+
+
+class GatePack(BaseModel):
+    questions: list[GatePackQuestion]
+    policy: GatePolicy
+    expires_at: datetime
+
+
+class GatePackAnswer(BaseModel):
+    grading_token: str
+    answer_index: int = Field(ge=0, le=3)
+    seconds: int | None = Field(default=None, ge=0)
+    answered_at: datetime | None = None
+
+
+class GatePackReport(BaseModel):
+    answers: list[GatePackAnswer] = Field(min_length=1, max_length=500)
+
+
+class GatePackAnswerResult(BaseModel):
+    question_id: uuid.UUID | None = None
+    accepted: bool
+    correct: bool | None = None
+    detail: str | None = None
@@ -29,3 +29,13 @@ class QuestionOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class QuestionOverlayItem(BaseModel):
+    """Per-user metrics for one question, to lay over a course catalog. Times are epoch milliseconds."""
+
+    question_id: uuid.UUID
+    last_seen_at: int | None
+    next_due_at: int | None
+    rolling_accuracy: float
+    attempts: int
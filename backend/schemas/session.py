@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class SessionPlanRequest(BaseModel):
+    minutes: float = Field(gt=0, le=240, description="Time budget for the session")
+    course: str | None = Field(default=None, description="Optional course code filter")
+
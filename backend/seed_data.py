@@ -19,6 +19,7 @@ from backend.models.course import Course
 from backend.models.question import Question
 from backend.models.subtopic import Subtopic
 from backend.models.topic import Topic
+from backend.services.question_pool import invalidate_question_pools
 
 
 def parse_iso_datetime(date_str: str | None) -> datetime | None:
@@ -181,6 +182,9 @@ def seed_course_data(db: Session, json_file_path: str) -> None:
                 question_count += 1
 
     db.commit()
+    # Gate sampling pools cached in this process must see the new questions;
+    # API workers pick them up when their pools expire.
+    invalidate_question_pools(course_code)
     print(f"Created {topic_count} topics")
     print(f"Created {subtopic_count} subtopics")
     print(f"Created {content_count} contents")
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.services.ttl_store import TTLStoreBackend, build_ttl_store
+
+# Keep entries a little past the end of the UTC day so late requests still hit
+MEMO_TTL_SECONDS = 36 * 60 * 60
+
+_PENDING_KEY = "activity_memo_pending"
+
+
+class DailyActivityMemo:
+    """Remembers which (user, UTC day) pairs already have their streak recorded.
+
+    Once a user's ``daily_streaks`` row reflects a day, later answers that day
+    cannot change it, so the attempt write path skips the streak upsert on a hit.
+    Entries are only added after the transaction that wrote the row commits.
+    """
+
+    def __init__(self, backend: TTLStoreBackend) -> None:
+        self.backend = backend
+
+    @staticmethod
+    def _key(user_id, day: date) -> str:
+        return f"{user_id}:{day.isoformat()}"
+
+    def seen(self, user_id, day: date) -> bool:
+        return self.backend.get(self._key(user_id, day)) is not None
+
+    def mark(self, user_id, day: date) -> None:
+        self.backend.set(self._key(user_id, day), {"d": day.isoformat()}, MEMO_TTL_SECONDS)
+
+    def mark_after_commit(self, db: Session, user_id, day: date) -> None:
+        db.info.setdefault(_PENDING_KEY, set()).add((user_id, day))
+
+
+_memo: DailyActivityMemo | None = None
+
+
+def get_activity_memo() -> DailyActivityMemo:
+    global _memo
+    if _memo is None:
+        _memo = DailyActivityMemo(build_ttl_store("ACTIVITY_MEMO_REDIS_URL", "unimind:activity:"))
+    return _memo
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_marks(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        memo = get_activity_memo()
+        for user_id, day in pending:
+            memo.mark(user_id, day)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_marks(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Cold storage for old ``question_attempts`` rows.
+Usage: python -m backend.services.archive [run]
+
+Monthly partitions that end more than ATTEMPT_ARCHIVE_AFTER_DAYS ago are
+written to zstd-compressed Parquet files and then dropped from Postgres,
+which keeps the hot table (and its indexes) small. Late rows sitting in the
+DEFAULT partition are archived and deleted the same way. Files are laid out as
+
+    <ATTEMPT_ARCHIVE_DIR>/month=YYYY-MM/bucket=NN/part-<source>.parquet
+
+where the bucket is a stable hash of the user id, so a user's history is
+read from one small file per month. Rows inside a file are sorted by
+(user_id, answered_at) so row-group statistics skip other users.
+
+``attempt_history`` and ``iter_attempts`` merge archived and live rows for
+the history and export endpoints; ``purge_archived_attempts`` removes a
+user's rows for given questions (e.g. on unenrolment). pyarrow is only
+imported when archived files exist.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import re
+import sys
+import uuid
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.models.attempt import QuestionAttempt
+from backend.services.partitions import DEFAULT_PARTITION, add_months, existing_partitions, month_start
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(os.getenv("ATTEMPT_ARCHIVE_DIR", "attempt_archive"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ATTEMPT_ARCHIVE_AFTER_DAYS", "180"))
+USER_BUCKETS = int(os.getenv("ATTEMPT_ARCHIVE_BUCKETS", "16"))
+ROW_GROUP_SIZE = 64 * 1024
+
+_MONTH_DIR = re.compile(r"^month=(\d{4})-(\d{2})$")
+_MONTH_PARTITION = re.compile(r"_(\d{4})_(\d{2})$")
+_COLUMNS = ("id", "user_id", "question_id", "was_correct", "seconds", "answered_at")
+
+
+@dataclass(frozen=True)
+class AttemptRecord:
+    id: uuid.UUID
+    question_id: uuid.UUID
+    was_correct: bool
+    seconds: int
+    answered_at: datetime
+
+
+def user_bucket(user_id: uuid.UUID) -> int:
+    return zlib.crc32(user_id.bytes) % USER_BUCKETS
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("id", pa.binary(16)),
+            ("user_id", pa.binary(16)),
+            ("question_id", pa.binary(16)),
+            ("was_correct", pa.bool_()),
+            ("seconds", pa.int32()),
+            ("answered_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def _bucket_dir(month: date, bucket: int) -> Path:
+    return ARCHIVE_DIR / f"month={month:%Y-%m}" / f"bucket={bucket:02d}"
+
+
+def archived_months() -> list[date]:
+    if not ARCHIVE_DIR.is_dir():
+        return []
+    months = []
+    for entry in ARCHIVE_DIR.iterdir():
+        match = _MONTH_DIR.match(entry.name)
+        if match and entry.is_dir():
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def archive_horizon() -> datetime | None:
+    """End of the newest archived month; live rows older than this may also be archived."""
+    months = archived_months()
+    if not months:
+        return None
+    end = add_months(months[-1], 1)
+    return datetime(end.year, end.month, end.day, tzinfo=timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+
+def _write_rows(rows: Iterable, source: str) -> dict[tuple[date, int], int]:
+    """Write rows ordered by (user_id, answered_at) into month/bucket files named after ``source``."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _schema()
+    buffers: dict[tuple[date, int], dict[str, list]] = defaultdict(lambda: {name: [] for name in _COLUMNS})
+    writers: dict[tuple[date, int], tuple] = {}
+    counts: dict[tuple[date, int], int] = defaultdict(int)
+
+    def flush(key) -> None:
+        columns = buffers.pop(key)
+        if key not in writers:
+            path = _bucket_dir(*key) / f"part-{source}.parquet"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".parquet.tmp")
+            writers[key] = (pq.ParquetWriter(tmp, schema, compression="zstd"), tmp, path)
+        writers[key][0].write_table(pa.table(columns, schema=schema))
+
+    try:
+        for row in rows:
+            moment = row.answered_at.astimezone(timezone.utc)
+            key = (month_start(moment.date()), user_bucket(row.user_id))
+            columns = buffers[key]
+            columns["id"].append(row.id.bytes)
+            columns["user_id"].append(row.user_id.bytes)
+            columns["question_id"].append(row.question_id.bytes)
+            columns["was_correct"].append(row.was_correct)
+            columns["seconds"].append(row.seconds)
+            columns["answered_at"].append(moment)
+            counts[key] += 1
+            if len(columns["id"]) >= ROW_GROUP_SIZE:
+                flush(key)
+        for key in list(buffers):
+            flush(key)
+    except BaseException:
+        for writer, tmp, _path in writers.values():
+            writer.close()
+            tmp.unlink(missing_ok=True)
+        raise
+
+    for writer, tmp, path in writers.values():
+        writer.close()
+        # Atomic publish: readers never see a half-written file
+        os.replace(tmp, path)
+    return counts
+
+
+def _stream(conn, stmt):
+    return conn.execution_options(stream_results=True, yield_per=ROW_GROUP_SIZE).execute(stmt)
+
+
+def _partition_table(partition: str):
+    """A single partition with the parent's typed columns, so UUIDs come back as ``uuid.UUID``."""
+    parent = QuestionAttempt.__table__
+    return table(partition, *(column(name, parent.c[name].type) for name in _COLUMNS))
+
+
+def archive_old_attempts(engine: Engine, after_days: int = ARCHIVE_AFTER_DAYS) -> int:
+    """Archive and drop partitions older than the horizon. Returns rows archived."""
+    cutoff = month_start((datetime.now(timezone.utc) - timedelta(days=after_days)).date())
+    archived = 0
+
+    with engine.connect() as conn:
+        partitions = existing_partitions(conn)
+    for name in sorted(partitions):
+        match = _MONTH_PARTITION.search(name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if add_months(month, 1) > cutoff:
+            continue
+        source = _partition_table(name)
+        with engine.begin() as conn:
+            rows = _stream(conn, select(source).order_by(source.c.user_id, source.c.answered_at))
+            counts = _write_rows(rows, name)
+            # Files are published before the rows go; a crash in between rewrites the same files
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        archived += sum(counts.values())
+        logger.info("[archive] Archived %s rows from %s", sum(counts.values()), name)
+
+    if DEFAULT_PARTITION in partitions:
+        # Late answers for months that are already archived
+        boundary = datetime(cutoff.year, cutoff.month, 1, tzinfo=timezone.utc)
+        source = _partition_table(DEFAULT_PARTITION)
+        late = select(source).where(source.c.answered_at < boundary)
+        with engine.begin() as conn:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            counts = _write_rows(_stream(conn, late.order_by(source.c.user_id, source.c.answered_at)), f"default-{stamp}")
+            if counts:
+                conn.execute(source.delete().where(source.c.answered_at < boundary))
+        archived += sum(counts.values())
+    return archived
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def _user_files(user_id: uuid.UUID, since: datetime | None, until: datetime | None) -> list[tuple[date, list[Path]]]:
+    bucket = user_bucket(user_id)
+    first = month_start(since.astimezone(timezone.utc).date()) if since else None
+    last = month_start(until.astimezone(timezone.utc).date()) if until else None
+    files = []
+    for month in archived_months():
+        if (first and month < first) or (last and month > last):
+            continue
+        paths = sorted(_bucket_dir(month, bucket).glob("part-*.parquet"))
+        if paths:
+            files.append((month, paths))
+    return files
+
+
+def _read_user_rows(path: Path, user_key: bytes, columns: list[str]):
+    """Yield pyarrow tables holding only ``user_key``'s rows, skipping row groups by statistics."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    user_column = parquet.schema_arrow.get_field_index("user_id")
+    needle = pa.scalar(user_key, pa.binary(16))
+    for index in range(parquet.metadata.num_row_groups):
+        stats = parquet.metadata.row_group(index).column(user_column).statistics
+        if stats is not None and stats.has_min_max and not (stats.min <= user_key <= stats.max):
+            continue
+        group = parquet.read_row_group(index, columns=list({*columns, "user_id"}))
+        yield group.filter(pc.equal(group["user_id"], needle))
+
+
+def _read_records(
+    user_id: uuid.UUID,
+    paths: list[Path],
+    since: datetime | None,
+    until: datetime | None,
+    records: dict[uuid.UUID, AttemptRecord],
+) -> None:
+    for path in paths:
+        for group in _read_user_rows(path, user_id.bytes, list(_COLUMNS)):
+            for row in group.to_pylist():
+                answered_at = row["answered_at"]
+                if (since and answered_at < since) or (until and answered_at >= until):
+                    continue
+                # A re-run archive can leave the same row in two files
+                attempt_id = uuid.UUID(bytes=row["id"])
+                records[attempt_id] = AttemptRecord(
+                    id=attempt_id,
+                    question_id=uuid.UUID(bytes=row["question_id"]),
+                    was_correct=row["was_correct"],
+                    seconds=row["seconds"],
+                    answered_at=answered_at,
+                )
+
+
+def archived_attempts(
+    user_id: uuid.UUID,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[AttemptRecord]:
+    """A user's archived attempts with ``since <= answered_at < until``, oldest first."""
+    records: dict[uuid.UUID, AttemptRecord] = {}
+    for _month, paths in _user_files(user_id, since, until):
+        _read_records(user_id, paths, since, until, records)
+    return sorted(records.values(), key=lambda record: record.answered_at)
+
+
+def purge_archived_attempts(user_id: uuid.UUID, question_ids: set[uuid.UUID]) -> list[AttemptRecord]:
+    """Rewrite the user's archive files without their attempts at ``question_ids``.
+
+    Used when a student leaves a course, like the delete of their live
+    attempts. Returns the removed attempts so rollups can be adjusted.
+    """
+    files = _user_files(user_id, None, None) if question_ids else []
+    if not files:
+        return []
+
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    needle = pa.scalar(user_id.bytes, pa.binary(16))
+    questions = pa.array([question_id.bytes for question_id in question_ids], pa.binary(16))
+    removed: dict[uuid.UUID, AttemptRecord] = {}
+    for _month, paths in files:
+        for path in paths:
+            table = pq.read_table(path, schema=_schema())
+            doomed = pc.and_(pc.equal(table["user_id"], needle), pc.is_in(table["question_id"], value_set=questions))
+            if not pc.any(doomed).as_py():
+                continue
+            for row in table.filter(doomed).to_pylist():
+                attempt_id = uuid.UUID(bytes=row["id"])
+                removed[attempt_id] = AttemptRecord(
+                    id=attempt_id,
+                    question_id=uuid.UUID(bytes=row["question_id"]),
+                    was_correct=row["was_correct"],
+                    seconds=row["seconds"],
+                    answered_at=row["answered_at"],
+                )
+            tmp = path.with_suffix(".parquet.tmp")
+            pq.write_table(table.filter(pc.invert(doomed)), tmp, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp, path)
+    return sorted(removed.values(), key=lambda record: record.answered_at)
+
+
+def _live_query(user_id: uuid.UUID):
+    return select(
+        QuestionAttempt.id,
+        QuestionAttempt.question_id,
+        QuestionAttempt.was_correct,
+        QuestionAttempt.seconds,
+        QuestionAttempt.answered_at,
+    ).where(QuestionAttempt.user_id == user_id)
+
+
+def attempt_history(
+    db: Session,
+    user_id: uuid.UUID,
+    before: datetime | None = None,
+    limit: int = 100,
+) -> list[AttemptRecord]:
+    """Newest-first page of attempts older than ``before`` from live and archived rows.
+
+    Archived months are read newest first, stopping once ``limit`` attempts
+    at least as new as the month just read are known.
+    """
+    stmt = _live_query(user_id).order_by(QuestionAttempt.answered_at.desc()).limit(limit)
+    if before is not None:
+        stmt = stmt.where(QuestionAttempt.answered_at < before)
+    live = [AttemptRecord(*row) for row in db.execute(stmt)]
+
+    horizon = archive_horizon()
+    if horizon is None or (len(live) == limit and live[-1].answered_at >= horizon):
+        return live
+    merged = {record.id: record for record in live}
+    for month, paths in reversed(_user_files(user_id, None, before)):
+        _read_records(user_id, paths, None, before, merged)
+        start = datetime(month.year, month.month, month.day, tzinfo=timezone.utc)
+        if sum(record.answered_at >= start for record in merged.values()) >= limit:
+            break
+    return sorted(merged.values(), key=lambda record: record.answered_at, reverse=True)[:limit]
+
+
+def iter_attempts(db: Session, user_id: uuid.UUID) -> Iterator[AttemptRecord]:
+    """Every attempt of the user, oldest first, streaming the live rows."""
+    live = (
+        AttemptRecord(*row)
+        for row in db.execute(
+            _live_query(user_id).order_by(QuestionAttempt.answered_at).execution_options(yield_per=1000)
+        )
+    )
+    archived = archived_attempts(user_id) if archive_horizon() else []
+    seen = {record.id for record in archived}
+    yield from heapq.merge(
+        archived,
+        (record for record in live if record.id not in seen),
+        key=lambda record: record.answered_at,
+    )
+
+
+def main():
+    from backend.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] not in ([], ["run"]):
+        print("Usage: python -m backend.services.archive [run]")
+        sys.exit(1)
+    print(f"Archived {archive_old_attempts(engine)} attempts to {ARCHIVE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
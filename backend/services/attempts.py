@@ -0,0 +1,573 @@
+from __future__ import annotations
+
+import os
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import Interval, and_, case, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.models.attempt import QuestionAttempt
+from backend.models.attempt_event import AttemptEvent
+from backend.models.daily_activity import UserDailyActivity
+from backend.models.progress import ProgressStage, TopicProgress
+from backend.models.question_metric import QuestionMetric
+from backend.models.streak import DailyStreak
+from backend.services.activity_memo import get_activity_memo
+from backend.services.daily_activity import is_new_question_for_day, upsert_activity_rows, upsert_attempt_activity
+from backend.services.ids import uuid7
+from backend.services.progress import next_percent, stage_from_percent, upsert_topic_progress
+from backend.services.scheduler import AnswerHistory, DoublingScheduler, Scheduler, live_scheduler, replay
+from backend.services.scheduler.base import MAX_INTERVAL_DAYS
+from backend.services.streaks import advance_streak, upsert_streak
+
+EMA_ALPHA = 0.15  # ~7 attempts effective window
+DAY = timedelta(days=1)
+SIX_HOURS = timedelta(hours=6)
+# next_metric_state inputs for a question without a metric row
+NEW_METRIC_STATE = (0.5, 0, None, None, None)
+
+# "inline" applies derived state in the request; "outbox" only appends to
+# attempt_events and leaves the rest to the projector (services/projections).
+ATTEMPT_WRITE_MODE = os.getenv("ATTEMPT_WRITE_MODE", "inline").lower()
+
+
+def outbox_enabled() -> bool:
+    return ATTEMPT_WRITE_MODE == "outbox"
+
+
+def _interval_days(last_seen_at: datetime | None, next_due_at: datetime | None) -> float | None:
+    if last_seen_at and next_due_at:
+        return max(timedelta(seconds=1), next_due_at - last_seen_at) / DAY
+    return None
+
+
+def next_metric_state(
+    rolling_accuracy: float | None,
+    attempts: int | None,
+    last_seen_at: datetime | None,
+    next_due_at: datetime | None,
+    scheduler_state: dict[str, float] | None,
+    is_correct: bool,
+    now: datetime,
+    scheduler: Scheduler | None = None,
+) -> tuple[float, int, datetime, datetime, dict[str, float]]:
+    """Return ``(rolling_accuracy, attempts, last_seen_at, next_due_at, scheduler_state)`` after one answer.
+
+    The interval comes from ``scheduler`` (default: ``live_scheduler()``).
+    ``scheduler_state`` is the pair's state as resolved by
+    ``_locked_metric_states``; None for a new pair (or, for the doubling
+    rule, to derive it from the stored schedule). An answer older than
+    ``last_seen_at`` (e.g. an offline result reported late) counts towards
+    accuracy and attempts but leaves the schedule alone.
+    """
+    scheduler = scheduler or live_scheduler()
+    prev = rolling_accuracy or 0.5
+    target = 1.0 if is_correct else 0.0
+    accuracy = max(0.0, min(1.0, EMA_ALPHA * target + (1 - EMA_ALPHA) * prev))
+    attempts = max(0, (attempts or 0)) + 1
+    if last_seen_at is not None and now < last_seen_at:
+        return accuracy, attempts, last_seen_at, next_due_at, scheduler_state
+
+    if scheduler_state is None:
+        scheduler_state = scheduler.load_state(None, _interval_days(last_seen_at, next_due_at))
+    elapsed_days = (now - last_seen_at) / DAY if last_seen_at else 0.0
+    state, interval_days = scheduler.step(scheduler_state, is_correct, elapsed_days)
+    return accuracy, attempts, now, now + timedelta(days=interval_days), state
+
+
+def _interval(value: timedelta):
+    return literal(value, Interval())
+
+
+def upsert_question_metric(
+    user_id, question_id, is_correct: bool, now: datetime, scheduler: DoublingScheduler
+) -> Insert:
+    """Build an atomic upsert applying the doubling rule to the stored row in SQL.
+
+    Used while the live scheduler is ``DoublingScheduler``, whose state is
+    ``next_due_at - last_seen_at``; other algorithms go through
+    ``_fold_question_metric``.
+    """
+    accuracy, attempts, last_seen_at, next_due_at, _state = next_metric_state(
+        None, None, None, None, None, is_correct, now, scheduler
+    )
+    stmt = pg_insert(QuestionMetric).values(
+        user_id=user_id,
+        question_id=question_id,
+        rolling_accuracy=accuracy,
+        attempts=attempts,
+        last_seen_at=last_seen_at,
+        next_due_at=next_due_at,
+        scheduler_state=None,
+    )
+
+    target = 1.0 if is_correct else 0.0
+    prev_accuracy = func.coalesce(QuestionMetric.rolling_accuracy, 0.5)
+    prev_interval = case(
+        (
+            and_(QuestionMetric.last_seen_at.is_not(None), QuestionMetric.next_due_at.is_not(None)),
+            func.greatest(_interval(timedelta(seconds=1)), QuestionMetric.next_due_at - QuestionMetric.last_seen_at),
+        ),
+        else_=_interval(DAY),
+    )
+    if is_correct:
+        next_interval = func.greatest(_interval(DAY * scheduler.floor_correct_days), prev_interval * scheduler.growth)
+    else:
+        next_interval = func.greatest(_interval(DAY * scheduler.floor_wrong_days), prev_interval * scheduler.shrink)
+    next_interval = func.least(_interval(DAY * MAX_INTERVAL_DAYS), next_interval)
+    # Late answers (older than the stored one) keep the current schedule
+    late = QuestionMetric.last_seen_at > stmt.excluded.last_seen_at
+
+    return stmt.on_conflict_do_update(
+        index_elements=[QuestionMetric.user_id, QuestionMetric.question_id],
+        set_={
+            "rolling_accuracy": func.greatest(0.0, func.least(1.0, EMA_ALPHA * target + (1 - EMA_ALPHA) * prev_accuracy)),
+            "attempts": func.greatest(0, QuestionMetric.attempts) + 1,
+            "last_seen_at": func.greatest(QuestionMetric.last_seen_at, stmt.excluded.last_seen_at),
+            "next_due_at": case((late, QuestionMetric.next_due_at), else_=stmt.excluded.last_seen_at + next_interval),
+            "scheduler_state": None,
+        },
+    )
+
+
+def upsert_metric_rows(rows: list[dict]) -> Insert:
+    """Build a multi-row upsert writing metric values folded in Python (rows must be locked)."""
+    stmt = pg_insert(QuestionMetric).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[QuestionMetric.user_id, QuestionMetric.question_id],
+        set_={
+            "rolling_accuracy": stmt.excluded.rolling_accuracy,
+            "attempts": stmt.excluded.attempts,
+            "last_seen_at": stmt.excluded.last_seen_at,
+            "next_due_at": stmt.excluded.next_due_at,
+            "scheduler_state": stmt.excluded.scheduler_state,
+        },
+    )
+
+
+def _metric_row(user_id, question_id, metric_state: tuple, scheduler: Scheduler) -> dict:
+    accuracy, attempts, last_seen_at, next_due_at, state = metric_state
+    return {
+        "user_id": user_id,
+        "question_id": question_id,
+        "rolling_accuracy": accuracy,
+        "attempts": attempts,
+        "last_seen_at": last_seen_at,
+        "next_due_at": next_due_at,
+        "scheduler_state": scheduler.dump_state(state),
+    }
+
+
+def _replayed_states(db: Session, scheduler: Scheduler, user_id, question_ids: set) -> dict:
+    """Scheduler state of each pair after replaying its live attempts (archived ones are not read)."""
+    rows = db.execute(
+        select(QuestionAttempt.question_id, QuestionAttempt.answered_at, QuestionAttempt.was_correct)
+        .where(QuestionAttempt.user_id == user_id, QuestionAttempt.question_id.in_(question_ids))
+        .order_by(QuestionAttempt.question_id, QuestionAttempt.answered_at, QuestionAttempt.id)
+    ).all()
+    if not rows:
+        return {}
+    pairs: list = []
+    codes = []
+    for question_id, _answered_at, _was_correct in rows:
+        if not pairs or pairs[-1] != question_id:
+            pairs.append(question_id)
+        codes.append(len(pairs) - 1)
+    history = AnswerHistory.from_sorted(
+        np.array(codes, dtype=np.int64),
+        np.array([row.answered_at.timestamp() for row in rows]),
+        np.array([row.was_correct for row in rows]),
+    )
+    state = replay(scheduler, history)
+    return {
+        question_id: {name: float(values[index]) for name, values in state.items()}
+        for index, question_id in enumerate(pairs)
+    }
+
+
+def _locked_metric_states(db: Session, scheduler: Scheduler, user_id, question_ids: set) -> dict:
+    """Lock the user's metric rows and return ``next_metric_state`` inputs per question.
+
+    Rows whose state the scheduler cannot read (another algorithm wrote it,
+    or none was stored yet) are rebuilt by replaying their attempts; run
+    ``backend.services.scheduler.batch`` after switching algorithms so this
+    stays rare.
+    """
+    states = {}
+    to_replay = set()
+    for row in (
+        db.query(
+            QuestionMetric.question_id,
+            QuestionMetric.rolling_accuracy,
+            QuestionMetric.attempts,
+            QuestionMetric.last_seen_at,
+            QuestionMetric.next_due_at,
+            QuestionMetric.scheduler_state,
+        )
+        .filter(QuestionMetric.user_id == user_id, QuestionMetric.question_id.in_(question_ids))
+        .with_for_update()
+    ):
+        state = scheduler.load_state(row.scheduler_state, _interval_days(row.last_seen_at, row.next_due_at))
+        if state is None and row.last_seen_at is not None:
+            to_replay.add(row.question_id)
+        states[row.question_id] = (row.rolling_accuracy, row.attempts, row.last_seen_at, row.next_due_at, state)
+    if to_replay:
+        for question_id, state in _replayed_states(db, scheduler, user_id, to_replay).items():
+            states[question_id] = (*states[question_id][:4], state)
+    return states
+
+
+def _fold_question_metric(db: Session, scheduler: Scheduler, user_id, question_id, is_correct: bool, now: datetime) -> Insert:
+    """Build the metric upsert for schedulers that keep per-pair state, folding the answer in Python."""
+    previous = _locked_metric_states(db, scheduler, user_id, {question_id}).get(question_id, NEW_METRIC_STATE)
+    metric_state = next_metric_state(*previous, is_correct, now, scheduler)
+    return upsert_metric_rows([_metric_row(user_id, question_id, metric_state, scheduler)])
+
+
+def record_attempt(
+    db: Session,
+    user_id,
+    question_id,
+    topic_id,
+    is_correct: bool,
+    seconds: int | None,
+    answered_at: datetime | None = None,
+) -> tuple[ProgressStage, int]:
+    """Store an attempt and update progress, metrics and streak. Does not commit.
+
+    Everything is sent as one statement: the attempt INSERT and the metric,
+    daily activity and streak upserts ride along as data-modifying CTEs of the progress upsert,
+    whose RETURNING clause provides the topic's new stage and percentage. The
+    streak CTE is left out once the day is in the activity memo. Schedulers
+    other than the doubling rule first read (and lock) the metric row to fold
+    the answer into its stored state.
+    In outbox mode only the event is written; see ``append_attempt_event``.
+    """
+    now = answered_at or datetime.now(timezone.utc)
+    if outbox_enabled():
+        return append_attempt_event(db, user_id, question_id, topic_id, is_correct, seconds, now)
+
+    attempt = (
+        insert(QuestionAttempt)
+        .values(
+            id=uuid7(),
+            user_id=user_id,
+            question_id=question_id,
+            was_correct=is_correct,
+            seconds=seconds or 0,
+            answered_at=now,
+        )
+        .returning(QuestionAttempt.id)
+        .cte("new_attempt")
+    )
+    scheduler = live_scheduler()
+    if isinstance(scheduler, DoublingScheduler):
+        metric_stmt = upsert_question_metric(user_id, question_id, is_correct, now, scheduler)
+    else:
+        metric_stmt = _fold_question_metric(db, scheduler, user_id, question_id, is_correct, now)
+    metric = metric_stmt.returning(QuestionMetric.question_id).cte("metric")
+    day = now.astimezone(timezone.utc).date()
+    activity = (
+        upsert_attempt_activity(user_id, question_id, is_correct, seconds or 0, day)
+        .returning(UserDailyActivity.day)
+        .cte("activity")
+    )
+    ctes = [attempt, metric, activity]
+    memo = get_activity_memo()
+    if not memo.seen(user_id, day):
+        ctes.append(upsert_streak(user_id, day).returning(DailyStreak.user_id).cte("streak"))
+        memo.mark_after_commit(db, user_id, day)
+    progress = (
+        upsert_topic_progress(user_id, topic_id, is_correct, now)
+        .returning(TopicProgress.stage, TopicProgress.percent_complete)
+        .cte("progress")
+    )
+
+    stage, percent = db.execute(
+        select(progress.c.stage, progress.c.percent_complete).add_cte(*ctes)
+    ).one()
+    return ProgressStage(stage), percent
+
+
+@dataclass
+class BatchAnswer:
+    question_id: uuid.UUID
+    topic_id: uuid.UUID
+    is_correct: bool
+    seconds: int | None
+    answered_at: datetime
+
+
+def normalize_client_time(value: datetime | None, now: datetime) -> datetime:
+    """Convert client timestamps to UTC (naive ones are taken as UTC) and never accept times in the future.
+
+    Calendar days (activity, streaks) are UTC days, so the client's offset must
+    not leak into ``answered_at.date()``.
+    """
+    if value is None:
+        return now
+    if value.tzinfo is None:
+        return min(value.replace(tzinfo=timezone.utc), now)
+    return min(value.astimezone(timezone.utc), now)
+
+
+def _current_percent(user_id, topic_id):
+    return func.coalesce(
+        select(TopicProgress.percent_complete)
+        .where(TopicProgress.user_id == user_id, TopicProgress.topic_id == topic_id)
+        .scalar_subquery(),
+        0,
+    )
+
+
+def append_attempt_event(
+    db: Session,
+    user_id,
+    question_id,
+    topic_id,
+    is_correct: bool,
+    seconds: int | None,
+    answered_at: datetime,
+) -> tuple[ProgressStage, int]:
+    """Append one attempt to the outbox. Does not commit.
+
+    The INSERT runs as a CTE of a read of the topic's projected percentage, so
+    the caller still gets the expected stage back in a single statement. The
+    value can lag behind events the projector has not applied yet.
+    """
+    event = (
+        insert(AttemptEvent)
+        .values(
+            user_id=user_id,
+            question_id=question_id,
+            topic_id=topic_id,
+            was_correct=is_correct,
+            seconds=seconds or 0,
+            answered_at=answered_at,
+        )
+        .returning(AttemptEvent.seq)
+        .cte("new_event")
+    )
+    current = db.execute(select(_current_percent(user_id, topic_id)).add_cte(event)).scalar_one()
+    percent = next_percent(current, is_correct)
+    return stage_from_percent(percent), percent
+
+
+def append_attempt_events(
+    db: Session,
+    user_id,
+    answers: list[BatchAnswer],
+) -> list[tuple[ProgressStage, int]]:
+    """Append answers to the outbox with one multi-row INSERT. Does not commit."""
+    if not answers:
+        return []
+
+    topic_ids = {answer.topic_id for answer in answers}
+    percents = dict(
+        db.query(TopicProgress.topic_id, TopicProgress.percent_complete)
+        .filter(TopicProgress.user_id == user_id, TopicProgress.topic_id.in_(topic_ids))
+        .all()
+    )
+    outcomes: list[tuple[ProgressStage, int]] = []
+    for answer in answers:
+        percent = next_percent(percents.get(answer.topic_id, 0), answer.is_correct)
+        percents[answer.topic_id] = percent
+        outcomes.append((stage_from_percent(percent), percent))
+
+    db.execute(
+        insert(AttemptEvent),
+        [
+            {
+                "user_id": user_id,
+                "question_id": answer.question_id,
+                "topic_id": answer.topic_id,
+                "was_correct": answer.is_correct,
+                "seconds": answer.seconds or 0,
+                "answered_at": answer.answered_at,
+            }
+            for answer in answers
+        ],
+    )
+    return outcomes
+
+
+def record_attempts_batch(
+    db: Session,
+    user_id,
+    answers: list[BatchAnswer],
+) -> list[tuple[ProgressStage, int]]:
+    """Record answers in list order. Does not commit.
+
+    Inline mode applies them with ``apply_attempts_batch``; outbox mode only
+    appends them to ``attempt_events``.
+    """
+    if outbox_enabled():
+        return append_attempt_events(db, user_id, answers)
+    return apply_attempts_batch(db, user_id, answers)
+
+
+def apply_attempts_batch(
+    db: Session,
+    user_id,
+    answers: list[BatchAnswer],
+) -> list[tuple[ProgressStage, int]]:
+    """Apply answers in list order using set-based writes. Does not commit.
+
+    Current progress, metrics and streak are read once (locked for update),
+    folded in memory with the same rules as ``record_attempt``, then written
+    back with one multi-row INSERT and one upsert per derived table (daily
+    activity is aggregated per day). The
+    streak is neither read nor written when the latest answered day is already
+    in the activity memo. Returns the topic stage and percentage reached after
+    each answer.
+    """
+    if not answers:
+        return []
+
+    topic_ids = {answer.topic_id for answer in answers}
+    question_ids = {answer.question_id for answer in answers}
+
+    percents = {
+        topic_id: percent
+        for topic_id, percent in db.query(TopicProgress.topic_id, TopicProgress.percent_complete)
+        .filter(TopicProgress.user_id == user_id, TopicProgress.topic_id.in_(topic_ids))
+        .with_for_update()
+        .all()
+    }
+    scheduler = live_scheduler()
+    metric_states = _locked_metric_states(db, scheduler, user_id, question_ids)
+    memo = get_activity_memo()
+    latest_day = max(answer.answered_at for answer in answers).astimezone(timezone.utc).date()
+    # Earlier days never move a streak past a recorded later day, so a memo hit
+    # on the latest day means the whole batch leaves daily_streaks unchanged.
+    track_streak = not memo.seen(user_id, latest_day)
+    streak_state = (0, 0, None)
+    if track_streak:
+        streak_row = (
+            db.query(DailyStreak.current_streak, DailyStreak.longest_streak, DailyStreak.last_active_date)
+            .filter(DailyStreak.user_id == user_id)
+            .with_for_update()
+            .first()
+        )
+        if streak_row:
+            streak_state = tuple(streak_row)
+
+    outcomes: list[tuple[ProgressStage, int]] = []
+    practised_at: dict = {}
+    # day -> [attempts, distinct_questions, correct, seconds]
+    activity: dict = defaultdict(lambda: [0, 0, 0, 0])
+    for answer in answers:
+        percent = next_percent(percents.get(answer.topic_id, 0), answer.is_correct)
+        percents[answer.topic_id] = percent
+        practised_at[answer.topic_id] = max(answer.answered_at, practised_at.get(answer.topic_id, answer.answered_at))
+        outcomes.append((stage_from_percent(percent), percent))
+
+        previous = metric_states.get(answer.question_id, NEW_METRIC_STATE)
+        # UTC day whatever offset the timestamp carries (events read back use the session's)
+        day = answer.answered_at.astimezone(timezone.utc).date()
+        totals = activity[day]
+        totals[0] += 1
+        totals[1] += is_new_question_for_day(previous[2], day)
+        totals[2] += answer.is_correct
+        totals[3] += answer.seconds or 0
+
+        metric_states[answer.question_id] = next_metric_state(*previous, answer.is_correct, answer.answered_at, scheduler)
+        if track_streak:
+            streak_state = advance_streak(*streak_state, day)
+
+    db.execute(
+        insert(QuestionAttempt),
+        [
+            {
+                "user_id": user_id,
+                "question_id": answer.question_id,
+                "was_correct": answer.is_correct,
+                "seconds": answer.seconds or 0,
+                "answered_at": answer.answered_at,
+            }
+            for answer in answers
+        ],
+    )
+
+    progress_stmt = pg_insert(TopicProgress).values(
+        [
+            {
+                "user_id": user_id,
+                "topic_id": topic_id,
+                "percent_complete": percents[topic_id],
+                "stage": stage_from_percent(percents[topic_id]),
+                "last_seen_at": seen_at,
+                "last_practised_at": seen_at,
+            }
+            for topic_id, seen_at in practised_at.items()
+        ]
+    )
+    db.execute(
+        progress_stmt.on_conflict_do_update(
+            index_elements=[TopicProgress.user_id, TopicProgress.topic_id],
+            set_={
+                "percent_complete": progress_stmt.excluded.percent_complete,
+                "stage": progress_stmt.excluded.stage,
+                # Answers reported late must not move these back
+                "last_seen_at": func.greatest(TopicProgress.last_seen_at, progress_stmt.excluded.last_seen_at),
+                "last_practised_at": func.greatest(
+                    TopicProgress.last_practised_at, progress_stmt.excluded.last_practised_at
+                ),
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+    db.execute(
+        upsert_metric_rows(
+            [
+                _metric_row(user_id, question_id, metric_state, scheduler)
+                for question_id, metric_state in metric_states.items()
+            ]
+        )
+    )
+
+    db.execute(
+        upsert_activity_rows(
+            [
+                {
+                    "user_id": user_id,
+                    "day": day,
+                    "attempts": attempts,
+                    "distinct_questions": distinct,
+                    "correct": correct,
+                    "seconds": seconds,
+                }
+                for day, (attempts, distinct, correct, seconds) in activity.items()
+            ]
+        )
+    )
+
+    if not track_streak:
+        return outcomes
+
+    current, longest, last_active = streak_state
+    streak_stmt = pg_insert(DailyStreak).values(
+        user_id=user_id,
+        current_streak=current,
+        longest_streak=longest,
+        last_active_date=last_active,
+    )
+    db.execute(
+        streak_stmt.on_conflict_do_update(
+            index_elements=[DailyStreak.user_id],
+            set_={
+                "current_streak": streak_stmt.excluded.current_streak,
+                "longest_streak": streak_stmt.excluded.longest_streak,
+                "last_active_date": streak_stmt.excluded.last_active_date,
+                "updated_at": func.now(),
+            },
+        )
+    )
+    memo.mark_after_commit(db, user_id, latest_day)
+    return outcomes
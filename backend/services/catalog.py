@@ -0,0 +1,92 @@
+"""
+Shared, immutable per-course question catalogs.
+
+A catalog holds a course's question content (no per-user data) as compact
+JSON ordered by question id, gzip-compressed once and kept in memory. Its
+version is a hash of the JSON bytes. The body never changes for a version,
+so clients can cache it forever (privately: it includes answers). Output is
+deterministic, so every worker builds the same bytes and version for the
+same content.
+Staleness is checked with a cheap aggregate over ``sync_tx``.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models.question import Question
+from backend.models.topic import Topic
+
+
+@dataclass(frozen=True)
+class CourseCatalog:
+    course_code: str
+    version: str
+    gzip_body: bytes
+    question_count: int
+    # (question count, newest sync_tx) the catalog was built from
+    source_key: tuple[int, int]
+
+
+_catalogs: dict[str, CourseCatalog] = {}
+_lock = threading.Lock()
+
+
+def _course_questions(db: Session, course_code: str):
+    return (
+        db.query(Question, Topic)
+        .join(Topic, Question.topic_id == Topic.id)
+        .filter(Topic.course_code == course_code)
+    )
+
+
+def _source_key(db: Session, course_code: str) -> tuple[int, int]:
+    count, newest = (
+        _course_questions(db, course_code)
+        .with_entities(func.count(), func.max(func.greatest(Question.sync_tx, Topic.sync_tx)))
+        .one()
+    )
+    return int(count), int(newest or 0)
+
+
+def build_catalog(db: Session, course_code: str) -> CourseCatalog:
+    source_key = _source_key(db, course_code)
+    items = [
+        {
+            "id": str(question.id),
+            "topic": topic.name,
+            "course_code": topic.course_code,
+            "prompt": question.prompt,
+            "options": question.choices,
+            "correctAnswer": question.correct_index,
+            "difficulty": question.difficulty,
+            "explanation": question.explanation,
+        }
+        for question, topic in _course_questions(db, course_code).order_by(Question.id)
+    ]
+    body = json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode()
+    return CourseCatalog(
+        course_code=course_code,
+        version=hashlib.sha256(body).hexdigest()[:32],
+        # mtime=0 keeps the compressed bytes identical across builds
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        question_count=len(items),
+        source_key=source_key,
+    )
+
+
+def current_catalog(db: Session, course_code: str) -> CourseCatalog:
+    """The course's catalog, rebuilt only when its questions or topics changed."""
+    cached = _catalogs.get(course_code)
+    if cached is not None and cached.source_key == _source_key(db, course_code):
+        return cached
+    catalog = build_catalog(db, course_code)
+    with _lock:
+        _catalogs[course_code] = catalog
+    return catalog
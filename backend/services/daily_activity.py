@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Daily per-user activity rollups (``user_daily_activity``).
+Usage: python -m backend.services.daily_activity backfill
+
+The attempt write path adds to the row for the answer's UTC day, so stats
+endpoints read O(days) rows instead of scanning ``question_attempts``.
+``backfill`` rebuilds the rows for every day still present in
+``question_attempts``; it also runs at boot while the table is empty.
+Deleting attempts (e.g. on unenrolment) must ``subtract_activity`` them.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import Date, bindparam, case, cast, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.models.attempt import QuestionAttempt
+from backend.models.daily_activity import UserDailyActivity
+from backend.models.question_metric import QuestionMetric
+
+logger = logging.getLogger(__name__)
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def is_new_question_for_day(last_seen_at: datetime | None, day: date) -> bool:
+    """Whether an answer on ``day`` is the first one for its question that day.
+
+    Judged from the question's previous ``last_seen_at``; a late answer for a
+    day the question was also seen on, but not last seen on, counts as new.
+    """
+    return last_seen_at is None or last_seen_at.astimezone(timezone.utc).date() != day
+
+
+def _accumulate(stmt: Insert) -> Insert:
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDailyActivity.user_id, UserDailyActivity.day],
+        set_={
+            "attempts": UserDailyActivity.attempts + stmt.excluded.attempts,
+            "distinct_questions": UserDailyActivity.distinct_questions + stmt.excluded.distinct_questions,
+            "correct": UserDailyActivity.correct + stmt.excluded.correct,
+            "seconds": UserDailyActivity.seconds + stmt.excluded.seconds,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def upsert_attempt_activity(user_id, question_id, is_correct: bool, seconds: int, day: date) -> Insert:
+    """Build an upsert adding one answer to its day.
+
+    Must run in the same statement as (or before) the question's metric
+    upsert: the distinct-question check reads the previous ``last_seen_at``.
+    """
+    start, end = day_bounds(day)
+    seen_today = exists().where(
+        QuestionMetric.user_id == user_id,
+        QuestionMetric.question_id == question_id,
+        QuestionMetric.last_seen_at >= start,
+        QuestionMetric.last_seen_at < end,
+    )
+    return _accumulate(
+        pg_insert(UserDailyActivity).values(
+            user_id=user_id,
+            day=day,
+            attempts=1,
+            distinct_questions=case((seen_today, 0), else_=1),
+            correct=int(is_correct),
+            seconds=seconds,
+        )
+    )
+
+
+def upsert_activity_rows(rows: list[dict]) -> Insert:
+    """Build a multi-row upsert adding pre-aggregated per-day counters."""
+    return _accumulate(pg_insert(UserDailyActivity).values(rows))
+
+
+def subtract_activity(db: Session, user_id, attempts: Iterable) -> int:
+    """Take removed attempts ``(question_id, was_correct, seconds, answered_at)`` back out of their days.
+
+    ``distinct_questions`` drops by the removed questions per day, which is
+    exact when no other attempt that day was for the same questions (e.g.
+    when a whole course's attempts go). Returns the user-days updated.
+    """
+    totals: dict[date, list] = defaultdict(lambda: [0, set(), 0, 0])
+    for question_id, was_correct, seconds, answered_at in attempts:
+        counters = totals[answered_at.astimezone(timezone.utc).date()]
+        counters[0] += 1
+        counters[1].add(question_id)
+        counters[2] += int(bool(was_correct))
+        counters[3] += seconds or 0
+    if not totals:
+        return 0
+
+    stmt = (
+        update(UserDailyActivity)
+        .where(UserDailyActivity.user_id == user_id, UserDailyActivity.day == bindparam("b_day"))
+        .values(
+            attempts=func.greatest(0, UserDailyActivity.attempts - bindparam("b_attempts")),
+            distinct_questions=func.greatest(0, UserDailyActivity.distinct_questions - bindparam("b_distinct")),
+            correct=func.greatest(0, UserDailyActivity.correct - bindparam("b_correct")),
+            seconds=func.greatest(0, UserDailyActivity.seconds - bindparam("b_seconds")),
+            updated_at=func.now(),
+        )
+    )
+    rows = [
+        {"b_day": day, "b_attempts": count, "b_distinct": len(questions), "b_correct": correct, "b_seconds": seconds}
+        for day, (count, questions, correct, seconds) in totals.items()
+    ]
+    db.connection().execute(stmt, rows)
+    return len(rows)
+
+
+def backfill_daily_activity(engine: Engine) -> int:
+    """Recompute rollups from ``question_attempts``. Days already archived keep their rows."""
+    day = cast(func.timezone("UTC", QuestionAttempt.answered_at), Date)
+    totals = select(
+        QuestionAttempt.user_id,
+        day,
+        func.count(),
+        func.count(func.distinct(QuestionAttempt.question_id)),
+        func.count().filter(QuestionAttempt.was_correct),
+        func.coalesce(func.sum(QuestionAttempt.seconds), literal(0)),
+    ).group_by(QuestionAttempt.user_id, day)
+    stmt = pg_insert(UserDailyActivity).from_select(
+        ["user_id", "day", "attempts", "distinct_questions", "correct", "seconds"], totals
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDailyActivity.user_id, UserDailyActivity.day],
+        set_={
+            "attempts": stmt.excluded.attempts,
+            "distinct_questions": stmt.excluded.distinct_questions,
+            "correct": stmt.excluded.correct,
+            "seconds": stmt.excluded.seconds,
+            "updated_at": func.now(),
+        },
+    )
+    with engine.begin() as conn:
+        return conn.execute(stmt).rowcount
+
+
+def backfill_if_empty(engine: Engine) -> None:
+    try:
+        with engine.connect() as conn:
+            empty = conn.execute(select(exists().select_from(UserDailyActivity))).scalar() is False
+            has_attempts = conn.execute(select(exists().select_from(QuestionAttempt))).scalar()
+        if empty and has_attempts:
+            logger.info("[daily_activity] Backfilled %s user-days", backfill_daily_activity(engine))
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[daily_activity] Could not backfill daily activity (%s)", exc)
+
+
+def main():
+    from backend.database import engine
+
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m backend.services.daily_activity backfill")
+        sys.exit(1)
+    print(f"Rebuilt {backfill_daily_activity(engine)} user-days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from backend.services.ttl_store import TTLStoreBackend, build_ttl_store
+
+ALLOWED = "allowed"
+LOCKED = "locked"
+
+
+@dataclass(frozen=True)
+class GateStatus:
+    state: str
+    until: float  # epoch seconds
+
+    @property
+    def remaining_seconds(self) -> float:
+        return max(0.0, self.until - time.time())
+
+
+class GateStateStore:
+    """Tracks each user's active gate allowance or lockout."""
+
+    def __init__(self, backend: TTLStoreBackend) -> None:
+        self.backend = backend
+
+    def status(self, user_id) -> GateStatus | None:
+        value = self.backend.get(str(user_id))
+        if not value or value.get("until", 0) <= time.time():
+            return None
+        return GateStatus(state=value["state"], until=value["until"])
+
+    def _set(self, user_id, state: str, seconds: float) -> GateStatus | None:
+        if seconds <= 0:
+            self.clear(user_id)
+            return None
+        status = GateStatus(state=state, until=time.time() + seconds)
+        self.backend.set(str(user_id), {"state": status.state, "until": status.until}, seconds)
+        return status
+
+    def allow(self, user_id, allow_ms: int) -> GateStatus | None:
+        return self._set(user_id, ALLOWED, allow_ms / 1000)
+
+    def lock_out(self, user_id, seconds: int) -> GateStatus | None:
+        return self._set(user_id, LOCKED, seconds)
+
+    def clear(self, user_id) -> None:
+        self.backend.delete(str(user_id))
+
+
+_store: GateStateStore | None = None
+
+
+def get_gate_state_store() -> GateStateStore:
+    global _store
+    if _store is None:
+        _store = GateStateStore(build_ttl_store("GATE_STATE_REDIS_URL", "unimind:gate:"))
+    return _store
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.models.gate_nonce import ConsumedGradingNonce
+from backend.services.auth import SECRET_KEY
+
+PACK_TOKEN_TTL_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class GradingClaims:
+    user_id: uuid.UUID
+    question_id: uuid.UUID
+    topic_id: uuid.UUID
+    nonce: str
+    answer_digest: str
+    expires_at: int
+
+    def is_correct(self, answer_index: int) -> bool:
+        return hmac.compare_digest(answer_digest(self.nonce, answer_index), self.answer_digest)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(SECRET_KEY.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest())
+
+
+def answer_digest(nonce: str, answer_index: int) -> str:
+    """SHA-256 of ``"<nonce>:<index>"``; the extension grades by hashing the chosen index."""
+    return hashlib.sha256(f"{nonce}:{answer_index}".encode("utf-8")).hexdigest()
+
+
+def issue_grading_token(
+    user_id,
+    question_id,
+    topic_id,
+    correct_index: int,
+    ttl_seconds: int = PACK_TOKEN_TTL_SECONDS,
+) -> tuple[GradingClaims, str]:
+    """Return the claims and the signed token for one pack question."""
+    nonce = secrets.token_urlsafe(12)
+    claims = GradingClaims(
+        user_id=user_id,
+        question_id=question_id,
+        topic_id=topic_id,
+        nonce=nonce,
+        answer_digest=answer_digest(nonce, correct_index),
+        expires_at=int(time.time()) + ttl_seconds,
+    )
+    body = _b64encode(
+        json.dumps(
+            {
+                "u": str(claims.user_id),
+                "q": str(claims.question_id),
+                "t": str(claims.topic_id),
+                "n": claims.nonce,
+                "d": claims.answer_digest,
+                "x": claims.expires_at,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+    )
+    return claims, f"{body}.{_sign(body)}"
+
+
+def verify_grading_token(token: str, user_id, now: float | None = None) -> GradingClaims | None:
+    """Return the token's claims if the signature, owner and expiry check out."""
+    body, _, signature = token.partition(".")
+    if not body or not signature:
+        return None
+
+    try:
+        # Non-ASCII input fails here (UnicodeEncodeError is a ValueError) and is just invalid
+        if not hmac.compare_digest(_sign(body), signature):
+            return None
+        data = json.loads(_b64decode(body))
+        claims = GradingClaims(
+            user_id=uuid.UUID(data["u"]),
+            question_id=uuid.UUID(data["q"]),
+            topic_id=uuid.UUID(data["t"]),
+            nonce=data["n"],
+            answer_digest=data["d"],
+            expires_at=int(data["x"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    if claims.user_id != user_id or claims.expires_at < (now or time.time()):
+        return None
+    return claims
+
+
+def consume_nonces(db: Session, user_id, claims_list: list[GradingClaims]) -> set[str]:
+    """Mark the tokens' nonces as used in the caller's transaction. Does not commit.
+
+    Returns the nonces that were not used before; the rest were already
+    reported (or are being reported by a concurrent request, which this one
+    waits for). The user's expired entries are purged on the way, since an
+    expired token no longer verifies anyway.
+    """
+    now = datetime.now(timezone.utc)
+    db.execute(
+        delete(ConsumedGradingNonce).where(
+            ConsumedGradingNonce.user_id == user_id, ConsumedGradingNonce.expires_at < now
+        )
+    )
+    if not claims_list:
+        return set()
+    rows = {
+        claims.nonce: {
+            "user_id": user_id,
+            "nonce": claims.nonce,
+            "expires_at": datetime.fromtimestamp(claims.expires_at, timezone.utc),
+        }
+        for claims in claims_list
+    }
+    return set(
+        db.scalars(
+            pg_insert(ConsumedGradingNonce)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing()
+            .returning(ConsumedGradingNonce.nonce)
+        )
+    )
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Idempotency keys for answer submission.
+Usage: python -m backend.services.idempotency purge
+
+A request carrying an ``Idempotency-Key`` stores its response in
+``idempotency_keys`` in the same transaction as its writes. Retries with the
+same key get the stored response back instead of writing again; concurrent
+duplicates block on the primary key until the first one commits.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.idempotency_key import IdempotencyKey
+
+KEY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used for a different request."""
+
+
+def request_hash(endpoint: str, payload: BaseModel) -> str:
+    return hashlib.sha256(f"{endpoint}\n{payload.model_dump_json()}".encode()).hexdigest()
+
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - KEY_TTL
+
+
+def stored_response(db: Session, user_id, key: str, fingerprint: str) -> dict | None:
+    """Return the response saved under ``key``, or None if it is unused or expired."""
+    row = db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at >= _cutoff(),
+        )
+    ).first()
+    if row is None:
+        return None
+    if row.request_hash != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different request")
+    return row.response
+
+
+def store_response(db: Session, user_id, key: str, fingerprint: str, response: dict) -> dict | None:
+    """Save ``response`` under ``key`` as part of the caller's transaction. Does not commit.
+
+    Returns None once stored. If a concurrent request committed the key first,
+    returns its response instead; the caller must roll back its own writes.
+    """
+    stmt = pg_insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        request_hash=fingerprint,
+        response=response,
+    )
+    # An expired entry is taken over rather than blocking the key forever
+    claimed = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "response": stmt.excluded.response,
+                "created_at": func.now(),
+            },
+            where=IdempotencyKey.created_at < _cutoff(),
+        ).returning(IdempotencyKey.key)
+    ).first()
+    if claimed is not None:
+        return None
+    return stored_response(db, user_id, key, fingerprint)
+
+
+def purge_expired_keys(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < _cutoff()))
+    db.commit()
+    return result.rowcount
+
+
+def main():
+    if sys.argv[1:] != ["purge"]:
+        print("Usage: python -m backend.services.idempotency purge")
+        sys.exit(1)
+    with SessionLocal() as db:
+        print(f"Deleted {purge_expired_keys(db)} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Materialize missing ``question_metrics`` rows from ``question_attempts``.
+Usage: python -m backend.services.metric_backfill
+
+Every attempt written through ``record_attempt``/``record_attempts_batch``
+(or projected from the outbox) upserts its metric row, so read paths never
+derive metrics from attempts. This job covers (user, question) pairs that
+have attempts but no row, e.g. history from before metrics existed. It is one
+INSERT ... SELECT; window functions replay ``next_metric_state`` in closed form:
+
+* accuracy: starting from 0.5, each answer is folded in with weight
+  ``EMA_ALPHA`` and decays by ``1 - EMA_ALPHA`` per later answer, so
+  ``acc = 0.5 * (1 - a)^n + sum(a * (1 - a)^later * correct)``.
+* interval: in steps of log2(interval / 6h) a correct answer is
+  ``max(2, L + 1)`` and a wrong one ``max(0, L - 1)``, starting at 2 (one
+  day). Composing ``max(floor, L + step)`` gives
+  ``L = max(2 + sum(steps), max_k(floor_k + steps after k))``.
+
+This is the default doubling rule; when the live scheduler is anything else
+(SCHEDULER_ALGORITHM / SCHEDULER_PARAMS) the new rows are then rescheduled
+with it by ``backend.services.scheduler.batch``. Attempts already archived to
+Parquet are not counted. It also runs at boot while ``question_metrics`` is
+empty.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+
+from sqlalchemy import Interval, case, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Engine
+
+from backend.models.attempt import QuestionAttempt
+from backend.models.question_metric import QuestionMetric
+from backend.services.attempts import EMA_ALPHA, SIX_HOURS
+from backend.services.scheduler import DoublingScheduler, live_scheduler
+from backend.services.scheduler.batch import reschedule_metrics
+
+logger = logging.getLogger(__name__)
+
+# log2 of the first interval (one day) in units of SIX_HOURS
+_START_LEVEL = 2
+
+
+def missing_metrics_select():
+    """One row of metric columns per (user, question) with attempts but no metric row."""
+    attempt = QuestionAttempt
+    pair = (attempt.user_id, attempt.question_id)
+    step = case((attempt.was_correct, 1), else_=-1)
+    has_metric = exists().where(
+        QuestionMetric.user_id == attempt.user_id,
+        QuestionMetric.question_id == attempt.question_id,
+    )
+    history = (
+        select(
+            attempt.user_id,
+            attempt.question_id,
+            attempt.was_correct,
+            attempt.answered_at,
+            # Answers after this one, i.e. how often its EMA weight decays
+            (
+                func.row_number().over(
+                    partition_by=pair, order_by=(attempt.answered_at.desc(), attempt.id.desc())
+                )
+                - 1
+            ).label("later"),
+            # Sum of the steps after this answer
+            (
+                func.sum(step).over(partition_by=pair)
+                - func.sum(step).over(partition_by=pair, order_by=(attempt.answered_at, attempt.id))
+            ).label("steps_after"),
+            func.sum(step).over(partition_by=pair).label("steps"),
+            case((attempt.was_correct, 2), else_=0).label("floor"),
+        )
+        .where(~has_metric)
+        .subquery("history")
+    )
+
+    decay = literal(1 - EMA_ALPHA)
+    accuracy = 0.5 * func.power(decay, func.count()) + func.sum(
+        case((history.c.was_correct, EMA_ALPHA * func.power(decay, history.c.later)), else_=0.0)
+    )
+    level = func.greatest(
+        _START_LEVEL + func.max(history.c.steps),
+        func.max(history.c.floor + history.c.steps_after),
+    )
+    last_seen_at = func.max(history.c.answered_at)
+    return select(
+        history.c.user_id,
+        history.c.question_id,
+        func.greatest(0.0, func.least(1.0, accuracy)).label("rolling_accuracy"),
+        func.count().label("attempts"),
+        last_seen_at.label("last_seen_at"),
+        (last_seen_at + literal(SIX_HOURS, Interval()) * func.power(2, level)).label("next_due_at"),
+    ).group_by(history.c.user_id, history.c.question_id)
+
+
+def backfill_missing_metrics(engine: Engine) -> int:
+    """Insert the missing metric rows. Rows written meanwhile by live attempts win."""
+    stmt = (
+        pg_insert(QuestionMetric)
+        .from_select(
+            ["user_id", "question_id", "rolling_accuracy", "attempts", "last_seen_at", "next_due_at"],
+            missing_metrics_select(),
+        )
+        .on_conflict_do_nothing(index_elements=[QuestionMetric.user_id, QuestionMetric.question_id])
+    )
+    with engine.begin() as conn:
+        return conn.execute(stmt).rowcount
+
+
+def _reschedule_for_live(engine: Engine) -> None:
+    scheduler = live_scheduler()
+    if scheduler != DoublingScheduler():
+        logger.info("[metric_backfill] Rescheduled %s question metrics with %s", reschedule_metrics(engine, scheduler), scheduler.name)
+
+
+def backfill_if_empty(engine: Engine) -> None:
+    try:
+        with engine.connect() as conn:
+            empty = conn.execute(select(exists().select_from(QuestionMetric))).scalar() is False
+            has_attempts = conn.execute(select(exists().select_from(QuestionAttempt))).scalar()
+        if empty and has_attempts:
+            logger.info("[metric_backfill] Materialized %s question metrics", backfill_missing_metrics(engine))
+            _reschedule_for_live(engine)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[metric_backfill] Could not backfill question metrics (%s)", exc)
+
+
+def main():
+    from backend.database import engine
+
+    if sys.argv[1:]:
+        print("Usage: python -m backend.services.metric_backfill")
+        sys.exit(1)
+    print(f"Materialized {backfill_missing_metrics(engine)} question metrics")
+    _reschedule_for_live(engine)
+
+
+if __name__ == "__main__":
+    main()
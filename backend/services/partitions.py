@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Monthly range partitions for ``question_attempts``.
+Usage: python -m backend.services.partitions [ensure|migrate [--keep-old]]
+
+``ensure`` creates any missing partitions from the current month up to
+ATTEMPT_PARTITION_MONTHS_AHEAD months ahead, plus a DEFAULT partition that
+catches stray old timestamps. The API runs it at boot and then twice a day.
+
+``migrate`` converts an existing unpartitioned ``question_attempts`` table in
+one transaction: the old table is renamed, the partitioned table is created
+from the model, rows are copied, and the old table is dropped (or kept with
+``--keep-old``). Writes to the table block while it runs.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from backend.models.attempt import QuestionAttempt
+
+logger = logging.getLogger(__name__)
+
+PARENT = QuestionAttempt.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+MONTHS_AHEAD = int(os.getenv("ATTEMPT_PARTITION_MONTHS_AHEAD", "3"))
+MAINTENANCE_INTERVAL_SECONDS = 12 * 60 * 60
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(
+        conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+            {"name": PARENT},
+        ).scalar()
+    )
+
+
+def existing_partitions(conn: Connection) -> set[str]:
+    return set(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:name)"
+            ),
+            {"name": PARENT},
+        ).scalars()
+    )
+
+
+def ensure_partitions(conn: Connection, first_month: date | None = None, months_ahead: int = MONTHS_AHEAD) -> list[str]:
+    """Create missing monthly partitions from ``first_month`` (default: this month). Returns names created."""
+    # Serialise workers so two never try to create the same partition
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": f"{PARENT}_partitions"})
+    existing = existing_partitions(conn)
+    this_month = month_start(datetime.now(timezone.utc).date())
+    month = month_start(first_month) if first_month else this_month
+    last = add_months(this_month, months_ahead)
+
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            # Bounds are UTC instants so partitions match UTC calendar months
+            conn.execute(
+                text(
+                    f'CREATE TABLE "{name}" PARTITION OF "{PARENT}" '
+                    f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                    f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+                )
+            )
+            created.append(name)
+        month = add_months(month, 1)
+
+    if DEFAULT_PARTITION not in existing:
+        conn.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{PARENT}" DEFAULT'))
+        created.append(DEFAULT_PARTITION)
+    return created
+
+
+def maintain_partitions(engine: Engine) -> None:
+    try:
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                logger.warning(
+                    "[partitions] %s is not partitioned; run `python -m backend.services.partitions migrate`",
+                    PARENT,
+                )
+                return
+            created = ensure_partitions(conn)
+        if created:
+            logger.info("[partitions] Created %s", ", ".join(created))
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[partitions] Could not create attempt partitions (%s)", exc)
+
+
+def start_partition_maintenance(engine: Engine) -> threading.Event:
+    """Keep future partitions created from a daemon thread of the API process."""
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(MAINTENANCE_INTERVAL_SECONDS):
+            maintain_partitions(engine)
+
+    threading.Thread(target=run, name="attempt-partitions", daemon=True).start()
+    return stop
+
+
+def migrate_to_partitioned(engine: Engine, keep_old: bool = False) -> int:
+    """Convert an unpartitioned ``question_attempts`` table. Returns rows copied."""
+    old = f"{PARENT}_unpartitioned"
+    columns = ", ".join(column.name for column in QuestionAttempt.__table__.columns)
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            return 0
+        conn.execute(text(f'LOCK TABLE "{PARENT}" IN ACCESS EXCLUSIVE MODE'))
+        conn.execute(text(f'ALTER TABLE "{PARENT}" RENAME TO "{old}"'))
+        conn.execute(text(f'ALTER INDEX IF EXISTS "{PARENT}_pkey" RENAME TO "{old}_pkey"'))
+        QuestionAttempt.__table__.create(conn)
+
+        first = conn.execute(text(f'SELECT min(answered_at) FROM "{old}"')).scalar()
+        ensure_partitions(conn, first_month=first.astimezone(timezone.utc).date() if first else None)
+        copied = conn.execute(text(f'INSERT INTO "{PARENT}" ({columns}) SELECT {columns} FROM "{old}"')).rowcount
+        if not keep_old:
+            conn.execute(text(f'DROP TABLE "{old}"'))
+    logger.info("[partitions] Copied %s rows into partitioned %s", copied, PARENT)
+    return copied
+
+
+def main():
+    from backend.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "ensure":
+        maintain_partitions(engine)
+    elif command == "migrate":
+        print(f"Copied {migrate_to_partitioned(engine, keep_old='--keep-old' in sys.argv)} rows")
+    else:
+        print("Usage: python -m backend.services.partitions [ensure|migrate [--keep-old]]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import case, cast, func, literal
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
 
 from backend.models.progress import ProgressStage, TopicProgress
 
@@ -15,29 +16,50 @@ def stage_from_percent(percent: int) -> ProgressStage:
     return ProgressStage.unseen
 
 
-def ensure_topic_progress(db: Session, user_id, topic_id) -> TopicProgress:
-    progress = (
-        db.query(TopicProgress)
-        .filter(
-            TopicProgress.user_id == user_id,
-            TopicProgress.topic_id == topic_id,
-        )
-        .first()
+def progress_delta(correct: bool) -> int:
+    return 20 if correct else -10
+
+
+def next_percent(percent: int, correct: bool) -> int:
+    return min(100, max(0, percent + progress_delta(correct)))
+
+
+def _stage_literal(stage: ProgressStage):
+    return cast(literal(stage.value), TopicProgress.__table__.c.stage.type)
+
+
+def upsert_topic_progress(user_id, topic_id, correct: bool, now: datetime | None = None) -> Insert:
+    """Build an atomic INSERT ... ON CONFLICT that applies one answer to a topic.
+
+    The new percentage and stage are computed from the stored row inside the
+    statement, so concurrent answers cannot race on a read-modify-write.
+    """
+    now = now or datetime.utcnow()
+    first_percent = next_percent(0, correct)
+
+    stmt = pg_insert(TopicProgress).values(
+        user_id=user_id,
+        topic_id=topic_id,
+        percent_complete=first_percent,
+        stage=stage_from_percent(first_percent),
+        last_seen_at=now,
+        last_practised_at=now,
+    )
+
+    percent = func.least(100, func.greatest(0, TopicProgress.percent_complete + progress_delta(correct)))
+    stage = case(
+        (percent >= 100, _stage_literal(ProgressStage.mastered)),
+        (percent > 0, _stage_literal(ProgressStage.in_progress)),
+        else_=_stage_literal(ProgressStage.unseen),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[TopicProgress.user_id, TopicProgress.topic_id],
+        set_={
+            "percent_complete": percent,
+            "stage": stage,
+            # An answer reported late must not move these back
+            "last_seen_at": func.greatest(TopicProgress.last_seen_at, stmt.excluded.last_seen_at),
+            "last_practised_at": func.greatest(TopicProgress.last_practised_at, stmt.excluded.last_practised_at),
+            "updated_at": func.now(),
+        },
     )
-    if progress is None:
-        progress = TopicProgress(user_id=user_id, topic_id=topic_id)
-        db.add(progress)
-        db.flush()  # assign defaults without committing
-    return progress
-
-
-def apply_attempt(progress: TopicProgress, correct: bool, seconds: int | None) -> TopicProgress:
-    delta = 20 if correct else -10
-    new_percent = min(100, max(0, progress.percent_complete + delta))
-    progress.percent_complete = new_percent
-    progress.stage = stage_from_percent(new_percent)
-
-    now = datetime.utcnow()
-    progress.last_seen_at = now
-    progress.last_practised_at = now
-    return progress
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Projector for the ``attempt_events`` outbox.
+Usage: python -m backend.services.projections [run|once|rebuild <name>]
+
+Each projection keeps its own checkpoint in ``projection_checkpoints`` and
+consumes events in ``(tx_id, seq)`` order in batches, only from transactions
+below the snapshot horizon. A batch and its checkpoint
+advance commit in the same transaction, so events are applied exactly once
+even with several workers (checkpoint rows are claimed with SKIP LOCKED).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from sqlalchemy import delete, exists, func, insert, literal, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.attempt import QuestionAttempt
+from backend.models.attempt_event import AttemptEvent, ProjectionCheckpoint
+from backend.models.daily_activity import UserDailyActivity
+from backend.models.progress import TopicProgress
+from backend.models.question import Question
+from backend.models.question_metric import QuestionMetric
+from backend.models.streak import DailyStreak
+from backend.models.user import User
+from backend.services.archive import archive_horizon
+from backend.services.attempts import BatchAnswer, apply_attempts_batch
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("PROJECTOR_BATCH_SIZE", "1000"))
+POLL_SECONDS = float(os.getenv("PROJECTOR_POLL_SECONDS", "1"))
+
+# Transactions below the oldest in-flight one have all finished, so nothing can
+# commit later with a lower tx_id. (A seq checkpoint is not enough: seqs are
+# taken mid-transaction, so a later commit can still hold a lower seq.)
+_VISIBLE_TX_HORIZON = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+# Checkpoint from before (tx_id, seq) ordering; finished in seq order, then converted
+LEGACY_TX_ID = -1
+
+
+class Projection(ABC):
+    """Derived state maintained from attempt events."""
+
+    name: str = ""
+
+    @abstractmethod
+    def apply(self, db: Session, events: list[AttemptEvent]) -> None: ...
+
+    @abstractmethod
+    def reset(self, db: Session) -> None:
+        """Delete this projection's derived rows ahead of a rebuild."""
+
+
+class AttemptStateProjection(Projection):
+    """Maintains question_attempts, topic_progress, question_metrics, daily_streaks and user_daily_activity."""
+
+    name = "attempt_state"
+
+    def apply(self, db: Session, events: list[AttemptEvent]) -> None:
+        # Users or questions deleted after the event was written are skipped
+        user_ids = {event.user_id for event in events}
+        question_ids = {event.question_id for event in events}
+        live_users = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+        live_questions = set(db.scalars(select(Question.id).where(Question.id.in_(question_ids))))
+
+        by_user: dict = defaultdict(list)
+        for event in events:
+            if event.user_id in live_users and event.question_id in live_questions:
+                by_user[event.user_id].append(
+                    BatchAnswer(
+                        question_id=event.question_id,
+                        topic_id=event.topic_id,
+                        is_correct=event.was_correct,
+                        seconds=event.seconds,
+                        answered_at=event.answered_at,
+                    )
+                )
+        for user_id, answers in by_user.items():
+            apply_attempts_batch(db, user_id, answers)
+
+    def reset(self, db: Session) -> None:
+        """Seed the outbox with attempts it does not hold, then delete the derived rows.
+
+        Attempts written inline (before ``ATTEMPT_WRITE_MODE=outbox``) have no
+        event, so they are appended first with ``tx_id`` 0 in answer order:
+        the replay applies them before any real event. Archived attempts cannot
+        be replayed, so the rebuild is refused once an archive exists.
+        """
+        if archive_horizon() is not None:
+            raise RuntimeError(
+                "question_attempts has been archived to Parquet; replaying the outbox would drop that history"
+            )
+        attempt = QuestionAttempt
+        has_event = exists().where(
+            AttemptEvent.user_id == attempt.user_id,
+            AttemptEvent.question_id == attempt.question_id,
+            AttemptEvent.answered_at == attempt.answered_at,
+        )
+        unrecorded = (
+            select(
+                literal(0),
+                attempt.user_id,
+                attempt.question_id,
+                Question.topic_id,
+                attempt.was_correct,
+                attempt.seconds,
+                attempt.answered_at,
+            )
+            .join(Question, Question.id == attempt.question_id)
+            .where(~has_event)
+            .order_by(attempt.answered_at, attempt.id)
+        )
+        db.execute(
+            insert(AttemptEvent).from_select(
+                ["tx_id", "user_id", "question_id", "topic_id", "was_correct", "seconds", "answered_at"],
+                unrecorded,
+            )
+        )
+
+        users = select(AttemptEvent.user_id).distinct()
+        for model in (QuestionAttempt, TopicProgress, QuestionMetric, DailyStreak, UserDailyActivity):
+            db.execute(delete(model).where(model.user_id.in_(users)))
+
+
+PROJECTIONS: dict[str, Projection] = {
+    projection.name: projection for projection in (AttemptStateProjection(),)
+}
+
+
+def _claim_checkpoint(db: Session, name: str) -> ProjectionCheckpoint | None:
+    db.execute(
+        pg_insert(ProjectionCheckpoint).values(name=name, last_tx_id=0, last_seq=0).on_conflict_do_nothing()
+    )
+    return db.scalars(
+        select(ProjectionCheckpoint)
+        .where(ProjectionCheckpoint.name == name)
+        .with_for_update(skip_locked=True)
+    ).first()
+
+
+def project_once(db: Session, projection: Projection, batch_size: int = BATCH_SIZE) -> int:
+    """Apply the next batch of events to one projection. Returns events applied."""
+    checkpoint = _claim_checkpoint(db, projection.name)
+    if checkpoint is None:  # another worker holds this projection
+        db.rollback()
+        return 0
+
+    legacy = checkpoint.last_tx_id == LEGACY_TX_ID
+    if legacy:
+        after, order = AttemptEvent.seq > checkpoint.last_seq, (AttemptEvent.seq,)
+    else:
+        after = tuple_(AttemptEvent.tx_id, AttemptEvent.seq) > tuple_(checkpoint.last_tx_id, checkpoint.last_seq)
+        order = (AttemptEvent.tx_id, AttemptEvent.seq)
+    events = list(
+        db.scalars(
+            select(AttemptEvent)
+            .where(after, AttemptEvent.tx_id < _VISIBLE_TX_HORIZON)
+            .order_by(*order)
+            .limit(batch_size)
+        )
+    )
+    if not events:
+        if legacy:
+            # Caught up in seq order: everything still unapplied is from a newer transaction
+            checkpoint.last_tx_id = db.scalar(
+                select(func.coalesce(func.max(AttemptEvent.tx_id), 0)).where(AttemptEvent.seq <= checkpoint.last_seq)
+            )
+            db.commit()
+        else:
+            db.rollback()
+        return 0
+
+    projection.apply(db, events)
+    if not legacy:
+        checkpoint.last_tx_id = events[-1].tx_id
+    checkpoint.last_seq = events[-1].seq
+    db.commit()
+    return len(events)
+
+
+def drain(batch_size: int = BATCH_SIZE) -> int:
+    """Run every projection until it has caught up. Returns events applied."""
+    total = 0
+    with SessionLocal() as db:
+        for projection in PROJECTIONS.values():
+            while True:
+                applied = project_once(db, projection, batch_size)
+                total += applied
+                if applied < batch_size:
+                    break
+    return total
+
+
+def rebuild(name: str) -> None:
+    """Reset a projection so the next run replays the whole outbox into it.
+
+    Raises ``RuntimeError`` when the projection cannot be rebuilt safely.
+
+    With a shared activity memo (``ACTIVITY_MEMO_REDIS_URL``), clear its
+    ``unimind:activity:*`` keys too, or the replay skips today's streak update.
+    """
+    projection = PROJECTIONS[name]
+    with SessionLocal() as db:
+        projection.reset(db)
+        db.execute(
+            pg_insert(ProjectionCheckpoint)
+            .values(name=name, last_tx_id=0, last_seq=0)
+            .on_conflict_do_update(index_elements=[ProjectionCheckpoint.name], set_={"last_tx_id": 0, "last_seq": 0})
+        )
+        db.commit()
+
+
+def run_forever(stop: threading.Event | None = None) -> None:
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            applied = drain()
+        except Exception as exc:  # pragma: no cover - defensive guard
+            logger.warning("[projector] Batch failed (%s)", exc)
+            applied = 0
+        if not applied:
+            stop.wait(POLL_SECONDS)
+
+
+def start_background_projector() -> threading.Event:
+    """Run the projector in a daemon thread of the API process."""
+    stop = threading.Event()
+    threading.Thread(target=run_forever, args=(stop,), name="attempt-projector", daemon=True).start()
+    return stop
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command == "run":
+        run_forever()
+    elif command == "once":
+        print(f"Applied {drain()} events")
+    elif command == "rebuild" and len(sys.argv) > 2 and sys.argv[2] in PROJECTIONS:
+        try:
+            rebuild(sys.argv[2])
+        except RuntimeError as exc:
+            print(f"Cannot rebuild {sys.argv[2]}: {exc}")
+            sys.exit(1)
+        print(f"Reset projection {sys.argv[2]}; run the projector to replay the outbox")
+    else:
+        print("Usage: python -m backend.services.projections [run|once|rebuild <name>]")
+        print(f"Projections: {', '.join(PROJECTIONS)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.models.question import Question
+from backend.models.topic import Topic
+
+ALL_COURSES = "*"
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Pools are rebuilt after this many seconds even without an invalidation, which
+# bounds staleness when questions are seeded from a different process.
+POOL_TTL_SECONDS = float(os.getenv("GATE_POOL_TTL_SECONDS", "300"))
+
+
+@dataclass
+class QuestionPool:
+    """Question ids for one course, bucketed by difficulty for O(1) sampling."""
+
+    buckets: dict[str, list] = field(default_factory=dict)
+    built_at: float = field(default_factory=time.monotonic)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.buckets.values())
+
+    def is_stale(self, now: float | None = None) -> bool:
+        return ((now or time.monotonic()) - self.built_at) > POOL_TTL_SECONDS
+
+    def sample(self, weights: dict[str, float] | None = None, rng: random.Random | None = None):
+        """Pick a question id, optionally weighting by difficulty.
+
+        Without ``weights`` every question is equally likely. With weights, a
+        difficulty bucket is chosen in proportion to ``weight * bucket size`` and
+        a question is then drawn uniformly from it, so both steps are O(1).
+        """
+        rng = rng or random
+        names = [name for name, ids in self.buckets.items() if ids]
+        if not names:
+            return None
+
+        bucket_weights = [
+            (1.0 if weights is None else max(0.0, weights.get(name, 0.0))) * len(self.buckets[name])
+            for name in names
+        ]
+        if sum(bucket_weights) <= 0:
+            bucket_weights = [float(len(self.buckets[name])) for name in names]
+
+        name = rng.choices(names, weights=bucket_weights, k=1)[0]
+        ids = self.buckets[name]
+        return ids[rng.randrange(len(ids))]
+
+    def sample_many(self, count: int, weights: dict[str, float] | None = None, rng: random.Random | None = None) -> list:
+        """Pick up to ``count`` distinct question ids (fewer only if the pool runs out).
+
+        Like repeated ``sample`` calls without replacement: each pick chooses a
+        bucket in proportion to ``weight * questions left in it``, then the
+        picks per bucket are drawn with ``random.sample``.
+        """
+        rng = rng or random
+        left = {name: len(ids) for name, ids in self.buckets.items() if ids}
+        picks = dict.fromkeys(left, 0)
+        for _ in range(min(count, len(self))):
+            names = [name for name, size in left.items() if size]
+            bucket_weights = [
+                (1.0 if weights is None else max(0.0, weights.get(name, 0.0))) * left[name] for name in names
+            ]
+            if sum(bucket_weights) <= 0:
+                bucket_weights = [float(left[name]) for name in names]
+            name = rng.choices(names, weights=bucket_weights, k=1)[0]
+            left[name] -= 1
+            picks[name] += 1
+
+        chosen = []
+        for name, picked in picks.items():
+            chosen.extend(rng.sample(self.buckets[name], picked))
+        rng.shuffle(chosen)
+        return chosen
+
+
+_pools: dict[str, QuestionPool] = {}
+_lock = threading.Lock()
+
+
+def _pool_key(course_code: str | None) -> str:
+    return course_code.upper() if course_code else ALL_COURSES
+
+
+def build_question_pool(db: Session, course_code: str | None = None) -> QuestionPool:
+    query = db.query(Question.id, Question.difficulty)
+    if course_code:
+        query = query.join(Topic, Topic.id == Question.topic_id).filter(Topic.course_code == course_code.upper())
+
+    buckets: dict[str, list] = {name: [] for name in DIFFICULTIES}
+    for question_id, difficulty in query.all():
+        buckets.setdefault(difficulty or "medium", []).append(question_id)
+    return QuestionPool(buckets=buckets)
+
+
+def get_question_pool(db: Session, course_code: str | None = None) -> QuestionPool:
+    """Return the cached pool for a course (or all courses), building it if needed."""
+    key = _pool_key(course_code)
+    pool = _pools.get(key)
+    if pool is not None and not pool.is_stale():
+        return pool
+
+    pool = build_question_pool(db, course_code)
+    with _lock:
+        _pools[key] = pool
+    return pool
+
+
+def invalidate_question_pools(course_code: str | None = None) -> None:
+    """Drop cached pools. Without a course code every pool is dropped."""
+    with _lock:
+        if course_code is None:
+            _pools.clear()
+            return
+        _pools.pop(_pool_key(course_code), None)
+        _pools.pop(ALL_COURSES, None)
+
+
+def parse_difficulty_weights(raw: str | None) -> dict[str, float] | None:
+    """Parse ``"easy=1,medium=2,hard=1"`` into a weight mapping."""
+    if not raw:
+        return None
+    weights: dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name not in DIFFICULTIES:
+            continue
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            continue
+    return weights or None
+
+
+@event.listens_for(Session, "after_flush")
+def _track_question_changes(session: Session, _flush_context) -> None:
+    if any(isinstance(obj, Question) for obj in (*session.new, *session.deleted)):
+        session.info["question_pools_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("question_pools_dirty", False):
+        invalidate_question_pools()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session: Session) -> None:
+    session.info.pop("question_pools_dirty", None)
@@ -0,0 +1,187 @@
+"""Server-side port of ``UniMind/src/lib/question-selector.ts``.
+
+Scores a user's whole deck in one vectorised pass instead of shipping every
+question to the client just to pick the next one.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.orm import Session
+
+from backend.models.enrolment import Enrolment
+from backend.models.question import Question
+from backend.models.question_metric import QuestionMetric
+from backend.models.topic import Topic
+
+DAY_SECONDS = 24 * 60 * 60
+NEARLY_DUE_SECONDS = DAY_SECONDS
+W_DUE = 3.0
+W_WEAKNESS = 1.5
+W_RECENCY = 1.0
+W_COVERAGE = 1.0
+EPS_NOISE = 0.1
+# Due-queue rows scored per requested item; the rest of the deck is never read
+DUE_CANDIDATE_FACTOR = 4
+
+
+@dataclass
+class QuestionDeck:
+    """Column-oriented view of a user's questions and their metrics.
+
+    Timestamps are epoch seconds with NaN where the user has no metric yet.
+    """
+
+    question_ids: list[uuid.UUID]
+    topic_index: np.ndarray
+    last_seen_at: np.ndarray
+    next_due_at: np.ndarray
+    rolling_accuracy: np.ndarray
+    attempts: np.ndarray
+    difficulty: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+
+def _epoch(value) -> float:
+    return value.timestamp() if value is not None else np.nan
+
+
+def load_deck(db: Session, user_id, course_code: str | None = None) -> QuestionDeck:
+    """Load the lightweight scheduling columns for every enrolled question."""
+    query = (
+        db.query(
+            Question.id,
+            Question.topic_id,
+            QuestionMetric.last_seen_at,
+            QuestionMetric.next_due_at,
+            QuestionMetric.rolling_accuracy,
+            QuestionMetric.attempts,
+            Question.difficulty,
+        )
+        .join(Topic, Question.topic_id == Topic.id)
+        .join(Enrolment, Enrolment.course_code == Topic.course_code)
+        .outerjoin(
+            QuestionMetric,
+            (QuestionMetric.user_id == user_id) & (QuestionMetric.question_id == Question.id),
+        )
+        .filter(Enrolment.user_id == user_id)
+    )
+    if course_code:
+        query = query.filter(Topic.course_code == course_code.upper())
+    rows = query.all()
+
+    topic_slots: dict = {}
+    return QuestionDeck(
+        question_ids=[row[0] for row in rows],
+        topic_index=np.array([topic_slots.setdefault(row[1], len(topic_slots)) for row in rows], dtype=np.int64),
+        last_seen_at=np.array([_epoch(row[2]) for row in rows], dtype=np.float64),
+        next_due_at=np.array([_epoch(row[3]) for row in rows], dtype=np.float64),
+        rolling_accuracy=np.array([0.5 if row[4] is None else row[4] for row in rows], dtype=np.float64),
+        attempts=np.array([row[5] or 0 for row in rows], dtype=np.float64),
+        difficulty=np.array([row[6] for row in rows], dtype=object),
+    )
+
+
+def score_deck(
+    deck: QuestionDeck,
+    now: float | None = None,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(tier, score)`` arrays for every question in the deck.
+
+    ``tier`` is 2 for due, 1 for nearly due and 0 otherwise; the client-side
+    selector only falls through to a lower tier once the higher one is empty.
+    """
+    now = time.time() if now is None else now
+    rng = rng or np.random.default_rng()
+
+    due_at = np.nan_to_num(deck.next_due_at, nan=0.0)
+    is_due = now >= due_at
+    nearly_due = (due_at - now) <= NEARLY_DUE_SECONDS
+    tier = np.where(is_due, 2, np.where(nearly_due, 1, 0))
+
+    days_since = (now - np.nan_to_num(deck.last_seen_at, nan=0.0)) / DAY_SECONDS
+    recency = np.where(days_since > 0, np.minimum(1.0, days_since / 7), 0.0)
+
+    weakness = 1.0 - np.clip(deck.rolling_accuracy, 0.0, 1.0)
+
+    attempts = np.maximum(deck.attempts, 0.0)
+    topic_attempts = np.bincount(deck.topic_index, weights=attempts)
+    total_attempts = attempts.sum()
+    observed_share = topic_attempts / total_attempts if total_attempts > 0 else np.zeros_like(topic_attempts)
+    target_share = 1.0 / len(topic_attempts) if len(topic_attempts) else 0.0
+    coverage = np.maximum(0.0, target_share - observed_share)[deck.topic_index]
+
+    score = (
+        W_DUE * is_due
+        + W_WEAKNESS * weakness
+        + W_RECENCY * recency
+        + W_COVERAGE * coverage
+        + EPS_NOISE * rng.random(len(deck))
+    )
+    return tier, score
+
+
+def choose_next_questions(
+    deck: QuestionDeck,
+    count: int = 1,
+    now: float | None = None,
+    exclude_ids: set | None = None,
+    rng: np.random.Generator | None = None,
+) -> list[uuid.UUID]:
+    """Pick up to ``count`` question ids, best first."""
+    if len(deck) == 0 or count <= 0:
+        return []
+
+    tier, score = score_deck(deck, now, rng)
+    if exclude_ids:
+        keep = np.array([qid not in exclude_ids for qid in deck.question_ids], dtype=bool)
+        tier = np.where(keep, tier, -1)
+
+    # lexsort sorts by the last key first: tier, then score, both descending
+    order = np.lexsort((-score, -tier))
+    return [deck.question_ids[i] for i in order[:count] if tier[i] >= 0]
+
+
+def due_candidates(user_id, now: datetime, limit: int, course_code: str | None = None):
+    """Subquery of the user's most overdue questions with ``tier`` and ``score`` computed in SQL.
+
+    Reads at most ``limit * DUE_CANDIDATE_FACTOR`` rows from the
+    ``(user_id, next_due_at)`` index instead of the whole deck. Scores use the
+    due, weakness and recency terms of ``score_deck``; coverage needs the
+    whole deck and noise would make pages unstable, so both are left out.
+    Only answered questions have a due date, so unseen ones never appear.
+    """
+    next_due_at = QuestionMetric.next_due_at
+    is_due = next_due_at <= now
+    days_since = func.extract("epoch", literal(now) - QuestionMetric.last_seen_at) / DAY_SECONDS
+    weakness = 1.0 - func.greatest(0.0, func.least(1.0, func.coalesce(QuestionMetric.rolling_accuracy, 0.5)))
+    recency = case((days_since > 0, func.least(1.0, days_since / 7)), else_=0.0)
+    score = case((is_due, W_DUE), else_=0.0) + W_WEAKNESS * weakness + W_RECENCY * recency
+
+    query = (
+        select(
+            QuestionMetric.question_id,
+            case((is_due, 2), else_=1).label("tier"),
+            score.label("score"),
+        )
+        .join(Question, Question.id == QuestionMetric.question_id)
+        .join(Topic, Question.topic_id == Topic.id)
+        .join(Enrolment, (Enrolment.course_code == Topic.course_code) & (Enrolment.user_id == user_id))
+        .where(
+            QuestionMetric.user_id == user_id,
+            next_due_at <= now + timedelta(seconds=NEARLY_DUE_SECONDS),
+        )
+        .order_by(next_due_at)
+        .limit(limit * DUE_CANDIDATE_FACTOR)
+    )
+    if course_code:
+        query = query.where(Topic.course_code == course_code.upper())
+    return query.subquery("due")
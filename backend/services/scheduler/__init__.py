@@ -0,0 +1,68 @@
+"""Interchangeable spaced-repetition algorithms with a vectorised batch API.
+
+Every scheduler implements ``Scheduler``: ``review`` applies one answer to
+arrays of per-pair state, so ``replay`` recomputes the schedule of many
+(user, question) pairs at once from their answer history, and ``step``
+applies a single answer. ``live_scheduler`` (SCHEDULER_ALGORITHM, tuned by
+SCHEDULER_PARAMS, e.g. ``desired_retention=0.85,maximum_days=365``)
+schedules new answers in ``record_attempt``; see
+``backend.services.scheduler.batch`` for rescheduling ``question_metrics``.
+"""
+from __future__ import annotations
+
+import os
+from functools import cache
+
+from .base import AnswerHistory, Scheduler, replay
+from .doubling import DoublingScheduler
+from .fsrs import FSRSScheduler
+from .sm2 import SM2Scheduler
+
+SCHEDULERS: dict[str, type[Scheduler]] = {
+    "doubling": DoublingScheduler,
+    "sm2": SM2Scheduler,
+    "fsrs": FSRSScheduler,
+}
+
+
+SCHEDULER_ALGORITHM = os.getenv("SCHEDULER_ALGORITHM", "doubling")
+SCHEDULER_PARAMS = os.getenv("SCHEDULER_PARAMS", "")
+
+
+def get_scheduler(name: str, **params) -> Scheduler:
+    """Build a scheduler by name; ``params`` override its tuning parameters."""
+    scheduler = SCHEDULERS.get(name.lower())
+    if scheduler is None:
+        raise ValueError(f"Unknown scheduler {name!r}. Choose from: {', '.join(SCHEDULERS)}")
+    return scheduler(**params)
+
+
+def parse_params(items: list[str]) -> dict[str, float]:
+    """``["name=value", ...]`` tuning overrides; blank items are skipped."""
+    params = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if name.strip():
+            params[name.strip()] = float(value)
+    return params
+
+
+@cache
+def live_scheduler() -> Scheduler:
+    """The scheduler applied to every new answer."""
+    return get_scheduler(SCHEDULER_ALGORITHM, **parse_params(SCHEDULER_PARAMS.split(",")))
+
+
+__all__ = [
+    "AnswerHistory",
+    "DoublingScheduler",
+    "FSRSScheduler",
+    "SCHEDULERS",
+    "SCHEDULER_ALGORITHM",
+    "SM2Scheduler",
+    "Scheduler",
+    "get_scheduler",
+    "live_scheduler",
+    "parse_params",
+    "replay",
+]
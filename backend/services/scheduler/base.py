@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+
+DAY_SECONDS = 24 * 60 * 60
+# Keeps due dates representable; the doubling rule has no ceiling of its own
+MAX_INTERVAL_DAYS = 36500
+
+State = dict[str, np.ndarray]
+
+
+@dataclass
+class AnswerHistory:
+    """Answers of many (user, question) pairs in flat arrays.
+
+    Each pair's answers are contiguous and in time order; ``starts`` and
+    ``lengths`` locate them. ``elapsed_days`` is the time since the pair's
+    previous answer (0 for its first).
+    """
+
+    correct: np.ndarray
+    elapsed_days: np.ndarray
+    starts: np.ndarray
+    lengths: np.ndarray
+
+    @classmethod
+    def from_sorted(cls, pair_codes: np.ndarray, answered_at: np.ndarray, correct: np.ndarray) -> "AnswerHistory":
+        """Build from rows sorted by pair, then time. ``answered_at`` is in epoch seconds."""
+        size = len(pair_codes)
+        first = np.ones(size, dtype=bool)
+        first[1:] = pair_codes[1:] != pair_codes[:-1]
+        starts = np.flatnonzero(first)
+        elapsed = np.zeros(size, dtype=np.float64)
+        elapsed[1:] = np.diff(np.asarray(answered_at, dtype=np.float64)) / DAY_SECONDS
+        elapsed[first] = 0.0
+        return cls(
+            correct=np.asarray(correct, dtype=bool),
+            elapsed_days=np.maximum(elapsed, 0.0),
+            starts=starts,
+            lengths=np.diff(np.append(starts, size)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class Scheduler(ABC):
+    """A spaced-repetition algorithm over arrays of per-pair state.
+
+    ``review`` applies one answer to every row of ``state`` at once;
+    ``interval_days`` turns state into the time until the next review.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def initial_state(self, size: int) -> State: ...
+
+    @abstractmethod
+    def review(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State: ...
+
+    @abstractmethod
+    def interval_days(self, state: State) -> np.ndarray: ...
+
+    def reschedule(self, history: AnswerHistory) -> np.ndarray:
+        """Days from each pair's last answer to its next review."""
+        return self.interval_days(replay(self, history))
+
+    def step(self, state: dict[str, float] | None, correct: bool, elapsed_days: float) -> tuple[dict[str, float], float]:
+        """Apply one answer to a single pair: ``(new state, days until the next review)``.
+
+        ``state`` None starts a new pair. This is ``review`` on one row, so the
+        live write path and the batch job agree exactly.
+        """
+        if state is None:
+            arrays = self.initial_state(1)
+        else:
+            arrays = {name: np.array([value], dtype=np.float64) for name, value in state.items()}
+        arrays = self.review(arrays, np.array([correct]), np.array([max(elapsed_days, 0.0)]))
+        interval = min(float(self.interval_days(arrays)[0]), MAX_INTERVAL_DAYS)
+        return {name: float(values[0]) for name, values in arrays.items()}, interval
+
+    def load_state(self, stored: dict | None, interval_days: float | None) -> dict[str, float] | None:
+        """A pair's state from ``question_metrics``, or None if it must be replayed.
+
+        ``stored`` is the ``scheduler_state`` column and ``interval_days`` the
+        current ``next_due_at - last_seen_at``. State written by another
+        algorithm is ignored.
+        """
+        if stored and stored.get("scheduler") == self.name:
+            return {name: float(value) for name, value in stored.items() if name != "scheduler"}
+        return None
+
+    def dump_state(self, state: dict[str, float] | None) -> dict | None:
+        """The ``scheduler_state`` column value for ``state`` (None if unknown)."""
+        return None if state is None else {"scheduler": self.name, **state}
+
+
+def replay(scheduler: Scheduler, history: AnswerHistory) -> State:
+    """Final state of every pair after all its answers, in pair order.
+
+    Steps over answer positions rather than rows: pairs are sorted by answer
+    count so the ones still active at position ``k`` are a prefix, and each
+    step is one vectorised ``review`` over that prefix.
+    """
+    order = np.argsort(-history.lengths, kind="stable")
+    starts, lengths = history.starts[order], history.lengths[order]
+    state = scheduler.initial_state(len(starts))
+    descending = -lengths
+    for step in range(int(lengths.max()) if len(lengths) else 0):
+        active = int(np.searchsorted(descending, -step, side="left"))
+        rows = starts[:active] + step
+        current = {name: values[:active] for name, values in state.items()}
+        for name, values in scheduler.review(current, history.correct[rows], history.elapsed_days[rows]).items():
+            state[name][:active] = values
+
+    restore = np.empty_like(order)
+    restore[order] = np.arange(len(order))
+    return {name: values[restore] for name, values in state.items()}
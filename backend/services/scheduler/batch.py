@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Recompute ``question_metrics`` schedules with a scheduling algorithm.
+Usage: python -m backend.services.scheduler.batch [--algorithm fsrs] [--set desired_retention=0.85]
+       [--user <uuid> ...] [--course COMP2521] [--dry-run]
+
+Replays each (user, question) pair's answers from ``question_attempts``
+through the scheduler in one vectorised pass per batch of users and writes
+``last answer + interval`` with the pair's ``scheduler_state``. Only rows
+whose due date or state changes are updated. Attempts archived to Parquet
+are read back and replayed with the live ones.
+
+Defaults to the live scheduler (SCHEDULER_ALGORITHM / SCHEDULER_PARAMS);
+run it after changing either so every pair carries state ``record_attempt``
+can continue from. Rows written with another algorithm are replayed by the
+live path on their next answer, from live attempts only.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection, Engine
+
+from backend.models.attempt import QuestionAttempt
+from backend.models.question import Question
+from backend.models.question_metric import QuestionMetric
+from backend.models.topic import Topic
+from backend.services.archive import archive_horizon, archived_attempts
+from backend.services.scheduler import (
+    SCHEDULER_ALGORITHM,
+    SCHEDULER_PARAMS,
+    SCHEDULERS,
+    AnswerHistory,
+    Scheduler,
+    get_scheduler,
+    live_scheduler,
+    parse_params,
+    replay,
+)
+from backend.services.scheduler.base import DAY_SECONDS, MAX_INTERVAL_DAYS
+
+logger = logging.getLogger(__name__)
+
+USERS_PER_BATCH = 500
+
+
+def load_history(conn: Connection, user_ids: list, course_code: str | None = None):
+    """``(pairs, last_answered_at, history)`` for the users' attempts; ``pairs`` lists (user_id, question_id).
+
+    Archived attempts are merged with the live ones, so a pair whose early
+    answers were moved to Parquet still replays from its first answer.
+    """
+    query = select(
+        QuestionAttempt.user_id,
+        QuestionAttempt.question_id,
+        QuestionAttempt.answered_at,
+        QuestionAttempt.id,
+        QuestionAttempt.was_correct,
+    ).where(QuestionAttempt.user_id.in_(user_ids))
+    course_query = None
+    if course_code:
+        course_query = (
+            select(Question.id)
+            .join(Topic, Question.topic_id == Topic.id)
+            .where(Topic.course_code == course_code.upper())
+        )
+        query = query.where(QuestionAttempt.question_id.in_(course_query))
+    rows = {row.id: tuple(row) for row in conn.execute(query)}
+
+    if archive_horizon() is not None:
+        course_questions = None if course_query is None else set(conn.execute(course_query).scalars())
+        for user_id in user_ids:
+            for record in archived_attempts(user_id):
+                if course_questions is not None and record.question_id not in course_questions:
+                    continue
+                # Rows being archived can still be live too
+                rows.setdefault(
+                    record.id, (user_id, record.question_id, record.answered_at, record.id, record.was_correct)
+                )
+
+    pairs: list[tuple[uuid.UUID, uuid.UUID]] = []
+    codes, answered_at, correct = [], [], []
+    for user_id, question_id, moment, _attempt_id, was_correct in sorted(rows.values(), key=lambda row: row[:4]):
+        if not pairs or pairs[-1] != (user_id, question_id):
+            pairs.append((user_id, question_id))
+        codes.append(len(pairs) - 1)
+        answered_at.append(moment.timestamp())
+        correct.append(was_correct)
+
+    history = AnswerHistory.from_sorted(np.array(codes, dtype=np.int64), np.array(answered_at), np.array(correct))
+    last_answered_at = np.array(answered_at, dtype=np.float64)[history.starts + history.lengths - 1]
+    return pairs, last_answered_at, history
+
+
+def _user_batches(conn: Connection, user_ids: list | None):
+    if user_ids:
+        ids = list(user_ids)
+    else:
+        ids = list(conn.execute(select(QuestionMetric.user_id).distinct().order_by(QuestionMetric.user_id)).scalars())
+    for offset in range(0, len(ids), USERS_PER_BATCH):
+        yield ids[offset : offset + USERS_PER_BATCH]
+
+
+def reschedule_metrics(
+    engine: Engine,
+    scheduler: Scheduler,
+    user_ids: list | None = None,
+    course_code: str | None = None,
+    dry_run: bool = False,
+) -> int:
+    """Rewrite ``next_due_at`` and ``scheduler_state`` for the given users (default: everyone). Returns the rows changed."""
+    if not dry_run and scheduler != live_scheduler():
+        logger.warning(
+            "[scheduler] Rescheduling with %r while new answers use %r; they will replay on their next answer",
+            scheduler,
+            live_scheduler(),
+        )
+    metrics = QuestionMetric.__table__
+    state_param = bindparam("b_scheduler_state", type_=JSONB(none_as_null=True))
+    stmt = (
+        update(metrics)
+        .where(
+            metrics.c.user_id == bindparam("b_user_id"),
+            metrics.c.question_id == bindparam("b_question_id"),
+            or_(
+                metrics.c.next_due_at.is_distinct_from(bindparam("b_next_due_at")),
+                metrics.c.scheduler_state.is_distinct_from(state_param),
+            ),
+        )
+        .values(next_due_at=bindparam("b_next_due_at"), scheduler_state=state_param)
+    )
+
+    changed = 0
+    with engine.connect() as reader:
+        for batch in _user_batches(reader, user_ids):
+            pairs, last_answered_at, history = load_history(reader, batch, course_code)
+            if not pairs:
+                continue
+            state = replay(scheduler, history)
+            due = last_answered_at + np.minimum(scheduler.interval_days(state), MAX_INTERVAL_DAYS) * DAY_SECONDS
+            values = {name: column.tolist() for name, column in state.items()}
+            rows = [
+                {
+                    "b_user_id": user_id,
+                    "b_question_id": question_id,
+                    "b_next_due_at": datetime.fromtimestamp(moment, timezone.utc),
+                    "b_scheduler_state": scheduler.dump_state({name: column[index] for name, column in values.items()}),
+                }
+                for index, ((user_id, question_id), moment) in enumerate(zip(pairs, due.tolist()))
+            ]
+            if dry_run:
+                logger.info("[scheduler] Would reschedule %s pairs for %s users", len(rows), len(batch))
+                continue
+            with engine.begin() as writer:
+                changed += writer.execute(stmt, rows).rowcount
+            logger.info("[scheduler] Rescheduled %s pairs for %s users (%s changed)", len(rows), len(batch), changed)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm", default=SCHEDULER_ALGORITHM, choices=sorted(SCHEDULERS))
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Tuning parameter override (default: SCHEDULER_PARAMS for the live algorithm)")
+    parser.add_argument("--user", action="append", type=uuid.UUID, help="Only these users (repeatable)")
+    parser.add_argument("--course", help="Only questions of this course")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    from backend.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    # SCHEDULER_PARAMS tunes the live algorithm only
+    live = args.algorithm == SCHEDULER_ALGORITHM and not args.set
+    params = parse_params(SCHEDULER_PARAMS.split(",") if live else args.set)
+    scheduler = get_scheduler(args.algorithm, **params)
+    changed = reschedule_metrics(engine, scheduler, args.user, args.course, args.dry_run)
+    print(f"Rescheduled with {scheduler.name}: {changed} question metrics changed")
+
+
+if __name__ == "__main__":
+    main()
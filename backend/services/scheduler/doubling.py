@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.services.scheduler.base import Scheduler, State
+
+
+@dataclass(frozen=True)
+class DoublingScheduler(Scheduler):
+    """The default live rule: double on correct, halve on wrong.
+
+    Intervals never drop below one day after a correct answer or six hours
+    after a wrong one; a new question starts from one day. The interval is
+    ``next_due_at - last_seen_at``, so no per-pair state is stored and the
+    live path can apply it in SQL (``upsert_question_metric``).
+    """
+
+    name = "doubling"
+
+    growth: float = 2.0
+    shrink: float = 0.5
+    floor_correct_days: float = 1.0
+    floor_wrong_days: float = 0.25
+
+    def initial_state(self, size: int) -> State:
+        return {"interval": np.full(size, np.nan)}
+
+    def review(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        previous = np.where(np.isnan(state["interval"]), 1.0, state["interval"])
+        interval = np.where(
+            correct,
+            np.maximum(self.floor_correct_days, previous * self.growth),
+            np.maximum(self.floor_wrong_days, previous * self.shrink),
+        )
+        return {"interval": interval}
+
+    def interval_days(self, state: State) -> np.ndarray:
+        return np.nan_to_num(state["interval"], nan=1.0)
+
+    def load_state(self, stored: dict | None, interval_days: float | None) -> dict[str, float] | None:
+        return {"interval": float("nan") if interval_days is None else interval_days}
+
+    def dump_state(self, state: dict[str, float] | None) -> dict | None:
+        return None
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.services.scheduler.base import Scheduler, State
+
+# FSRS-4.5 default weights
+DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1
+AGAIN, GOOD = 1, 3
+
+
+@dataclass(frozen=True)
+class FSRSScheduler(Scheduler):
+    """FSRS-4.5 style memory model: per-pair stability (days) and difficulty (1-10).
+
+    A correct answer is graded Good and a wrong one Again; the Hard and Easy
+    weights are unused. Retrievability decays with the time since the last
+    answer, and the next review is due when it falls to
+    ``desired_retention``.
+    """
+
+    name = "fsrs"
+
+    weights: tuple[float, ...] = DEFAULT_WEIGHTS
+    desired_retention: float = 0.9
+    minimum_days: float = 0.25
+    maximum_days: float = 36500.0
+
+    def initial_state(self, size: int) -> State:
+        return {"stability": np.full(size, np.nan), "difficulty": np.full(size, np.nan)}
+
+    def _initial_difficulty(self, grade) -> np.ndarray:
+        w = self.weights
+        return np.clip(w[4] - (grade - GOOD) * w[5], 1.0, 10.0)
+
+    def review(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        w = self.weights
+        grade = np.where(correct, GOOD, AGAIN)
+        new = np.isnan(state["stability"])
+        stability = np.where(new, 1.0, state["stability"])
+        difficulty = np.where(new, w[4], state["difficulty"])
+
+        retrievability = (1.0 + FACTOR * elapsed_days / stability) ** DECAY
+        difficulty = difficulty - w[6] * (grade - GOOD)
+        difficulty = np.clip(w[7] * self._initial_difficulty(GOOD) + (1 - w[7]) * difficulty, 1.0, 10.0)
+        recalled = stability * (
+            1.0
+            + np.exp(w[8])
+            * (11.0 - difficulty)
+            * stability ** -w[9]
+            * (np.exp(w[10] * (1.0 - retrievability)) - 1.0)
+        )
+        forgotten = np.minimum(
+            stability,
+            w[11] * difficulty ** -w[12] * ((stability + 1.0) ** w[13] - 1.0) * np.exp(w[14] * (1.0 - retrievability)),
+        )
+        return {
+            "stability": np.where(new, np.where(correct, w[2], w[0]), np.where(correct, recalled, forgotten)),
+            "difficulty": np.where(new, self._initial_difficulty(grade), difficulty),
+        }
+
+    def interval_days(self, state: State) -> np.ndarray:
+        stability = np.nan_to_num(state["stability"], nan=self.weights[2])
+        interval = stability / FACTOR * (self.desired_retention ** (1 / DECAY) - 1.0)
+        return np.clip(interval, self.minimum_days, self.maximum_days)
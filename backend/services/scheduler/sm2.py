@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from backend.services.scheduler.base import Scheduler, State
+
+
+@dataclass(frozen=True)
+class SM2Scheduler(Scheduler):
+    """SuperMemo SM-2.
+
+    Answers are only right or wrong here, so they are graded
+    ``correct_quality`` or ``wrong_quality`` on SM-2's 0-5 scale. The ease
+    factor is updated on every answer (a wrong one lowers it); a wrong answer
+    restarts the repetitions at ``first_interval``.
+    """
+
+    name = "sm2"
+
+    initial_ease: float = 2.5
+    minimum_ease: float = 1.3
+    correct_quality: float = 4.0
+    wrong_quality: float = 1.0
+    first_interval: float = 1.0
+    second_interval: float = 6.0
+
+    def initial_state(self, size: int) -> State:
+        return {
+            "repetitions": np.zeros(size),
+            "ease": np.full(size, self.initial_ease),
+            "interval": np.zeros(size),
+        }
+
+    def review(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        lapse = 5.0 - np.where(correct, self.correct_quality, self.wrong_quality)
+        ease = np.maximum(self.minimum_ease, state["ease"] + 0.1 - lapse * (0.08 + lapse * 0.02))
+        repetitions = state["repetitions"]
+        interval = np.select(
+            [~correct | (repetitions == 0), repetitions == 1],
+            [self.first_interval, self.second_interval],
+            default=state["interval"] * ease,
+        )
+        return {
+            "repetitions": np.where(correct, repetitions + 1, 0.0),
+            "ease": ease,
+            "interval": interval,
+        }
+
+    def interval_days(self, state: State) -> np.ndarray:
+        return np.maximum(state["interval"], self.first_interval)
@@ -0,0 +1,143 @@
+"""Time-budgeted study sessions.
+
+Plans a whole review session up front instead of picking one question at a
+time. Each question's expected answer time comes from the user's recorded
+``QuestionAttempt.seconds``:
+
+* the per-question median, shrunk towards the user's median for that
+  difficulty (weight ``PRIOR_WEIGHT`` attempts), so a single slow answer
+  does not dominate;
+* the user's difficulty median alone for questions never answered;
+* ``DEFAULT_SECONDS`` when the user has no recorded times at all.
+
+Its value is the ``score_deck`` score (due, weakness, recency, coverage).
+The selection is a 0/1 knapsack over time units of ``SECONDS_PER_UNIT``,
+solved by dynamic programming over the ``MAX_CANDIDATES`` questions with
+the best value per second.
+"""
+from __future__ import annotations
+
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models.attempt import QuestionAttempt
+from backend.models.question import Question
+from backend.services.question_selector import QuestionDeck, score_deck
+
+DEFAULT_SECONDS = {"easy": 30.0, "medium": 45.0, "hard": 60.0}
+MIN_SECONDS = 5
+# Longer answers are treated as the user stepping away
+MAX_SECONDS = 300
+PRIOR_WEIGHT = 2.0
+# Only recent history reflects how fast the user answers now
+HISTORY_DAYS = 180
+SECONDS_PER_UNIT = 5
+MAX_CANDIDATES = 400
+
+
+@dataclass
+class SessionPlan:
+    question_ids: list[uuid.UUID]
+    expected_seconds: list[float]
+    planned_seconds: float
+    expected_value: float
+
+
+def _median_seconds():
+    return func.percentile_cont(0.5).within_group(func.least(QuestionAttempt.seconds, MAX_SECONDS))
+
+
+def expected_seconds(db: Session, user_id, deck: QuestionDeck, now: datetime | None = None) -> np.ndarray:
+    """Expected answer time in seconds for every question in the deck."""
+    now = now or datetime.now(timezone.utc)
+    recorded = (
+        QuestionAttempt.user_id == user_id,
+        QuestionAttempt.seconds > 0,
+        QuestionAttempt.answered_at >= now - timedelta(days=HISTORY_DAYS),
+    )
+    per_question = {
+        question_id: (float(median), int(count))
+        for question_id, median, count in db.query(
+            QuestionAttempt.question_id, _median_seconds(), func.count()
+        )
+        .filter(*recorded)
+        .group_by(QuestionAttempt.question_id)
+    }
+    per_difficulty = {
+        difficulty: float(median)
+        for difficulty, median in db.query(Question.difficulty, _median_seconds())
+        .select_from(QuestionAttempt)
+        .join(Question, Question.id == QuestionAttempt.question_id)
+        .filter(*recorded)
+        .group_by(Question.difficulty)
+    }
+
+    estimates = np.empty(len(deck), dtype=np.float64)
+    for index, (question_id, difficulty) in enumerate(zip(deck.question_ids, deck.difficulty)):
+        prior = per_difficulty.get(difficulty, DEFAULT_SECONDS.get(difficulty, DEFAULT_SECONDS["medium"]))
+        median, count = per_question.get(question_id, (prior, 0))
+        estimates[index] = (count * median + PRIOR_WEIGHT * prior) / (count + PRIOR_WEIGHT)
+    return np.clip(estimates, MIN_SECONDS, MAX_SECONDS)
+
+
+def solve_knapsack(values: np.ndarray, costs: np.ndarray, capacity: int) -> list[int]:
+    """Indices maximising total value with integer ``costs`` summing to at most ``capacity``."""
+    best = np.zeros(capacity + 1, dtype=np.float64)
+    taken = np.zeros((len(values), capacity + 1), dtype=bool)
+    for item, (value, cost) in enumerate(zip(values, costs)):
+        if cost > capacity:
+            continue
+        with_item = np.full_like(best, -np.inf)
+        with_item[cost:] = best[: capacity + 1 - cost] + value
+        taken[item] = with_item > best
+        best = np.maximum(best, with_item)
+
+    chosen, remaining = [], capacity
+    for item in range(len(values) - 1, -1, -1):
+        if taken[item, remaining]:
+            chosen.append(item)
+            remaining -= costs[item]
+    return chosen[::-1]
+
+
+def plan_session(
+    db: Session,
+    user_id,
+    deck: QuestionDeck,
+    budget_seconds: float,
+    now: datetime | None = None,
+    rng: np.random.Generator | None = None,
+) -> SessionPlan:
+    """Pick the questions worth the most expected learning that fit in ``budget_seconds``.
+
+    The plan is ordered like ``choose_next_questions``: due first, then by score.
+    """
+    capacity = int(budget_seconds // SECONDS_PER_UNIT)
+    if len(deck) == 0 or capacity <= 0:
+        return SessionPlan([], [], 0.0, 0.0)
+
+    now = now or datetime.now(timezone.utc)
+    seconds = expected_seconds(db, user_id, deck, now)
+    tier, score = score_deck(deck, now.timestamp(), rng)
+    costs = np.array([math.ceil(value / SECONDS_PER_UNIT) for value in seconds], dtype=np.int64)
+
+    candidates = np.flatnonzero(costs <= capacity)
+    if len(candidates) > MAX_CANDIDATES:
+        density = score[candidates] / costs[candidates]
+        candidates = candidates[np.argsort(-density, kind="stable")[:MAX_CANDIDATES]]
+    chosen = candidates[solve_knapsack(score[candidates], costs[candidates], capacity)]
+
+    # lexsort sorts by the last key first: tier, then score, both descending
+    chosen = chosen[np.lexsort((-score[chosen], -tier[chosen]))]
+    return SessionPlan(
+        question_ids=[deck.question_ids[i] for i in chosen],
+        expected_seconds=[round(float(seconds[i]), 1) for i in chosen],
+        planned_seconds=round(float(seconds[chosen].sum()), 1),
+        expected_value=round(float(score[chosen].sum()), 3),
+    )
@@ -1,38 +1,74 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
 from sqlalchemy.orm import Session
 
 from backend.models.streak import DailyStreak
+from backend.services.activity_memo import get_activity_memo
 
 
-def update_streak(db: Session, user_id, timestamp: datetime | None = None) -> DailyStreak:
-    """Upsert the user's streak using the provided timestamp (UTC)."""
-    now = timestamp or datetime.utcnow()
-    today = now.date()
+def advance_streak(
+    current_streak: int,
+    longest_streak: int,
+    last_active_date: date | None,
+    day: date,
+) -> tuple[int, int, date | None]:
+    """Return ``(current, longest, last_active_date)`` after activity on ``day``."""
+    if last_active_date == day:
+        return current_streak, longest_streak, last_active_date
 
-    streak = db.get(DailyStreak, user_id)
-    if streak is None:
-        streak = DailyStreak(
-            user_id=user_id,
-            current_streak=1,
-            longest_streak=1,
-            last_active_date=today,
-        )
-        db.add(streak)
-        return streak
+    # Late-reported answers (e.g. from an offline queue) never rewind the streak
+    if last_active_date is not None and day < last_active_date:
+        return current_streak, longest_streak, last_active_date
 
-    if streak.last_active_date == today:
-        return streak
-
-    if streak.last_active_date == (today - timedelta(days=1)):
-        streak.current_streak += 1
+    if last_active_date == (day - timedelta(days=1)):
+        current_streak += 1
     else:
-        streak.current_streak = 1
+        current_streak = 1
+
+    return current_streak, max(longest_streak, current_streak), day
+
+
+def upsert_streak(user_id, day: date) -> Insert:
+    """Build an atomic upsert recording activity on ``day``.
+
+    Mirrors ``advance_streak`` in SQL. Rows already recorded for ``day`` (or a
+    later day) are left untouched, so repeat answers write nothing.
+    """
+    stmt = pg_insert(DailyStreak).values(
+        user_id=user_id,
+        current_streak=1,
+        longest_streak=1,
+        last_active_date=day,
+    )
+    current = case(
+        (DailyStreak.last_active_date == day - timedelta(days=1), DailyStreak.current_streak + 1),
+        else_=1,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyStreak.user_id],
+        set_={
+            "current_streak": current,
+            "longest_streak": func.greatest(DailyStreak.longest_streak, current),
+            "last_active_date": stmt.excluded.last_active_date,
+            "updated_at": func.now(),
+        },
+        where=or_(DailyStreak.last_active_date.is_(None), DailyStreak.last_active_date < day),
+    )
+
 
-    if streak.current_streak > streak.longest_streak:
-        streak.longest_streak = streak.current_streak
+def update_streak(db: Session, user_id, timestamp: datetime | None = None) -> None:
+    """Upsert the user's streak using the provided timestamp (UTC).
 
-    streak.last_active_date = today
-    return streak
+    Skipped once the day is in the activity memo; otherwise the day is
+    memoised when the transaction commits.
+    """
+    day = (timestamp or datetime.utcnow()).date()
+    memo = get_activity_memo()
+    if memo.seen(user_id, day):
+        return
+    db.execute(upsert_streak(user_id, day))
+    memo.mark_after_commit(db, user_id, day)
@@ -0,0 +1,197 @@
+"""
+Delta sync for the question deck.
+
+Synced rows (questions, topics, question_metrics, enrolments) carry
+``sync_tx``: the id of the transaction that last wrote them, set by a column
+default on insert and a trigger on update. Deletes of questions and
+enrolments leave rows in ``sync_tombstones``; question tombstones carry the
+course code so each user only hears about their own courses. Clients keep
+the cursor from their last sync and ask only for rows with
+``sync_tx >= cursor``.
+
+Tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS are purged at boot; the
+purge leaves a "horizon" row, and clients whose cursor predates it get a
+full resync.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists, func, insert, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.models.enrolment import Enrolment
+from backend.models.sync import SyncTombstone
+
+logger = logging.getLogger(__name__)
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Tables whose rows carry ``sync_tx``; each gets a BEFORE UPDATE stamping trigger
+TRACKED_TABLES = ("questions", "topics", "question_metrics", "enrolments")
+
+_INSTALL_SQL = [
+    *(
+        # Existing rows get 0 so the column is added without rewriting the table
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS sync_tx BIGINT NOT NULL DEFAULT 0"
+        for table in TRACKED_TABLES
+    ),
+    *(
+        f"ALTER TABLE {table} ALTER COLUMN sync_tx SET DEFAULT (pg_current_xact_id()::text::bigint)"
+        for table in TRACKED_TABLES
+    ),
+    *(f"CREATE INDEX IF NOT EXISTS ix_{table}_sync_tx ON {table} (sync_tx)" for table in TRACKED_TABLES),
+    "ALTER TABLE sync_tombstones ADD COLUMN IF NOT EXISTS course_code VARCHAR(32)",
+    """
+    CREATE OR REPLACE FUNCTION unimind_stamp_sync_tx() RETURNS trigger AS $$
+    BEGIN
+        NEW.sync_tx := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        statement
+        for table in TRACKED_TABLES
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {table}_stamp_sync_tx ON {table}",
+            f"CREATE TRIGGER {table}_stamp_sync_tx BEFORE UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION unimind_stamp_sync_tx()",
+        )
+    ),
+    """
+    CREATE OR REPLACE FUNCTION unimind_question_tombstone() RETURNS trigger AS $$
+    BEGIN
+        -- Finds no topic when the delete cascades from one; its own trigger covered the question
+        INSERT INTO sync_tombstones (kind, question_id, course_code)
+        SELECT 'question', OLD.id, topics.course_code FROM topics WHERE topics.id = OLD.topic_id;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS questions_tombstone ON questions",
+    "CREATE TRIGGER questions_tombstone AFTER DELETE ON questions "
+    "FOR EACH ROW EXECUTE FUNCTION unimind_question_tombstone()",
+    """
+    CREATE OR REPLACE FUNCTION unimind_topic_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO sync_tombstones (kind, question_id, course_code)
+        SELECT 'question', questions.id, OLD.course_code FROM questions WHERE questions.topic_id = OLD.id;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS topics_tombstone ON topics",
+    "CREATE TRIGGER topics_tombstone BEFORE DELETE ON topics "
+    "FOR EACH ROW EXECUTE FUNCTION unimind_topic_tombstone()",
+    """
+    CREATE OR REPLACE FUNCTION unimind_enrolment_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO sync_tombstones (kind, user_id) VALUES ('enrolment', OLD.user_id);
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS enrolments_tombstone ON enrolments",
+    "CREATE TRIGGER enrolments_tombstone AFTER DELETE ON enrolments "
+    "FOR EACH ROW EXECUTE FUNCTION unimind_enrolment_tombstone()",
+    # Question tombstones from before course_code was recorded cannot be
+    # scoped; drop them and leave a horizon so affected cursors resync
+    """
+    WITH legacy AS (
+        DELETE FROM sync_tombstones WHERE kind = 'question' AND course_code IS NULL RETURNING 1
+    )
+    INSERT INTO sync_tombstones (kind) SELECT 'horizon' WHERE EXISTS (SELECT 1 FROM legacy)
+    """,
+]
+
+
+def install_sync_tracking(engine: Engine) -> None:
+    """Create the ``sync_tx`` columns, stamping triggers and tombstone triggers (idempotent)."""
+    try:
+        with engine.begin() as conn:
+            for statement in _INSTALL_SQL:
+                conn.exec_driver_sql(statement)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[sync] Could not install change tracking (%s)", exc)
+
+
+def purge_tombstones(engine: Engine, retention_days: int = TOMBSTONE_RETENTION_DAYS) -> int:
+    """Drop old tombstones and record a horizon for cursors that may have missed them."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    try:
+        with engine.begin() as conn:
+            purged = conn.execute(delete(SyncTombstone).where(SyncTombstone.created_at < cutoff)).rowcount
+            if purged:
+                conn.execute(insert(SyncTombstone).values(kind="horizon"))
+        return purged
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[sync] Could not purge sync tombstones (%s)", exc)
+        return 0
+
+
+def sync_cursor(db: Session) -> int:
+    """Cursor for the next delta sync.
+
+    Rows are stamped with the id of the transaction that wrote them. Every
+    transaction older than the snapshot's xmin has committed, so a later sync
+    with ``sync_tx >= cursor`` cannot miss a write that lands after this
+    read; it may resend a few rows, which clients apply idempotently.
+    Take the cursor before reading the data it covers.
+    """
+    return db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar_one()
+
+
+def changed_since(since: int, *columns):
+    return or_(*(column >= since for column in columns))
+
+
+def deleted_question_ids(db: Session, user_id, since: int) -> list[str]:
+    """Questions deleted since ``since`` from the courses ``user_id`` is enrolled in."""
+    enrolled = select(Enrolment.course_code).where(Enrolment.user_id == user_id)
+    rows = db.scalars(
+        select(SyncTombstone.question_id)
+        .where(
+            SyncTombstone.kind == "question",
+            SyncTombstone.sync_tx >= since,
+            SyncTombstone.course_code.in_(enrolled),
+        )
+        .distinct()
+    )
+    return [str(question_id) for question_id in rows]
+
+
+def needs_reset(db: Session, user_id, since: int) -> bool:
+    """True if a delta from ``since`` is not enough and the client must resync fully.
+
+    That is the case when the user joined or left a course (whole courses
+    appear or vanish) or when tombstones newer than the cursor were purged.
+    """
+    joined = exists().where(Enrolment.user_id == user_id, Enrolment.sync_tx >= since)
+    left = exists().where(
+        SyncTombstone.kind == "enrolment",
+        SyncTombstone.user_id == user_id,
+        SyncTombstone.sync_tx >= since,
+    )
+    purged = exists().where(SyncTombstone.kind == "horizon", SyncTombstone.sync_tx >= since)
+    return bool(db.scalar(select(joined | left | purged)))
+
+
+def deck_etag(query, version_columns, *parts) -> str:
+    """Weak ETag from the row count and newest ``sync_tx`` of ``query``.
+
+    A delete changes the count and any insert or update raises the maximum,
+    so the tag changes whenever the rows the query returns do.
+    """
+    version = func.greatest(*(func.coalesce(column, 0) for column in version_columns))
+    count, newest = query.with_entities(func.count(), func.max(version)).one()
+    key = ":".join(str(part) for part in (count, newest, *parts))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    return bool(if_none_match) and (if_none_match.strip() == "*" or etag in {tag.strip() for tag in if_none_match.split(",")})
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from backend.database import SessionLocal
+from backend.models.domain_activity import DomainActivityDaily
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("TELEMETRY_FLUSH_SECONDS", "10"))
+# Flush early once this many distinct (user, domain, day) counters are pending
+MAX_PENDING_KEYS = int(os.getenv("TELEMETRY_MAX_PENDING", "10000"))
+# Hard cap while the database is unreachable; events for new keys beyond it are dropped
+MAX_BUFFERED_KEYS = int(os.getenv("TELEMETRY_MAX_BUFFERED", str(MAX_PENDING_KEYS * 10)))
+# A counter that fails this many row-by-row writes is dropped
+MAX_ROW_FAILURES = 3
+
+
+class BlockEventBuffer:
+    """Aggregates block/unlock events in memory and flushes them as bulk upserts.
+
+    Requests only bump counters under a lock; a daemon thread writes the
+    accumulated counters to ``domain_activity_daily`` so telemetry never
+    competes with attempt writes on the request path. When the bulk upsert
+    fails, the counters are retried one by one so a single bad row cannot
+    hold back the rest; rows that keep failing are dropped.
+    """
+
+    def __init__(self, session_factory=SessionLocal) -> None:
+        self._session_factory = session_factory
+        self._pending: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+        self._failures: dict[tuple, int] = {}
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, user_id, domain: str, day: date, blocks: int = 0, unlocks: int = 0) -> None:
+        key = (user_id, domain, day)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= MAX_BUFFERED_KEYS:
+                self._dropped += 1
+                return
+            counters = self._pending[key]
+            counters[0] += blocks
+            counters[1] += unlocks
+            pending = len(self._pending)
+        self._ensure_worker()
+        if pending >= MAX_PENDING_KEYS:
+            self._wake.set()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="block-event-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(FLUSH_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as exc:  # pragma: no cover - defensive guard
+                logger.warning("[telemetry] Block event flush failed (%s)", exc)
+
+    @staticmethod
+    def _upsert(items: list[tuple[tuple, list[int]]]):
+        rows = [
+            {"user_id": user_id, "domain": domain, "day": day, "blocks": blocks, "unlocks": unlocks}
+            for (user_id, domain, day), (blocks, unlocks) in items
+        ]
+        stmt = pg_insert(DomainActivityDaily).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[DomainActivityDaily.user_id, DomainActivityDaily.domain, DomainActivityDaily.day],
+            set_={
+                "blocks": DomainActivityDaily.blocks + stmt.excluded.blocks,
+                "unlocks": DomainActivityDaily.unlocks + stmt.excluded.unlocks,
+                "updated_at": func.now(),
+            },
+        )
+
+    def _requeue(self, items: list[tuple[tuple, list[int]]], failed: bool) -> None:
+        """Put counters back for the next flush; ``failed`` counts a strike against each."""
+        with self._lock:
+            for key, (blocks, unlocks) in items:
+                if failed:
+                    strikes = self._failures.get(key, 0) + 1
+                    if strikes >= MAX_ROW_FAILURES:
+                        self._failures.pop(key, None)
+                        logger.warning(
+                            "[telemetry] Dropping block counters for %s after %s failed writes", key, strikes
+                        )
+                        continue
+                    self._failures[key] = strikes
+                if key not in self._pending and len(self._pending) >= MAX_BUFFERED_KEYS:
+                    self._dropped += 1
+                    continue
+                counters = self._pending[key]
+                counters[0] += blocks
+                counters[1] += unlocks
+
+    def _write_each(self, items: list[tuple[tuple, list[int]]]) -> int:
+        """Write counters one savepoint at a time; failing rows are requeued with a strike."""
+        written: list[tuple] = []
+        struck: set[tuple] = set()
+        db = self._session_factory()
+        try:
+            for item in items:
+                try:
+                    with db.begin_nested():
+                        db.execute(self._upsert([item]))
+                except OperationalError:
+                    # The database itself is failing, not this row
+                    db.rollback()
+                    self._requeue([other for other in items if other[0] not in struck], failed=False)
+                    raise
+                except SQLAlchemyError as exc:
+                    logger.warning("[telemetry] Block counters for %s failed to write (%s)", item[0], exc)
+                    self._requeue([item], failed=True)
+                    struck.add(item[0])
+                    continue
+                written.append(item[0])
+            try:
+                db.commit()
+            except SQLAlchemyError:
+                db.rollback()
+                self._requeue([item for item in items if item[0] not in struck], failed=False)
+                raise
+        finally:
+            db.close()
+        self._clear_failures(written)
+        return len(written)
+
+    def _clear_failures(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._failures.pop(key, None)
+
+    def flush(self) -> int:
+        """Write pending counters to the database. Returns the number of rows upserted."""
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            if not self._pending:
+                batch = None
+            else:
+                batch, self._pending = self._pending, defaultdict(lambda: [0, 0])
+        if dropped:
+            logger.warning("[telemetry] Dropped %s block events while the buffer was full", dropped)
+        if batch is None:
+            return 0
+
+        items = list(batch.items())
+        db = self._session_factory()
+        try:
+            db.execute(self._upsert(items))
+            db.commit()
+        except OperationalError:
+            db.rollback()
+            # Put the counters back so the next flush retries them
+            self._requeue(items, failed=False)
+            raise
+        except SQLAlchemyError as exc:
+            db.rollback()
+            logger.warning("[telemetry] Bulk block event flush failed, retrying row by row (%s)", exc)
+            return self._write_each(items)
+        finally:
+            db.close()
+        self._clear_failures(batch)
+        return len(items)
+
+
+block_events = BlockEventBuffer()
+
+
+def flush_block_events() -> None:
+    try:
+        block_events.flush()
+    except Exception as exc:  # pragma: no cover - defensive guard
+        logger.warning("[telemetry] Final block event flush failed (%s)", exc)
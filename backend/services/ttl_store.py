@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class TTLStoreBackend(ABC):
+    """Key/value store with per-key expiry."""
+
+    @abstractmethod
+    def get(self, key: str) -> dict | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: dict, ttl_seconds: float) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+
+class InMemoryTTLStore(TTLStoreBackend):
+    """Process-local TTL map. Expired keys are dropped on read and swept on write."""
+
+    SWEEP_EVERY = 1024
+
+    def __init__(self) -> None:
+        self._items: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> dict | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.time():
+            with self._lock:
+                self._items.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: dict, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._items[key] = (now + ttl_seconds, value)
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class RedisTTLStore(TTLStoreBackend):
+    """Shared backend so every API worker sees the same keys.
+
+    While Redis is unreachable, reads and writes go to a process-local
+    ``InMemoryTTLStore`` instead of failing the request; keys written during
+    the outage are not copied back once it ends.
+    """
+
+    # Keeps a dead Redis from stalling requests
+    TIMEOUT_SECONDS = 0.5
+
+    def __init__(self, url: str, prefix: str) -> None:
+        # Defer import so the API runs without redis installed
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=self.TIMEOUT_SECONDS, socket_connect_timeout=self.TIMEOUT_SECONDS
+        )
+        self._errors = (redis.ConnectionError, redis.TimeoutError)
+        self._prefix = prefix
+        self._fallback = InMemoryTTLStore()
+        self._degraded = False
+
+    def _failed(self, exc: Exception) -> None:
+        if not self._degraded:
+            self._degraded = True
+            logger.warning("[ttl_store] Redis unavailable for %s, using in-memory store (%s)", self._prefix, exc)
+
+    def _recovered(self) -> None:
+        if self._degraded:
+            self._degraded = False
+            logger.info("[ttl_store] Redis available again for %s", self._prefix)
+
+    def get(self, key: str) -> dict | None:
+        try:
+            raw = self._client.get(self._prefix + key)
+        except self._errors as exc:
+            self._failed(exc)
+            return self._fallback.get(key)
+        self._recovered()
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: dict, ttl_seconds: float) -> None:
+        try:
+            self._client.set(self._prefix + key, json.dumps(value), px=max(1, int(ttl_seconds * 1000)))
+        except self._errors as exc:
+            self._failed(exc)
+            self._fallback.set(key, value, ttl_seconds)
+            return
+        self._recovered()
+
+    def delete(self, key: str) -> None:
+        self._fallback.delete(key)
+        try:
+            self._client.delete(self._prefix + key)
+        except self._errors as exc:
+            self._failed(exc)
+            return
+        self._recovered()
+
+
+def build_ttl_store(url_env: str, prefix: str) -> TTLStoreBackend:
+    """Use Redis when the ``url_env`` variable is set, otherwise a process-local map."""
+    url = os.getenv(url_env)
+    if url:
+        try:
+            return RedisTTLStore(url, prefix)
+        except Exception as exc:  # pragma: no cover - depends on deployment
+            logger.warning("[ttl_store] Falling back to in-memory store for %s (%s)", prefix, exc)
+    return InMemoryTTLStore()
@@ -0,0 +1,4 @@
+import os
+
+# Importing the models builds an engine; nothing here connects to it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://unimind@localhost/unimind_test")
@@ -0,0 +1,27 @@
+import uuid
+
+import pytest
+
+from backend.services.gate_tokens import issue_grading_token, verify_grading_token
+
+
+def test_round_trip():
+    user_id, question_id, topic_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    claims, token = issue_grading_token(user_id, question_id, topic_id, correct_index=2)
+
+    assert verify_grading_token(token, user_id) == claims
+    assert claims.is_correct(2) and not claims.is_correct(1)
+
+
+def test_rejects_other_user_and_tampering():
+    user_id = uuid.uuid4()
+    _, token = issue_grading_token(user_id, uuid.uuid4(), uuid.uuid4(), correct_index=0)
+    body, _, signature = token.partition(".")
+
+    assert verify_grading_token(token, uuid.uuid4()) is None
+    assert verify_grading_token(f"{body}x.{signature}", user_id) is None
+
+
+@pytest.mark.parametrize("token", ["é.x", "abc.é", "", ".", "abc", "abc.", "é"])
+def test_malformed_tokens_are_rejected(token):
+    assert verify_grading_token(token, uuid.uuid4()) is None
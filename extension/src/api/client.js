@@ -104,11 +104,22 @@ export async function getUser(options = {}) {
   return user
 }
 
-export async function fetchQuestionsForExtension() {
+// The block page never shows explanations, which dominate the payload
+const QUESTION_FIELDS = [
+  'id', 'topic', 'prompt', 'options', 'correctAnswer', 'difficulty',
+  'last_seen_at', 'next_due_at', 'rolling_accuracy', 'attempts',
+].join(',')
+
+// Returns { cursor, reset, changed, deleted }. Without `since` the whole deck
+// comes back as `changed` with `reset` set; pass the previous `cursor` to get
+// only questions changed or deleted since then.
+export async function fetchQuestionsForExtension(since = null) {
   const { token, user } = await requireAuth()
+  const params = new URLSearchParams({ fields: QUESTION_FIELDS })
+  if (since != null) params.set('since', since)
 
   const response = await fetch(
-    `${API_BASE_URL}/students/${user.id}/questions-for-extension`,
+    `${API_BASE_URL}/students/${user.id}/questions-for-extension?${params}`,
     {
       headers: {
         Authorization: `Bearer ${token}`,
@@ -121,27 +132,44 @@ export async function fetchQuestionsForExtension() {
     throw new Error('Failed to fetch questions')
   }
 
-  return await response.json()
+  const body = await response.json()
+  if (since == null) {
+    const cursor = response.headers.get('X-Sync-Cursor')
+    return { cursor: cursor == null ? null : Number(cursor), reset: true, changed: body, deleted: [] }
+  }
+  return body
 }
 
 export async function submitAttempt(questionId, answerIndex, timeSeconds) {
   const { token, user } = await requireAuth()
+  // Same key on every retry so the server records the answer only once
+  const idempotencyKey = crypto.randomUUID()
 
-  const response = await fetch(
-    `${API_BASE_URL}/students/${user.id}/attempts`,
-    {
-      method: 'POST',
-      headers: {
-        Authorization: `Bearer ${token}`,
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        question_id: questionId,
-        answer_index: answerIndex,
-        seconds: timeSeconds,
-      }),
-    },
-  )
+  let response
+  for (let attempt = 0; attempt < 3; attempt += 1) {
+    try {
+      response = await fetch(
+        `${API_BASE_URL}/students/${user.id}/attempts`,
+        {
+          method: 'POST',
+          headers: {
+            Authorization: `Bearer ${token}`,
+            'Content-Type': 'application/json',
+            'Idempotency-Key': idempotencyKey,
+          },
+          body: JSON.stringify({
+            question_id: questionId,
+            answer_index: answerIndex,
+            seconds: timeSeconds,
+          }),
+        },
+      )
+    } catch (error) {
+      if (attempt === 2) throw error
+      continue
+    }
+    if (response.status < 500) break
+  }
 
   if (!response.ok) {
     throw new Error('Failed to submit attempt')
@@ -150,6 +178,55 @@ export async function submitAttempt(questionId, answerIndex, timeSeconds) {
   return await response.json()
 }
 
+export async function fetchGatePack(size = 10, target = null) {
+  const { token } = await requireAuth()
+
+  const params = new URLSearchParams({ size: String(size) })
+  if (target) params.set('target', target)
+
+  const response = await fetch(`${API_BASE_URL}/gate/pack?${params}`, {
+    headers: {
+      Authorization: `Bearer ${token}`,
+    },
+  })
+
+  if (!response.ok) {
+    throw new Error('Failed to fetch gate pack')
+  }
+
+  return await response.json()
+}
+
+// Grade a pack question locally: the server sends sha256("<nonce>:<index>")
+// of the correct answer, so unlocking doesn't wait on a network round trip.
+export async function gradePackAnswer(packQuestion, answerIndex) {
+  const bytes = new TextEncoder().encode(`${packQuestion.nonce}:${answerIndex}`)
+  const digest = await crypto.subtle.digest('SHA-256', bytes)
+  const hex = Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('')
+  return hex === packQuestion.answer_digest
+}
+
+export async function reportGatePackResults(answers) {
+  const { token } = await requireAuth()
+
+  const response = await fetch(`${API_BASE_URL}/gate/pack/results`, {
+    method: 'POST',
+    headers: {
+      Authorization: `Bearer ${token}`,
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ answers }),
+  })
+
+  if (!response.ok) {
+    throw new Error('Failed to report gate results')
+  }
+
+  return await response.json()
+}
+
 export async function fetchStreak() {
   const { token, user } = await requireAuth()
 
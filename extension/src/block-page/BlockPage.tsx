@@ -1,6 +1,7 @@
 import { useEffect, useLayoutEffect, useRef, useState } from "react";
 import QuestionCard from "./QuestionCard";
 import { getNextQuestion, updateAfterAnswer } from "./questions";
+import { flushPackResults, getNextPackQuestion, recordPackAnswer } from "./gatePack";
 import { submitAttempt } from "../api/client";
 import logo from "../assets/logo.png";
 
@@ -22,6 +23,8 @@ function BlockPage() {
   const [tabId, setTabId] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [startTime, setStartTime] = useState<number | null>(null);
+  // Set when the question came from an offline gate pack; only its first answer is reported
+  const packRef = useRef<{ packQuestion: object; reported: boolean } | null>(null);
 
   // Scale-to-fit for the card so the page never scrolls
   const cardOuterRef = useRef<HTMLDivElement | null>(null);
@@ -32,6 +35,7 @@ function BlockPage() {
     const urlParams = new URLSearchParams(window.location.search);
     const currentTabId = urlParams.get("tabId");
     setTabId(currentTabId);
+    flushPackResults();
     loadNewQuestion();
   }, []);
 
@@ -59,7 +63,9 @@ function BlockPage() {
   const loadNewQuestion = async () => {
     setLoading(true);
     try {
-      const question = (await getNextQuestion()) as Question;
+      const next = await getNextPackQuestion();
+      packRef.current = next ? { packQuestion: next.packQuestion, reported: false } : null;
+      const question = (next ? next.question : await getNextQuestion()) as Question;
       setCurrentQuestion(question);
       setStartTime(Date.now());
     } catch (error) {
@@ -69,17 +75,36 @@ function BlockPage() {
     }
   };
 
-  const handleCorrectAnswer = async (answerIndex: number) => {
-    if (!currentQuestion) return;
-    const timeSeconds = startTime ? Math.floor((Date.now() - startTime) / 1000) : 0;
+  const elapsedSeconds = () => (startTime ? Math.floor((Date.now() - startTime) / 1000) : 0);
 
+  const reportPackAnswer = async (answerIndex: number) => {
+    const pack = packRef.current;
+    if (!pack || pack.reported) return;
+    pack.reported = true;
     try {
-      await submitAttempt(currentQuestion.id, answerIndex, timeSeconds);
+      await recordPackAnswer(pack.packQuestion, answerIndex, elapsedSeconds());
     } catch (error) {
-      console.error("Failed to submit attempt:", error);
+      console.error("Failed to queue gate answer:", error);
     }
+  };
+
+  const handleIncorrectAnswer = (answerIndex: number) => {
+    reportPackAnswer(answerIndex);
+  };
 
-    updateAfterAnswer(currentQuestion, true);
+  const handleCorrectAnswer = async (answerIndex: number) => {
+    if (!currentQuestion) return;
+
+    if (packRef.current) {
+      await reportPackAnswer(answerIndex);
+    } else {
+      try {
+        await submitAttempt(currentQuestion.id, answerIndex, elapsedSeconds());
+      } catch (error) {
+        console.error("Failed to submit attempt:", error);
+      }
+      updateAfterAnswer(currentQuestion, true);
+    }
 
     chrome.storage.local.get([`pendingUrl_${tabId}`], (result) => {
       const originalUrl = result[`pendingUrl_${tabId}`];
@@ -146,7 +171,11 @@ function BlockPage() {
             className="w-full max-w-3xl"
           >
             {currentQuestion && (
-              <QuestionCard question={currentQuestion} onCorrectAnswer={handleCorrectAnswer} />
+              <QuestionCard
+                question={currentQuestion}
+                onCorrectAnswer={handleCorrectAnswer}
+                onIncorrectAnswer={handleIncorrectAnswer}
+              />
             )}
           </div>
         </main>
@@ -16,6 +16,7 @@ interface Question {
 interface QuestionCardProps {
   question: Question;
   onCorrectAnswer: (answerIndex: number) => void;
+  onIncorrectAnswer?: (answerIndex: number) => void;
 }
 
 type FeedbackType = null | "error" | "correct" | "incorrect";
@@ -27,7 +28,7 @@ const difficultyLabels: Record<string, string> = {
 };
 
 
-function QuestionCard({ question, onCorrectAnswer }: QuestionCardProps) {
+function QuestionCard({ question, onCorrectAnswer, onIncorrectAnswer }: QuestionCardProps) {
   const [selectedIndex, setSelectedIndex] = useState<number | null>(null);
   const [feedback, setFeedback] = useState<FeedbackType>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
@@ -53,6 +54,7 @@ function QuestionCard({ question, onCorrectAnswer }: QuestionCardProps) {
       }, 1500);
     } else {
       setFeedback("incorrect");
+      onIncorrectAnswer?.(selectedIndex);
       setTimeout(() => {
         setSelectedIndex(null);
         setFeedback(null);
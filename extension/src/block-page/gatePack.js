@@ -0,0 +1,134 @@
+import { fetchGatePack, gradePackAnswer, reportGatePackResults } from '../api/client.js';
+
+// Offline gate packs: questions are fetched ahead of time and graded locally,
+// and answers are queued in chrome.storage and reported in the background,
+// so unlocking a site never waits on the API.
+const PACK_KEY = 'gate_pack';
+const RESULTS_KEY = 'gate_pack_results';
+const PACK_SIZE = 10;
+const REFILL_BELOW = 3;
+const MAX_REPORT_SIZE = 500; // server limit per report
+
+let refilling = null;
+let flushing = null;
+
+async function readStorage(key, fallback) {
+  const result = await chrome.storage.local.get([key]);
+  return result[key] ?? fallback;
+}
+
+function unexpired(questions, now = Date.now()) {
+  return questions.filter((question) => Date.parse(question.expires_at) > now);
+}
+
+/**
+ * Top up the stored pack with a fresh one from the API.
+ * Each question keeps its pack's expiry, since that is when its token lapses.
+ */
+function refillPack() {
+  if (!refilling) {
+    refilling = (async () => {
+      const pack = await fetchGatePack(PACK_SIZE);
+      const fresh = pack.questions.map((question) => ({ ...question, expires_at: pack.expires_at }));
+      const stored = unexpired(await readStorage(PACK_KEY, []));
+      const seen = new Set(stored.map((question) => question.question_id));
+      const merged = stored.concat(fresh.filter((question) => !seen.has(question.question_id)));
+      await chrome.storage.local.set({ [PACK_KEY]: merged });
+      return merged;
+    })().finally(() => {
+      refilling = null;
+    });
+  }
+  return refilling;
+}
+
+async function correctIndex(packQuestion) {
+  for (let index = 0; index < packQuestion.choices.length; index += 1) {
+    if (await gradePackAnswer(packQuestion, index)) return index;
+  }
+  return null;
+}
+
+/**
+ * Next unanswered pack question in the block page's question shape, or null
+ * when no pack is stored and none can be fetched (callers fall back to the deck).
+ *
+ * @returns {Promise<{question: Object, packQuestion: Object}|null>}
+ */
+export async function getNextPackQuestion() {
+  let questions = unexpired(await readStorage(PACK_KEY, []));
+  try {
+    if (questions.length === 0) {
+      questions = await refillPack();
+    } else if (questions.length < REFILL_BELOW) {
+      refillPack().catch((error) => console.error('Failed to refill gate pack:', error));
+    }
+  } catch (error) {
+    console.error('Failed to fetch gate pack:', error);
+    return null;
+  }
+
+  for (const packQuestion of questions) {
+    const correctAnswer = await correctIndex(packQuestion);
+    if (correctAnswer == null) continue;
+    return {
+      packQuestion,
+      question: {
+        id: packQuestion.question_id,
+        topic: packQuestion.topic_name,
+        prompt: packQuestion.prompt,
+        options: packQuestion.choices,
+        correctAnswer,
+        difficulty: packQuestion.difficulty,
+      },
+    };
+  }
+  return null;
+}
+
+/**
+ * Take a pack question out of the pack and queue its answer for reporting.
+ * Only the first answer counts: the token is spent once reported.
+ */
+export async function recordPackAnswer(packQuestion, answerIndex, timeSeconds) {
+  const questions = await readStorage(PACK_KEY, []);
+  const results = await readStorage(RESULTS_KEY, []);
+  await chrome.storage.local.set({
+    [PACK_KEY]: questions.filter((question) => question.grading_token !== packQuestion.grading_token),
+    [RESULTS_KEY]: results.concat({
+      grading_token: packQuestion.grading_token,
+      answer_index: answerIndex,
+      seconds: timeSeconds,
+      answered_at: new Date().toISOString(),
+    }),
+  });
+  flushPackResults();
+}
+
+/**
+ * Report queued pack answers. Every answer the server returns a result for is
+ * settled (accepted, duplicate or rejected) and leaves the queue; on a network
+ * or server error the queue is kept and retried on the next flush.
+ */
+export function flushPackResults() {
+  if (!flushing) {
+    flushing = (async () => {
+      const queued = await readStorage(RESULTS_KEY, []);
+      for (let offset = 0; offset < queued.length; offset += MAX_REPORT_SIZE) {
+        const chunk = queued.slice(offset, offset + MAX_REPORT_SIZE);
+        await reportGatePackResults(chunk);
+        const settled = new Set(chunk.map((answer) => answer.grading_token));
+        // Re-read so answers queued while the report was in flight are kept
+        const remaining = await readStorage(RESULTS_KEY, []);
+        await chrome.storage.local.set({
+          [RESULTS_KEY]: remaining.filter((answer) => !settled.has(answer.grading_token)),
+        });
+      }
+    })()
+      .catch((error) => console.error('Failed to report gate pack results:', error))
+      .finally(() => {
+        flushing = null;
+      });
+  }
+  return flushing;
+}
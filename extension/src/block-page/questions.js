@@ -3,6 +3,7 @@ import { fetchQuestionsForExtension } from '../api/client.js';
 // Cache for questions
 let questionCache = null;
 let cacheTimestamp = null;
+let syncCursor = null;
 const CACHE_DURATION_MS = 5 * 60 * 1000; // 5 minutes
 
 /**
@@ -17,11 +18,12 @@ async function getQuestionsFromBackend() {
   }
 
   try {
-    // Fetch fresh questions from backend
-    const questions = await fetchQuestionsForExtension();
-    questionCache = questions;
+    // First load fetches the whole deck; later refreshes only what changed
+    const delta = await fetchQuestionsForExtension(questionCache ? syncCursor : null);
+    questionCache = mergeQuestions(delta.reset ? [] : questionCache, delta);
+    syncCursor = delta.cursor;
     cacheTimestamp = now;
-    return questions;
+    return questionCache;
   } catch (error) {
     console.error('Failed to fetch questions from backend:', error);
 
@@ -42,6 +44,13 @@ async function getQuestionsFromBackend() {
   }
 }
 
+function mergeQuestions(questions, { changed, deleted }) {
+  const byId = new Map(questions.map((question) => [question.id, question]));
+  for (const id of deleted) byId.delete(id);
+  for (const question of changed) byId.set(question.id, question);
+  return Array.from(byId.values());
+}
+
 // question-selector.js
 
 /**